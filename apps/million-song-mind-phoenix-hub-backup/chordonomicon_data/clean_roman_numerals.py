@@ -2,14 +2,32 @@
 """
 Roman Numeral Cleaning Script
 Processes the complete data3 file to clean Roman numerals and convert slash chords to scale degrees
+
+Reads and writes CSV or typed Parquet (chosen by file extension), so a
+Parquet pipeline never round-trips through text.
 """
 
 import pandas as pd
+import argparse
 import re
 import os
 import sys
 from pathlib import Path
 
+def read_data3(path):
+    """Load a data3 file - Parquet keeps its column types, CSV is parsed"""
+    if Path(path).suffix == ".parquet":
+        return pd.read_parquet(path, dtype_backend="pyarrow")  # Arrow types survive the round trip (int16 decade)
+    return pd.read_csv(path, low_memory=False)
+
+def write_data3(df, path):
+    """Save a data3 file in the format implied by its extension"""
+    if Path(path).suffix == ".parquet":
+        df.to_parquet(path, index=False, compression="zstd", use_dictionary=["key", "main_genre"],
+                      row_group_size=100_000)
+    else:
+        df.to_csv(path, index=False)
+
 def load_roman_mapping():
     """Load the Roman numeral mapping from CSV"""
     mapping_file = "Onboarding/RomanNumeralMapping.csv"
@@ -86,7 +104,7 @@ def clean_roman_numerals(input_file, output_file):
     try:
         # Read the input file
         print(f"📖 Reading input file: {input_file}")
-        df = pd.read_csv(input_file, low_memory=False)
+        df = read_data3(input_file)
         print(f"   Total rows: {len(df)}")
         
         # Check if roman_numerals column exists
@@ -121,7 +139,7 @@ def clean_roman_numerals(input_file, output_file):
         
         # Save the cleaned file
         print(f"💾 Saving cleaned file: {output_file}")
-        df_cleaned.to_csv(output_file, index=False)
+        write_data3(df_cleaned, output_file)
         
         # Show sample of cleaned data
         print("\n📋 Sample of cleaned data:")
@@ -138,8 +156,13 @@ def clean_roman_numerals(input_file, output_file):
 def main():
     """Main function"""
     
-    input_file = "chordonomicon_data/stitches/data3_complete_chordonomicon_v2.csv"
-    output_file = "chordonomicon_data/cleaned/data3_cleaned_chordonomicon_v2.csv"
+    parser = argparse.ArgumentParser(description="Clean Roman numerals in the complete data3 file")
+    parser.add_argument("--format", dest="data_format", choices=["csv", "parquet"], default="csv",
+                        help="Format of the stitched data3 file and the cleaned output (default: csv)")
+    args = parser.parse_args()
+    
+    input_file = f"chordonomicon_data/stitches/data3_complete_chordonomicon_v2.{args.data_format}"
+    output_file = f"chordonomicon_data/cleaned/data3_cleaned_chordonomicon_v2.{args.data_format}"
     
     # Check if input file exists
     if not os.path.exists(input_file):
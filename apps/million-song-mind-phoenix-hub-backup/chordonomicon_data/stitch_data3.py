@@ -2,20 +2,45 @@
 """
 Data3 Stitching Script
 Combines Mac Pro and Mac Studio outputs into complete data3 file
+
+--format parquet stitches the typed Parquet outputs of VIPER --format parquet
+without converting them to text.
 """
 
 import pandas as pd
+import argparse
 import os
 import sys
 from pathlib import Path
 
-def stitch_data3_files():
+def stitch_parquet_files(input_files, output_file):
+    """Concatenate typed data3 Parquet files as Arrow tables (no CSV round trip)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    tables = []
+    for input_file in input_files:
+        print(f"📖 Reading {input_file}")
+        table = pq.read_table(input_file)
+        print(f"   Rows: {table.num_rows}")
+        tables.append(table)
+    
+    print("🔗 Concatenating files...")
+    combined = pa.concat_tables(tables)
+    print(f"   Combined rows: {combined.num_rows}")
+    
+    print(f"💾 Saving combined file: {output_file}")
+    pq.write_table(combined, output_file, compression='zstd', use_dictionary=['key', 'main_genre'],
+                   row_group_size=100_000)
+    return combined.slice(0, 5).to_pandas()
+
+def stitch_data3_files(data_format="csv"):
     """Stitch together Mac Pro and Mac Studio data3 outputs"""
     
     # Define file paths
-    macpro_file = "chordonomicon_data/outputs/data3_macpro_chordonomicon_v2.csv"
-    studio_file = "chordonomicon_data/outputs/data3_studio_chordonomicon_v2.csv"
-    output_file = "chordonomicon_data/stitches/data3_complete_chordonomicon_v2.csv"
+    macpro_file = f"chordonomicon_data/outputs/data3_macpro_chordonomicon_v2.{data_format}"
+    studio_file = f"chordonomicon_data/outputs/data3_studio_chordonomicon_v2.{data_format}"
+    output_file = f"chordonomicon_data/stitches/data3_complete_chordonomicon_v2.{data_format}"
     
     print("🔗 STITCHING DATA3 FILES")
     print("=" * 50)
@@ -32,6 +57,14 @@ def stitch_data3_files():
         return False
     
     try:
+        if data_format == "parquet":
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            sample = stitch_parquet_files([macpro_file, studio_file], output_file)
+            print("✅ Stitching complete!")
+            print("\n📋 Sample of combined data:")
+            print(sample)
+            return True
+        
         # Read the files
         print(f"📖 Reading Mac Pro file: {macpro_file}")
         macpro_df = pd.read_csv(macpro_file)
@@ -67,7 +100,12 @@ def stitch_data3_files():
         return False
 
 if __name__ == "__main__":
-    success = stitch_data3_files()
+    parser = argparse.ArgumentParser(description="Stitch Mac Pro + Mac Studio data3 outputs")
+    parser.add_argument("--format", dest="data_format", choices=["csv", "parquet"], default="csv",
+                        help="Format of the data3 files to stitch (default: csv)")
+    args = parser.parse_args()
+    
+    success = stitch_data3_files(args.data_format)
     if success:
         print("\n🎉 Ready for scale degree conversion!")
     else:
@@ -36,21 +36,30 @@ import time
 import sys
 import os
 import hashlib
+import base64
 import logging
+import atexit
 import traceback
 import warnings
 import gc
 import psutil
 import platform
 import subprocess
+import shutil
+import sqlite3
+import heapq
+import random
+import itertools
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any, Set, Union
 from dataclasses import dataclass
-from collections import defaultdict, Counter, deque
+from collections import defaultdict, Counter, deque, OrderedDict
 from functools import lru_cache
 import multiprocessing as mp
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 import argparse
 
 # Spotify metadata fetching imports
@@ -60,6 +69,20 @@ import backoff
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeElapsedColumn
 
+# Typed Parquet output (--format parquet) is optional
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Shared --rate-limit-file pacing needs flock (macOS/Linux)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 # Optimize for maximum performance - BEAST MODE
 warnings.filterwarnings('ignore')
 os.environ['PYTHONWARNINGS'] = 'ignore'
@@ -199,7 +222,20 @@ class UltimateMachineDetector:
 # =====================================================================================
 
 class UltimateLogger:
-    """Maximum performance logging optimized for dual-machine coordination"""
+    """Maximum performance logging optimized for dual-machine coordination
+    
+    Log calls only enqueue the record: one background QueueListener thread
+    owns the file and console handlers, and pool workers attached with
+    attach_worker() send their records through the same queue. Per-song
+    errors are aggregated and summarised at most once per
+    ERROR_SUMMARY_INTERVAL seconds per scope instead of logged one by one.
+    
+    Use it as a context manager (or call close()) so the listener is stopped
+    and the queue drained: the atexit hook is only a backstop for the main
+    process, it never runs in multiprocessing children.
+    """
+    
+    ERROR_SUMMARY_INTERVAL = 5.0  # Seconds between summary lines for one scope
     
     def __init__(self, machine_specs: MachineSpecs):
         self.machine = machine_specs
@@ -210,21 +246,53 @@ class UltimateLogger:
         # Setup high-performance logging
         log_filename = f"viper_ultimate_{machine_specs.output_suffix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
         
+        # File and console I/O happen on the listener thread, never on the hot path
+        formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s', datefmt='%H:%M:%S')
+        handlers = [logging.FileHandler(log_filename, encoding='utf-8'), logging.StreamHandler(sys.stdout)]
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        self.log_queue = mp.Queue(-1)
+        self.listener: Optional[QueueListener] = QueueListener(self.log_queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.close)  # Backstop only - see the class docstring
+        
         # Configure logging for maximum throughput
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s [%(levelname)s] %(message)s',
-            datefmt='%H:%M:%S',
-            handlers=[
-                logging.FileHandler(log_filename, encoding='utf-8', ),
-                logging.StreamHandler(sys.stdout)
-            ]
-        )
+        queue_handler = QueueHandler(self.log_queue)
+        queue_handler.setFormatter(logging.Formatter('%(message)s'))  # Listener handlers add time and level
+        logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
         self.logger = logging.getLogger(f'VIPER_{machine_specs.output_suffix.upper()}')
         
+        # Aggregated error summaries: scope -> pending error counts / batches / last emit time
+        self.pending_errors: Dict[str, Counter] = defaultdict(Counter)
+        self.pending_error_batches: Counter = Counter()
+        self.pending_error_examples: Dict[str, str] = {}
+        self.last_error_summary: Dict[str, float] = {}
+        
         # Victory banner
         self.display_machine_banner()
     
+    @staticmethod
+    def attach_worker(log_queue: Any):
+        """Route a pool worker's log records to the parent's writer thread"""
+        root = logging.getLogger()
+        root.handlers = [QueueHandler(log_queue)]
+        root.setLevel(logging.INFO)
+    
+    def close(self):
+        """Flush pending error summaries and stop the writer thread (idempotent)"""
+        if self.listener is None:
+            return
+        self.flush_error_summaries()
+        self.listener.stop()
+        self.listener = None
+        atexit.unregister(self.close)
+    
+    def __enter__(self) -> 'UltimateLogger':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
     def display_machine_banner(self):
         """Display epic machine detection banner"""
         banner_width = 80
@@ -257,11 +325,39 @@ class UltimateLogger:
     def critical(self, msg: str): 
         self.logger.critical(f"💥 {msg}")
     
-    def progress(self, processed: int, total: int, speed: float):
+    def batch_errors(self, scope: str, errors: Dict[str, int], example: str = ''):
+        """Record one batch's per-song error counts (by error type) for a rate-limited summary"""
+        if not errors:
+            return
+        self.pending_errors[scope].update(errors)
+        self.pending_error_batches[scope] += 1
+        if example:
+            self.pending_error_examples.setdefault(scope, example)
+        if time.monotonic() - self.last_error_summary.get(scope, float('-inf')) >= self.ERROR_SUMMARY_INTERVAL:
+            self._emit_error_summary(scope)
+    
+    def flush_error_summaries(self):
+        """Emit every pending error summary regardless of the rate limit"""
+        for scope in list(self.pending_errors):
+            self._emit_error_summary(scope)
+    
+    def _emit_error_summary(self, scope: str):
+        errors = self.pending_errors.pop(scope, None)
+        if not errors:
+            return
+        batches = self.pending_error_batches.pop(scope, 0)
+        example = self.pending_error_examples.pop(scope, '')
+        breakdown = ', '.join(f"{name} ×{count:,}" for name, count in errors.most_common())
+        self.last_error_summary[scope] = time.monotonic()
+        self.error(f"{scope}: {sum(errors.values()):,} song errors in {batches:,} batch(es) - {breakdown}"
+                   + (f" (first: {example})" if example else ''))
+    
+    def progress(self, processed: int, total: int, speed: float, batch_size: Optional[int] = None):
         """High-frequency progress updates"""
         progress_pct = (processed / max(total, 1)) * 100
         eta_minutes = (total - processed) / max(speed, 1) / 60
-        self.logger.info(f"⚡ Progress: {progress_pct:.1f}% | {processed:,}/{total:,} | {speed:.1f}/sec | ETA: {eta_minutes:.1f}min")
+        batch_info = f" | batch {batch_size:,}" if batch_size else ""
+        self.logger.info(f"⚡ Progress: {progress_pct:.1f}% | {processed:,}/{total:,} | {speed:.1f}/sec | ETA: {eta_minutes:.1f}min{batch_info}")
     
     def performance_summary(self) -> Dict[str, Any]:
         """Generate final performance report"""
@@ -288,6 +384,75 @@ class UltimateLogger:
             }
         }
 
+# =====================================================================================
+# BOUNDED MEMOIZATION CACHES
+# =====================================================================================
+
+def _approx_nbytes(value: Any) -> int:
+    """Approximate in-memory size of a cached value (containers are walked)"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_approx_nbytes(k) + _approx_nbytes(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_approx_nbytes(item) for item in value)
+    return size
+
+class BoundedLRUCache:
+    """Least-recently-used memo bounded by an approximate memory budget
+    
+    Each entry is charged the size of its key and value; once the total
+    exceeds max_bytes the least recently used entries are evicted.
+    max_bytes <= 0 disables the cache (every lookup misses, nothing is kept).
+    """
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Any, Tuple[Any, int]]' = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Any, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+    
+    def put(self, key: Any, value: Any):
+        if self.max_bytes <= 0:
+            return
+        size = _approx_nbytes(key) + _approx_nbytes(value)
+        if size > self.max_bytes:
+            return  # Larger than the whole budget - not worth evicting everything for
+        
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.nbytes -= previous[1]
+        self._entries[key] = (value, size)
+        self.nbytes += size
+        
+        while self.nbytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.nbytes -= evicted_size
+            self.evictions += 1
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def stats(self, name: str) -> Dict[str, int]:
+        """Counters for cache_report, prefixed with the cache name"""
+        return {
+            f'{name}_hits': self.hits,
+            f'{name}_misses': self.misses,
+            f'{name}_evictions': self.evictions,
+            f'{name}_size': len(self._entries),
+            f'{name}_bytes': self.nbytes
+        }
+
 # =====================================================================================
 # ULTIMATE PURE MUSIC THEORY ENGINE (NO EXTERNAL DEPENDENCIES)
 # =====================================================================================
@@ -395,17 +560,41 @@ class UltimatePureMusicTheoryEngine:
         'min7#11': {'intervals': [0, 3, 7, 10, 18], 'quality': 'minor', 'complexity': 3.5, 'stability': 0.4},
     }
     
+    # Section-aware key detection weights (first substring match wins)
+    SECTION_WEIGHTS = {
+        'verse': 1.0, 'chorus': 1.5, 'bridge': 1.2, 'intro': 0.8, 
+        'outro': 1.1, 'solo': 1.0, 'prechorus': 1.3, 'refrain': 1.4
+    }
+    
+    # TRUE HUV: Frequency-optimized extensions list
+    HUV_EXTENSIONS = ["b7", "7", "sus4", "sus2", "9", "b9", "#9", "11", "#11", "13", "b13", "alt", "no3", "no5", "6", "b2", "bb3", "#4", "b6", "bb7"]
+    
     # Scale degree mappings for Roman numeral analysis
     MAJOR_SCALE_DEGREES = {0: 'I', 2: 'ii', 4: 'iii', 5: 'IV', 7: 'V', 9: 'vi', 11: 'vii°'}
     MINOR_SCALE_DEGREES = {0: 'i', 2: 'ii°', 3: 'bIII', 5: 'iv', 7: 'v', 8: 'bVI', 10: 'bVII'}
     HARMONIC_MINOR_DEGREES = {0: 'i', 2: 'ii°', 3: 'bIII+', 5: 'iv', 7: 'V', 8: 'bVI', 11: 'vii°'}
     
-    def __init__(self):
-        # Ultra-high-performance caches
+    # Default memory budget for the key/roman/HUV sequence caches, per engine
+    DEFAULT_CACHE_BUDGET_MB = 64.0
+    
+    # Share of the budget each sequence cache gets (HUV strings are the largest values)
+    CACHE_BUDGET_SHARES = {'key': 0.2, 'roman': 0.3, 'huv': 0.5}
+    
+    def __init__(self, cache_budget_mb: Optional[float] = None):
+        # Ultra-high-performance caches - sequence caches are LRU-bounded and keyed
+        # on digests of the full chord sequence
+        if cache_budget_mb is None:
+            cache_budget_mb = self.DEFAULT_CACHE_BUDGET_MB
+        budget_bytes = int(cache_budget_mb * 1024 * 1024)
         self._chord_cache = {}
-        self._key_cache = {}
-        self._roman_cache = {}
-        self._huv_cache = {}
+        self._key_cache = BoundedLRUCache(int(budget_bytes * self.CACHE_BUDGET_SHARES['key']))
+        self._roman_cache = BoundedLRUCache(int(budget_bytes * self.CACHE_BUDGET_SHARES['roman']))
+        self._huv_cache = BoundedLRUCache(int(budget_bytes * self.CACHE_BUDGET_SHARES['huv']))
+        self._vocab_roman_cache = {}  # (key_semitone, is_major) -> roman per vocabulary id
+        self._vocab_roman_owner = None  # Vocabulary the cached id tables belong to
+        self.cache_stats = Counter()  # '<cache>_hits' / '<cache>_misses'
+        # parse_chord_ultimate's lru_cache is class-wide (and inherited across fork): count from here
+        self._parse_cache_base = UltimatePureMusicTheoryEngine.parse_chord_ultimate.cache_info()[:2]
         
         # Precompute all key profiles for lightning-fast correlation
         self._precomputed_major_profiles = np.array([
@@ -417,8 +606,17 @@ class UltimatePureMusicTheoryEngine:
             for i in range(12)
         ])
         
+        # Centred, unit-norm stack of all 24 rotated profiles (12 major + 12 minor)
+        # so a whole batch of songs correlates against every key in one matmul
+        key_profiles = np.vstack([self._precomputed_major_profiles, self._precomputed_minor_profiles])
+        key_profiles = key_profiles - key_profiles.mean(axis=1, keepdims=True)
+        self._key_profile_matrix = key_profiles / np.linalg.norm(key_profiles, axis=1, keepdims=True)
+        
         # Vectorized note mapping for ultra-speed
         self._note_vector = np.array([self.NOTE_TO_SEMITONE.get(note, 0) for note in self.CHROMATIC_NOTES])
+        
+        # Dense Roman numeral tables - numeral generation becomes integer gathers
+        self._build_roman_tables()
     
     def normalize_note_ultimate(self, note: str) -> str:
         """Ultra-fast note normalization with comprehensive enharmonic support"""
@@ -588,16 +786,48 @@ class UltimatePureMusicTheoryEngine:
         
         return chord_type
     
-    def detect_key_ultimate(self, chord_sequence: List[str]) -> Tuple[str, bool, float, Dict[str, Any]]:
-        """Ultimate key detection with advanced confidence analysis"""
+    def _section_weight_ultimate(self, section_marker: str) -> Optional[float]:
+        """Key detection weight for a <section> marker (None keeps the current weight)"""
+        section_name = section_marker.strip('<>').lower()
+        for section_key, weight in self.SECTION_WEIGHTS.items():
+            if section_key in section_name:
+                return weight
+        return None
+    
+    @staticmethod
+    def _chord_tone_weights(root_semitone: int, intervals: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-chord pitch-class and functional-harmony contributions at unit weight"""
         
-        if not chord_sequence:
-            return 'C', True, 0.0, {'method': 'empty_sequence'}
+        pitch_tones = np.zeros(12, dtype=np.float64)
+        chord_tones = np.zeros(12, dtype=np.float64)
         
-        # Ultra-fast cache lookup
-        sequence_key = '|'.join(chord_sequence[:50])  # Limit for cache efficiency
-        if sequence_key in self._key_cache:
-            return self._key_cache[sequence_key]
+        # Root note gets maximum weight
+        pitch_tones[root_semitone] = 3.0
+        chord_tones[root_semitone] = 2.0
+        
+        # Chord tones with sophisticated weighting
+        for j, interval in enumerate(intervals):
+            if interval == 0:  # Skip duplicate root
+                continue
+            semitone = (root_semitone + interval) % 12
+            # Diminishing weight for higher extensions, but account for chord quality
+            interval_weight = max(0.2, 1.0 - (j * 0.1))
+            if j == 1:  # Third of the chord - very important for mode
+                interval_weight *= 1.5
+            elif j == 2:  # Fifth - important for stability
+                interval_weight *= 1.2
+            
+            pitch_tones[semitone] += interval_weight
+            chord_tones[semitone] += interval_weight * 0.5
+        
+        return pitch_tones, chord_tones
+    
+    def build_key_profile_ultimate(self, chord_sequence: List[str]) -> Tuple[np.ndarray, int, float, float]:
+        """Build the combined 12-bin pitch-class profile used for key detection
+        
+        Returns (combined_profile, valid_chords, total_complexity, total_stability).
+        A sequence without any parseable chord yields an all-zero profile.
+        """
         
         # Initialize weighted pitch class histogram
         pitch_classes = np.zeros(12, dtype=np.float64)
@@ -608,21 +838,15 @@ class UltimatePureMusicTheoryEngine:
         total_stability = 0
         
         # Section-aware weighting
-        section_weights = {
-            'verse': 1.0, 'chorus': 1.5, 'bridge': 1.2, 'intro': 0.8, 
-            'outro': 1.1, 'solo': 1.0, 'prechorus': 1.3, 'refrain': 1.4
-        }
         current_section_weight = 1.0
         
         # Advanced chord sequence analysis with contextual weighting
         for i, chord_str in enumerate(chord_sequence):
             # Handle section markers
             if chord_str.startswith('<'):
-                section_name = chord_str.strip('<>').lower()
-                for section_key, weight in section_weights.items():
-                    if section_key in section_name:
-                        current_section_weight = weight
-                        break
+                section_weight = self._section_weight_ultimate(chord_str)
+                if section_weight is not None:
+                    current_section_weight = section_weight
                 continue
             
             parsed = self.parse_chord_ultimate(chord_str)
@@ -644,29 +868,9 @@ class UltimatePureMusicTheoryEngine:
             
             total_weight = current_section_weight * position_weight * functional_weight * stability_weight
             
-            # Root note gets maximum weight
-            pitch_classes[root_semitone] += 3.0 * total_weight
-            chord_weights[root_semitone] += 2.0 * total_weight
-            
-            # Chord tones with sophisticated weighting
-            for j, interval in enumerate(parsed['intervals']):
-                if interval == 0:  # Skip duplicate root
-                    continue
-                semitone = (root_semitone + interval) % 12
-                # Diminishing weight for higher extensions, but account for chord quality
-                interval_weight = max(0.2, 1.0 - (j * 0.1))
-                if j == 1:  # Third of the chord - very important for mode
-                    interval_weight *= 1.5
-                elif j == 2:  # Fifth - important for stability
-                    interval_weight *= 1.2
-                
-                pitch_classes[semitone] += interval_weight * total_weight
-                chord_weights[semitone] += interval_weight * 0.5 * total_weight
-        
-        if valid_chords == 0:
-            result = ('C', True, 0.0, {'method': 'no_valid_chords', 'valid_chords': 0})
-            self._key_cache[sequence_key] = result
-            return result
+            pitch_tones, chord_tones = self._chord_tone_weights(root_semitone, parsed['intervals'])
+            pitch_classes += total_weight * pitch_tones
+            chord_weights += total_weight * chord_tones
         
         # Normalize histograms
         if np.sum(pitch_classes) > 0:
@@ -677,19 +881,73 @@ class UltimatePureMusicTheoryEngine:
         # Combine pitch class and functional harmony analysis
         combined_profile = 0.7 * pitch_classes + 0.3 * chord_weights
         
-        # Ultra-fast vectorized correlation calculation
-        major_correlations = np.array([
-            np.corrcoef(combined_profile, profile)[0, 1] if np.var(combined_profile) > 0 else 0.0
-            for profile in self._precomputed_major_profiles
-        ])
-        minor_correlations = np.array([
-            np.corrcoef(combined_profile, profile)[0, 1] if np.var(combined_profile) > 0 else 0.0
-            for profile in self._precomputed_minor_profiles
-        ])
+        return combined_profile, valid_chords, total_complexity, total_stability
+    
+    def correlate_key_profiles_ultimate(self, profiles: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Pearson correlation of every (N, 12) profile row against all 24 rotated key profiles
+        
+        Equivalent to np.corrcoef per (row, key) pair, but done as one centred,
+        normalised matrix product. Flat (zero-variance) rows correlate as 0.0.
+        Returns (major_correlations, minor_correlations), each shaped (N, 12).
+        """
+        
+        profiles = np.asarray(profiles, dtype=np.float64)
+        centred = profiles - profiles.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(centred, axis=1, keepdims=True)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlations = (centred / norms) @ self._key_profile_matrix.T
+        
+        correlations = np.clip(np.nan_to_num(correlations, nan=0.0), -1.0, 1.0)
+        correlations[norms[:, 0] == 0] = 0.0
+        return correlations[:, :12], correlations[:, 12:]
+    
+    def detect_keys_batch_ultimate(self, profiles: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Batched key detection over an (N, 12) matrix of combined pitch-class profiles
+        
+        Row-for-row identical to detect_key_ultimate given the profiles from
+        build_key_profile_ultimate. Returns (keys, is_major, confidence, ambiguity)
+        as length-N arrays.
+        """
+        
+        major_correlations, minor_correlations = self.correlate_key_profiles_ultimate(profiles)
+        
+        best_major_idx = np.argmax(major_correlations, axis=1)
+        best_minor_idx = np.argmax(minor_correlations, axis=1)
+        rows = np.arange(len(best_major_idx))
+        best_major_corr = major_correlations[rows, best_major_idx]
+        best_minor_corr = minor_correlations[rows, best_minor_idx]
+        
+        is_major = best_major_corr >= best_minor_corr
+        keys = self.CHROMATIC_NOTES[np.where(is_major, best_major_idx, best_minor_idx)]
+        confidence = np.where(is_major, best_major_corr, best_minor_corr)
+        ambiguity = np.abs(best_major_corr - best_minor_corr)
+        
+        return keys, is_major, confidence, ambiguity
+    
+    def detect_key_ultimate(self, chord_sequence: List[str]) -> Tuple[str, bool, float, Dict[str, Any]]:
+        """Ultimate key detection with advanced confidence analysis"""
+        
+        if not chord_sequence:
+            return 'C', True, 0.0, {'method': 'empty_sequence'}
+        
+        # Ultra-fast cache lookup
+        sequence_key = self._sequence_digest(chord_sequence)
+        cached = self._key_cache.get(sequence_key)
+        if cached is not None:
+            return cached
+        
+        combined_profile, valid_chords, total_complexity, total_stability = self.build_key_profile_ultimate(chord_sequence)
         
-        # Handle NaN values
-        major_correlations = np.nan_to_num(major_correlations, nan=0.0)
-        minor_correlations = np.nan_to_num(minor_correlations, nan=0.0)
+        if valid_chords == 0:
+            result = ('C', True, 0.0, {'method': 'no_valid_chords', 'valid_chords': 0})
+            self._key_cache.put(sequence_key, result)
+            return result
+        
+        # Ultra-fast vectorized correlation calculation (same kernel as the batch path)
+        major_correlations, minor_correlations = self.correlate_key_profiles_ultimate(combined_profile[np.newaxis, :])
+        major_correlations = major_correlations[0]
+        minor_correlations = minor_correlations[0]
         
         # Find best keys
         best_major_idx = np.argmax(major_correlations)
@@ -728,26 +986,21 @@ class UltimatePureMusicTheoryEngine:
         }
         
         result = (key_name, is_major, confidence, analysis_metadata)
-        self._key_cache[sequence_key] = result
+        self._key_cache.put(sequence_key, result)
         return result
     
     def generate_roman_numerals_ultimate(self, chord_sequence: List[str], key: str, is_major: bool) -> List[str]:
         """Ultimate Roman numeral generation with advanced harmonic analysis"""
         
         # Fast cache lookup
-        cache_key = f"{key}_{is_major}_{'|'.join(chord_sequence[:30])}"
-        if cache_key in self._roman_cache:
-            return self._roman_cache[cache_key]
+        cache_key = self._sequence_digest(chord_sequence, f"{key}_{is_major}")
+        cached = self._roman_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         romans = []
         key_semitone = self.NOTE_TO_SEMITONE.get(key, 0)
         
-        # Choose appropriate scale degrees
-        if is_major:
-            scale_degrees = self.MAJOR_SCALE_DEGREES
-        else:
-            scale_degrees = self.MINOR_SCALE_DEGREES
-        
         for chord_str in chord_sequence:
             # Preserve section markers
             if chord_str.startswith('<'):
@@ -759,104 +1012,160 @@ class UltimatePureMusicTheoryEngine:
                 romans.append('?')
                 continue
             
+            bass = parsed['bass'] if parsed.get('bass') and parsed['bass'] != parsed['root'] else None
             root_semitone = self.NOTE_TO_SEMITONE.get(parsed['root'], 0)
-            degree = (root_semitone - key_semitone) % 12
-            chord_type = parsed['chord_type']
-            quality_family = parsed.get('quality_family', 'major')
+            chord_type_code = self._roman_chord_type_codes.get(parsed['chord_type'])
+            bass_semitone = self.NOTE_TO_SEMITONE.get(bass) if bass else -1
             
-            # Determine base Roman numeral
-            if degree in scale_degrees:
-                # Diatonic chord
-                roman = scale_degrees[degree]
-                
-                # Adjust for chord quality
-                if quality_family == 'minor' and roman.isupper():
-                    roman = roman.lower()
-                elif quality_family == 'major' and roman.islower() and '°' not in roman:
-                    roman = roman.upper()
-                elif quality_family == 'diminished':
-                    if roman.islower():
-                        roman = roman + '°' if '°' not in roman else roman
-                    else:
-                        roman = roman.lower() + '°'
-                elif quality_family == 'augmented':
-                    roman = roman + '+'
-                
-                # Add extensions and alterations
-                if '7' in chord_type:
-                    roman += '7'
-                elif '9' in chord_type:
-                    roman += '9'
-                elif '11' in chord_type:
-                    roman += '11'
-                elif '13' in chord_type:
-                    roman += '13'
-                
-                # Special qualities
-                if 'sus' in chord_type:
-                    if 'sus4' in chord_type:
-                        roman += 'sus4'
-                    elif 'sus2' in chord_type:
-                        roman += 'sus2'
-                elif 'add' in chord_type:
-                    if 'add9' in chord_type:
-                        roman += 'add9'
-                    elif 'add6' in chord_type or chord_type == '6':
-                        roman += '6'
-                elif 'alt' in chord_type:
-                    roman += 'alt'
-                elif 'b9' in chord_type:
-                    roman += 'b9'
-                elif '#9' in chord_type:
-                    roman += '#9'
-                elif 'b5' in chord_type:
-                    roman += 'b5'
-                elif '#5' in chord_type:
-                    roman += '#5'
-                elif '#11' in chord_type:
-                    roman += '#11'
-                
-            else:
-                # Non-diatonic chord - check for secondary dominants
-                if quality_family == 'dominant' and ('7' in chord_type or chord_type == 'dom7'):
-                    # Potential secondary dominant
-                    target_degree = (degree + 5) % 12  # V7 typically resolves down a fifth
-                    if target_degree in scale_degrees:
-                        target_roman = scale_degrees[target_degree]
-                        roman = f"V7/{target_roman}"
-                    else:
-                        # Use chromatic degree notation
-                        roman = self._get_chromatic_degree_notation(degree, is_major)
+            if chord_type_code is None or bass_semitone is None:
+                # Outside the precomputed space - derive it directly
+                romans.append(self._roman_numeral_for_chord(
+                    root_semitone, parsed['chord_type'], parsed.get('quality_family', 'major'),
+                    bass, key_semitone, is_major
+                ))
+                continue
+            
+            mode = 0 if is_major else 1
+            romans.append(self._roman_body_table[mode, (root_semitone - key_semitone) % 12, chord_type_code]
+                          + self._roman_slash_table[mode, key_semitone, bass_semitone + 1])
+        
+        # Cache result
+        self._roman_cache.put(cache_key, romans)
+        return romans
+    
+    def _roman_numeral_for_chord(self, root_semitone: int, chord_type: str, quality_family: str,
+                                 bass: Optional[str], key_semitone: int, is_major: bool) -> str:
+        """Roman numeral for a single parsed chord (bass is None unless it differs from the root)"""
+        
+        scale_degrees = self.MAJOR_SCALE_DEGREES if is_major else self.MINOR_SCALE_DEGREES
+        degree = (root_semitone - key_semitone) % 12
+        
+        # Determine base Roman numeral
+        if degree in scale_degrees:
+            # Diatonic chord
+            roman = scale_degrees[degree]
+            
+            # Adjust for chord quality
+            if quality_family == 'minor' and roman.isupper():
+                roman = roman.lower()
+            elif quality_family == 'major' and roman.islower() and '°' not in roman:
+                roman = roman.upper()
+            elif quality_family == 'diminished':
+                if roman.islower():
+                    roman = roman + '°' if '°' not in roman else roman
+                else:
+                    roman = roman.lower() + '°'
+            elif quality_family == 'augmented':
+                roman = roman + '+'
+            
+            # Add extensions and alterations
+            if '7' in chord_type:
+                roman += '7'
+            elif '9' in chord_type:
+                roman += '9'
+            elif '11' in chord_type:
+                roman += '11'
+            elif '13' in chord_type:
+                roman += '13'
+            
+            # Special qualities
+            if 'sus' in chord_type:
+                if 'sus4' in chord_type:
+                    roman += 'sus4'
+                elif 'sus2' in chord_type:
+                    roman += 'sus2'
+            elif 'add' in chord_type:
+                if 'add9' in chord_type:
+                    roman += 'add9'
+                elif 'add6' in chord_type or chord_type == '6':
+                    roman += '6'
+            elif 'alt' in chord_type:
+                roman += 'alt'
+            elif 'b9' in chord_type:
+                roman += 'b9'
+            elif '#9' in chord_type:
+                roman += '#9'
+            elif 'b5' in chord_type:
+                roman += 'b5'
+            elif '#5' in chord_type:
+                roman += '#5'
+            elif '#11' in chord_type:
+                roman += '#11'
+            
+        else:
+            # Non-diatonic chord - check for secondary dominants
+            if quality_family == 'dominant' and ('7' in chord_type or chord_type == 'dom7'):
+                # Potential secondary dominant
+                target_degree = (degree + 5) % 12  # V7 typically resolves down a fifth
+                if target_degree in scale_degrees:
+                    target_roman = scale_degrees[target_degree]
+                    roman = f"V7/{target_roman}"
                 else:
                     # Use chromatic degree notation
                     roman = self._get_chromatic_degree_notation(degree, is_major)
-                    
-                    # Adjust for quality
-                    if quality_family == 'minor':
-                        roman = roman.lower()
-                    elif quality_family == 'diminished':
-                        roman += '°'
-                    elif quality_family == 'augmented':
-                        roman += '+'
-            
-            # Handle bass note (slash chords)
-            if parsed.get('bass') and parsed['bass'] != parsed['root']:
-                bass_semitone = self.NOTE_TO_SEMITONE.get(parsed['bass'], 0)
-                bass_degree = (bass_semitone - key_semitone) % 12
+            else:
+                # Use chromatic degree notation
+                roman = self._get_chromatic_degree_notation(degree, is_major)
                 
-                # Try to use scale degree if possible
-                if bass_degree in scale_degrees:
-                    bass_roman = scale_degrees[bass_degree].replace('°', '').replace('+', '')
-                    roman += f"/{bass_roman}"
-                else:
-                    # Use actual bass note name
-                    roman += f"/{parsed['bass']}"
-            
-            romans.append(roman)
+                # Adjust for quality
+                if quality_family == 'minor':
+                    roman = roman.lower()
+                elif quality_family == 'diminished':
+                    roman += '°'
+                elif quality_family == 'augmented':
+                    roman += '+'
         
-        # Cache result
-        self._roman_cache[cache_key] = romans
-        return romans
+        # Handle bass note (slash chords)
+        if bass:
+            roman += self._roman_bass_suffix(bass, key_semitone, is_major)
+        
+        return roman
+    
+    def _roman_bass_suffix(self, bass: str, key_semitone: int, is_major: bool) -> str:
+        """Slash-chord suffix: bass scale degree if diatonic, otherwise the bass note name"""
+        
+        scale_degrees = self.MAJOR_SCALE_DEGREES if is_major else self.MINOR_SCALE_DEGREES
+        bass_semitone = self.NOTE_TO_SEMITONE.get(bass, 0)
+        bass_degree = (bass_semitone - key_semitone) % 12
+        
+        # Try to use scale degree if possible
+        if bass_degree in scale_degrees:
+            bass_roman = scale_degrees[bass_degree].replace('°', '').replace('+', '')
+            return f"/{bass_roman}"
+        # Use actual bass note name
+        return f"/{bass}"
+    
+    def _build_roman_tables(self):
+        """Precompute every Roman numeral the rules above can produce
+        
+        The numeral body depends only on mode, scale degree and chord type
+        (quality family follows from the chord type), and the slash suffix only
+        on mode, key and bass pitch class, so two small object tables cover the
+        whole space:
+        
+            _roman_body_table[mode, degree, chord_type]         (2, 12, T)
+            _roman_slash_table[mode, key, bass_semitone + 1]    (2, 12, 13), column 0 = no bass
+        
+        mode is 0 for major, 1 for minor; chord_type indexes ULTIMATE_CHORD_DATABASE order.
+        """
+        
+        chord_types = list(self.ULTIMATE_CHORD_DATABASE.keys())
+        self._roman_chord_type_codes = {chord_type: i for i, chord_type in enumerate(chord_types)}
+        self._roman_body_table = np.empty((2, 12, len(chord_types)), dtype=object)
+        self._roman_slash_table = np.empty((2, 12, 13), dtype=object)
+        
+        for mode, is_major in enumerate((True, False)):
+            for degree in range(12):
+                for code, chord_type in enumerate(chord_types):
+                    self._roman_body_table[mode, degree, code] = self._roman_numeral_for_chord(
+                        degree, chord_type, self.ULTIMATE_CHORD_DATABASE[chord_type]['quality'], None, 0, is_major
+                    )
+            for key_semitone in range(12):
+                self._roman_slash_table[mode, key_semitone, 0] = ''
+                for bass_semitone, bass in enumerate(self.CHROMATIC_NOTES.tolist()):
+                    self._roman_slash_table[mode, key_semitone, bass_semitone + 1] = self._roman_bass_suffix(
+                        bass, key_semitone, is_major
+                    )
     
     def _get_chromatic_degree_notation(self, degree: int, is_major: bool) -> str:
         """Generate chromatic degree notation for non-diatonic chords"""
@@ -884,43 +1193,10 @@ class UltimatePureMusicTheoryEngine:
         """TRUE HUV (Harmonic Usage Vector) fingerprint generation - frequency-optimized, single-column"""
         
         # Fast cache lookup for repeated sequences
-        sequence_key = '|'.join(chord_sequence[:100])
-        if sequence_key in self._huv_cache:
-            return self._huv_cache[sequence_key]
-        
-        # TRUE HUV: Frequency-optimized extensions list
-        EXTENSIONS = ["b7", "7", "sus4", "sus2", "9", "b9", "#9", "11", "#11", "13", "b13", "alt", "no3", "no5", "6", "b2", "bb3", "#4", "b6", "bb7"]
-        
-        def parse_chord_symbol(symbol):
-            """TRUE HUV chord parsing with frequency-optimized extensions"""
-            vector = [0] * (5 + len(EXTENSIONS))
-            vector[0:5] = [1, 1, 0, 0, 0]  # total, root, 1st, 2nd, 3rd
-            symbol = symbol.lower()
-            implied = []
-            
-            # Frequency-optimized extension detection
-            if "maj7" in symbol: implied += ["7"]
-            elif "7" in symbol: implied += ["b7"]
-            if "9" in symbol: implied += ["9"]
-            if "13" in symbol: implied += ["13"]
-            if "sus4" in symbol: implied += ["sus4"]
-            if "sus2" in symbol: implied += ["sus2"]
-            if "alt" in symbol: implied += ["alt"]
-            if "no3" in symbol: implied += ["no3"]
-            if "no5" in symbol: implied += ["no5"]
-            if "6" in symbol: implied += ["6"]
-            
-            # Set extension flags
-            for ext in set(implied):
-                if ext in EXTENSIONS:
-                    idx = EXTENSIONS.index(ext)
-                    vector[5 + idx] = 1
-            
-            # TRUE HUV: Early stopping logic - remove trailing zeros
-            while vector and vector[-1] == 0:
-                vector.pop()
-            
-            return ",".join(map(str, vector))
+        sequence_key = self._sequence_digest(chord_sequence)
+        cached = self._huv_cache.get(sequence_key)
+        if cached is not None:
+            return cached
         
         huv_vectors = []
         
@@ -931,16 +1207,48 @@ class UltimatePureMusicTheoryEngine:
                 continue
             
             # Generate TRUE HUV fingerprint
-            fingerprint = parse_chord_symbol(chord_str)
+            fingerprint = self._huv_vector_for_symbol(chord_str)
             huv_vectors.append(fingerprint)
         
         # Join all vectors with pipe separator
         result = '|'.join(huv_vectors)
         
         # Cache result
-        self._huv_cache[sequence_key] = result
+        self._huv_cache.put(sequence_key, result)
         return result
     
+    def _huv_vector_for_symbol(self, symbol: str) -> str:
+        """TRUE HUV chord parsing with frequency-optimized extensions"""
+        EXTENSIONS = self.HUV_EXTENSIONS
+        vector = [0] * (5 + len(EXTENSIONS))
+        vector[0:5] = [1, 1, 0, 0, 0]  # total, root, 1st, 2nd, 3rd
+        symbol = symbol.lower()
+        implied = []
+        
+        # Frequency-optimized extension detection
+        if "maj7" in symbol: implied += ["7"]
+        elif "7" in symbol: implied += ["b7"]
+        if "9" in symbol: implied += ["9"]
+        if "13" in symbol: implied += ["13"]
+        if "sus4" in symbol: implied += ["sus4"]
+        if "sus2" in symbol: implied += ["sus2"]
+        if "alt" in symbol: implied += ["alt"]
+        if "no3" in symbol: implied += ["no3"]
+        if "no5" in symbol: implied += ["no5"]
+        if "6" in symbol: implied += ["6"]
+        
+        # Set extension flags
+        for ext in set(implied):
+            if ext in EXTENSIONS:
+                idx = EXTENSIONS.index(ext)
+                vector[5 + idx] = 1
+        
+        # TRUE HUV: Early stopping logic - remove trailing zeros
+        while vector and vector[-1] == 0:
+            vector.pop()
+        
+        return ",".join(map(str, vector))
+    
     # CHROMA-BASED HUV (COMMENTED OUT - DEPRECATED)
     """
     def generate_huv_fingerprint_chroma_deprecated(self, chord_sequence: List[str]) -> str:
@@ -956,6 +1264,121 @@ class UltimatePureMusicTheoryEngine:
             huv_vectors.append(formatted_vector)
     """
     
+    def build_key_profile_from_ids(self, chord_ids: np.ndarray, vocabulary: 'ChordVocabulary') -> Tuple[np.ndarray, int, float, float]:
+        """build_key_profile_ultimate over interned chord ids - table gathers instead of parsing"""
+        
+        chord_ids = np.asarray(chord_ids, dtype=np.int32)
+        n = len(chord_ids)
+        if n == 0:
+            return np.zeros(12, dtype=np.float64), 0, 0, 0
+        
+        # Section weight carried forward from the last recognised <section> marker
+        marker_weights = vocabulary.section_weight[chord_ids]
+        has_weight = ~np.isnan(marker_weights)
+        last_marker = np.maximum.accumulate(np.where(has_weight, np.arange(n), -1))
+        section_weight = np.where(last_marker >= 0, marker_weights[np.maximum(last_marker, 0)], 1.0)
+        
+        # First and last chords more important
+        first_bonus = np.zeros(n)
+        first_bonus[0] = 0.5
+        last_bonus = np.zeros(n)
+        last_bonus[-1] = 0.3
+        position_weight = 1.0 + first_bonus + last_bonus
+        
+        is_chord = vocabulary.valid[chord_ids]
+        ids = chord_ids[is_chord]
+        valid_chords = len(ids)
+        if valid_chords == 0:
+            return np.zeros(12, dtype=np.float64), 0, 0, 0
+        
+        total_weight = (section_weight[is_chord] * position_weight[is_chord]
+                        * vocabulary.functional_weight[ids] * (0.5 + vocabulary.stability[ids]))
+        
+        # Sequential (cumsum) accumulation keeps results identical to the string path
+        pitch_classes = np.cumsum(total_weight[:, np.newaxis] * vocabulary.pitch_tones[ids], axis=0)[-1]
+        chord_weights = np.cumsum(total_weight[:, np.newaxis] * vocabulary.chord_tones[ids], axis=0)[-1]
+        
+        # Normalize histograms
+        if np.sum(pitch_classes) > 0:
+            pitch_classes = pitch_classes / np.sum(pitch_classes)
+        if np.sum(chord_weights) > 0:
+            chord_weights = chord_weights / np.sum(chord_weights)
+        
+        combined_profile = 0.7 * pitch_classes + 0.3 * chord_weights
+        total_complexity = sum(vocabulary.complexity[ids].tolist())
+        total_stability = sum(vocabulary.stability[ids].tolist())
+        
+        return combined_profile, valid_chords, total_complexity, total_stability
+    
+    def generate_roman_numerals_from_ids(self, chord_ids: np.ndarray, key: str, is_major: bool,
+                                         vocabulary: 'ChordVocabulary') -> List[str]:
+        """generate_roman_numerals_ultimate over interned chord ids - one gather per song"""
+        
+        key_semitone = self.NOTE_TO_SEMITONE.get(key, 0)
+        romans_by_id = self._vocabulary_roman_table(vocabulary, key_semitone, is_major)
+        return romans_by_id[np.asarray(chord_ids, dtype=np.int32)].tolist()
+    
+    def _vocabulary_roman_table(self, vocabulary: 'ChordVocabulary', key_semitone: int, is_major: bool) -> np.ndarray:
+        """Roman numeral of every vocabulary id in one key, gathered from the dense tables"""
+        
+        if self._vocab_roman_owner is not vocabulary:
+            self._vocab_roman_cache = {}
+            self._vocab_roman_owner = vocabulary
+        
+        romans_by_id = self._vocab_roman_cache.get((key_semitone, is_major))
+        if romans_by_id is not None:
+            self.cache_stats['vocab_roman_hits'] += 1
+            return romans_by_id
+        self.cache_stats['vocab_roman_misses'] += 1
+        
+        mode = 0 if is_major else 1
+        degrees = (vocabulary.root_semitone.astype(np.intp) - key_semitone) % 12
+        romans_by_id = (self._roman_body_table[mode, degrees, vocabulary.chord_type.astype(np.intp)]
+                        + self._roman_slash_table[mode, key_semitone, vocabulary.bass_semitone.astype(np.intp) + 1])
+        
+        romans_by_id[~vocabulary.valid] = '?'
+        for chord_id in np.flatnonzero(vocabulary.is_section).tolist():
+            romans_by_id[chord_id] = vocabulary.symbols[chord_id]  # Preserve section markers
+        for chord_id in np.flatnonzero(vocabulary.bass_semitone >= 0).tolist():
+            bass = vocabulary.bass_names[chord_id]
+            if bass != self.CHROMATIC_NOTES[vocabulary.bass_semitone[chord_id]]:
+                # Non-canonical bass spelling - the slash suffix prints the name itself
+                romans_by_id[chord_id] = self._roman_numeral_for_chord(
+                    int(vocabulary.root_semitone[chord_id]),
+                    vocabulary.CHORD_TYPES[vocabulary.chord_type[chord_id]],
+                    vocabulary.QUALITY_FAMILIES[vocabulary.quality_family[chord_id]],
+                    bass, key_semitone, is_major
+                )
+        
+        self._vocab_roman_cache[(key_semitone, is_major)] = romans_by_id
+        return romans_by_id
+    
+    def generate_huv_fingerprint_from_ids(self, chord_ids: np.ndarray, vocabulary: 'ChordVocabulary') -> str:
+        """generate_huv_fingerprint_ultimate over interned chord ids"""
+        return '|'.join(vocabulary.huv_vectors[np.asarray(chord_ids, dtype=np.int32)])
+    
+    @staticmethod
+    def _sequence_digest(chord_sequence: List[str], prefix: str = '') -> bytes:
+        """Cache key covering the whole chord sequence (plus an optional prefix such as the key)"""
+        digest = hashlib.blake2b(prefix.encode('utf-8'), digest_size=16)
+        digest.update('\x1f'.join(chord_sequence).encode('utf-8'))
+        return digest.digest()
+    
+    def cache_report(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and sizes for every engine cache"""
+        parse_info = UltimatePureMusicTheoryEngine.parse_chord_ultimate.cache_info()
+        report = dict(self.cache_stats)
+        report.update({
+            'parse_hits': parse_info.hits - self._parse_cache_base[0],
+            'parse_misses': parse_info.misses - self._parse_cache_base[1],
+            'parse_size': parse_info.currsize,
+            'vocab_roman_size': len(self._vocab_roman_cache)
+        })
+        report.update(self._key_cache.stats('key'))
+        report.update(self._roman_cache.stats('roman'))
+        report.update(self._huv_cache.stats('huv'))
+        return report
+    
     def extract_cpml_sequence_ultimate(self, cpml_string: str) -> List[str]:
         """Ultimate CPML (Chord Progression Markup Language) sequence extraction"""
         
@@ -994,160 +1417,1309 @@ class UltimatePureMusicTheoryEngine:
         return cleaned
 
 # =====================================================================================
-# ULTIMATE HIGH-PERFORMANCE DATA3 PROCESSOR
+# INTERNED CHORD VOCABULARY (INTEGER CHORD IDS)
 # =====================================================================================
 
-class UltimateData3Processor:
-    """Maximum performance data3 processor optimized for dual-machine setup with 90% CPU usage"""
+class ChordVocabulary:
+    """Corpus-wide table of distinct chord symbols, each parsed exactly once
     
-    def __init__(self, machine_specs: MachineSpecs, logger: UltimateLogger):
-        self.machine = machine_specs
-        self.logger = logger
-        self.music_theory = UltimatePureMusicTheoryEngine()
+    Every distinct CPML token (chords and <section> markers) gets a compact
+    integer id. Songs become int32 id arrays (see CpmlTokenBatch) and the
+    analysis stages gather
+    from the columns below instead of re-parsing strings:
+    
+        root_semitone   int8    root pitch class
+        chord_type      int16   index into CHORD_TYPES
+        interval_mask   int32   bit i set for each chord interval i (0-21)
+        quality_family  int8    index into QUALITY_FAMILIES
+        complexity      float64
+        stability       float64
+        bass_semitone   int8    slash-chord bass pitch class, -1 when none
+    """
+    
+    CHORD_TYPES = list(UltimatePureMusicTheoryEngine.ULTIMATE_CHORD_DATABASE.keys())
+    CHORD_TYPE_CODES = {chord_type: i for i, chord_type in enumerate(CHORD_TYPES)}
+    QUALITY_FAMILIES = sorted({data['quality'] for data in UltimatePureMusicTheoryEngine.ULTIMATE_CHORD_DATABASE.values()})
+    QUALITY_FAMILY_CODES = {quality: i for i, quality in enumerate(QUALITY_FAMILIES)}
+    
+    def __init__(self, music_theory: UltimatePureMusicTheoryEngine):
+        self._music_theory = music_theory
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.bass_names: List[Optional[str]] = []
+        self._rows: List[Tuple] = []
+        self._frozen = False
+    
+    def __len__(self) -> int:
+        return len(self.symbols)
+    
+    def __getstate__(self):
+        # Workers only need the frozen tables, not the build-time engine. The
+        # dense (V, 12) tone tables are rebuilt from root + interval mask on
+        # unpickle, which keeps the per-batch payload small.
+        state = self.__dict__.copy()
+        state['_music_theory'] = None
+        state['_rows'] = []
+        state.pop('pitch_tones', None)
+        state.pop('chord_tones', None)
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self._frozen:
+            self._build_tone_tables()
+    
+    def _build_tone_tables(self):
+        """Dense per-chord key-profile contributions from root semitone + interval mask"""
+        size = len(self.symbols)
+        self.pitch_tones = np.zeros((size, 12), dtype=np.float64)
+        self.chord_tones = np.zeros((size, 12), dtype=np.float64)
+        for chord_id in np.flatnonzero(self.valid).tolist():
+            mask = int(self.interval_mask[chord_id])
+            intervals = [interval for interval in range(mask.bit_length()) if mask >> interval & 1]
+            self.pitch_tones[chord_id], self.chord_tones[chord_id] = UltimatePureMusicTheoryEngine._chord_tone_weights(
+                int(self.root_semitone[chord_id]), intervals
+            )
+    
+    def intern(self, symbol: str) -> int:
+        """Return the id for a CPML token, parsing it on first sight"""
         
-        # Calculate optimal worker count for maximum CPU utilization
-        self.num_workers = self._calculate_workers_for_target_cpu()
+        chord_id = self.index.get(symbol)
+        if chord_id is not None:
+            return chord_id
+        if self._frozen:
+            raise RuntimeError(f"Chord vocabulary is frozen - cannot intern {symbol!r}")
         
-        # Performance metrics
-        self.processing_times = deque(maxlen=1000)
-        self.songs_processed = 0
+        engine = self._music_theory
+        chord_id = len(self.symbols)
+        self.index[symbol] = chord_id
+        self.symbols.append(symbol)
         
-        self.logger.info(f"🔥 Ultimate Data3 Processor initialized with {self.num_workers} workers")
-        self.logger.info(f"🎯 Target CPU utilization: {self.machine.cpu_target_percent}%")
-    
-    def _calculate_workers_for_target_cpu(self) -> int:
-        """Calculate optimal worker count to achieve target CPU utilization"""
+        if symbol.startswith('<'):
+            section_weight = engine._section_weight_ultimate(symbol)
+            self.bass_names.append(None)
+            self._rows.append((True, False, 0, 0, 0, 0, 0.0, 0.0, -1,
+                               np.nan if section_weight is None else section_weight,
+                               1.0, symbol))
+            return chord_id
         
-        # Base calculation on logical cores and target CPU percentage
-        base_workers = self.machine.logical_cores
-        target_ratio = self.machine.cpu_target_percent / 100.0
+        huv = engine._huv_vector_for_symbol(symbol)
+        parsed = engine.parse_chord_ultimate(symbol)
+        if not parsed:
+            self.bass_names.append(None)
+            self._rows.append((False, False, 0, 0, 0, 0, 0.0, 0.0, -1, np.nan, 1.0, huv))
+            return chord_id
         
-        if self.machine.cpu_target_percent >= 90:
-            # Ultra-aggressive: Use 1.3x logical cores to saturate CPU
-            workers = int(base_workers * 1.3 * target_ratio)
-        elif self.machine.cpu_target_percent >= 80:
-            # Aggressive: Use 1.2x logical cores
-            workers = int(base_workers * 1.2 * target_ratio)
-        else:
-            # Conservative: Use base logical cores * target ratio
-            workers = int(base_workers * target_ratio)
+        root_semitone = engine.NOTE_TO_SEMITONE.get(parsed['root'], 0)
+        bass = parsed['bass'] if parsed.get('bass') and parsed['bass'] != parsed['root'] else None
+        interval_mask = 0
+        for interval in parsed['intervals']:
+            interval_mask |= 1 << interval
         
-        # Ensure reasonable bounds
-        return max(2, min(workers, base_workers * 2))
+        self.bass_names.append(bass)
+        self._rows.append((
+            False, True, root_semitone,
+            self.CHORD_TYPE_CODES[parsed['chord_type']],
+            interval_mask,
+            self.QUALITY_FAMILY_CODES[parsed['quality_family']],
+            parsed['complexity'], parsed['stability'],
+            engine.NOTE_TO_SEMITONE.get(bass, 0) if bass else -1,
+            np.nan,
+            1.0 + (0.5 if parsed.get('quality_family') == 'dominant' else 0.0),
+            huv
+        ))
+        return chord_id
+    
+    def intern_cpml(self, cpml_string: Any) -> None:
+        """Intern every token of one CPML string (vocabulary pre-pass)"""
+        if _has_no_harmony(cpml_string):
+            return
+        for token in self._music_theory.extract_cpml_sequence_ultimate(cpml_string):
+            self.intern(token)
+    
+    def freeze(self) -> 'ChordVocabulary':
+        """Materialise the interned rows as contiguous lookup columns"""
+        
+        rows = self._rows
+        columns = list(zip(*rows)) if rows else [()] * 12
+        self.is_section = np.array(columns[0], dtype=bool)
+        self.valid = np.array(columns[1], dtype=bool)
+        self.root_semitone = np.array(columns[2], dtype=np.int8)
+        self.chord_type = np.array(columns[3], dtype=np.int16)
+        self.interval_mask = np.array(columns[4], dtype=np.int32)
+        self.quality_family = np.array(columns[5], dtype=np.int8)
+        self.complexity = np.array(columns[6], dtype=np.float64)
+        self.stability = np.array(columns[7], dtype=np.float64)
+        self.bass_semitone = np.array(columns[8], dtype=np.int8)
+        self.section_weight = np.array(columns[9], dtype=np.float64)
+        self.functional_weight = np.array(columns[10], dtype=np.float64)
+        self.huv_vectors = np.array(columns[11], dtype=object)
+        self._rows = []
+        self._frozen = True
+        self._build_tone_tables()
+        return self
+
+# =====================================================================================
+# COLUMNAR CPML TOKEN BATCHES
+# =====================================================================================
+
+class _LocalSymbolTable:
+    """Stand-in vocabulary for CpmlTokenBatch.encode_local: ids only, no chord parsing"""
+    
+    def __init__(self):
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+    
+    def intern(self, symbol: str) -> int:
+        symbol_id = self.index.get(symbol)
+        if symbol_id is None:
+            symbol_id = self.index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return symbol_id
+
+class CpmlTokenBatch:
+    """A whole batch of parsed CPML songs held in a few flat arrays
+    
+    Built once per batch in the parent and shared by key detection, Roman
+    numerals and HUV generation. Pickles as a handful of contiguous buffers
+    instead of one Python string per token.
     
-    def process_song_batch_ultimate(self, song_batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Ultimate song batch processing with comprehensive music analysis"""
+        tokens               int32  (T,)    chord-vocabulary ids, all songs concatenated
+        song_offsets         int64  (N+1,)  song i is tokens[song_offsets[i]:song_offsets[i+1]]
+        has_harmony          bool   (N,)    False when the chords field is empty
+    
+    Section markers stay inline as ordinary vocabulary tokens, where every
+    stage already reads them.
+    """
+    
+    def __init__(self, tokens: np.ndarray, song_offsets: np.ndarray, has_harmony: np.ndarray):
+        self.tokens = tokens
+        self.song_offsets = song_offsets
+        self.has_harmony = has_harmony
+    
+    def __len__(self) -> int:
+        return len(self.has_harmony)
+    
+    @classmethod
+    def encode(cls, cpml_strings: List[Any], vocabulary: ChordVocabulary,
+               music_theory: UltimatePureMusicTheoryEngine) -> 'CpmlTokenBatch':
+        """Tokenise and intern a batch of CPML strings into flat columns"""
         
-        results = []
+        tokens: List[int] = []
+        song_offsets = [0]
+        has_harmony = []
         
-        for song_data in song_batch.copy():  # Copy to avoid mutation issues
-            try:
-                # Extract and validate chord data
-                chords_str = song_data.get('chords', '')
-                if not chords_str or pd.isna(chords_str) or str(chords_str).strip() == '':
-                    # No harmony data - set appropriate defaults
-                    song_data.update({
-                        'key': 'No Harmony Data',
-                        'roman_numerals': 'empty',
-                        'harmonic_fingerprint': '',
-                        # SPOTIFY COMMENTED OUT - NO API CALLS
-                        'artist_name': 'PENDING',  # Will be filled by 2012 iMac later
-                        'artist_url': f"https://open.spotify.com/artist/{song_data.get('spotify_artist_id', 'unknown')}",
-                        'song_name': 'PENDING',   # Will be filled by 2012 iMac later
-                        'song_url': f"https://open.spotify.com/track/{song_data.get('spotify_song_id', 'unknown')}"
-                    })
-                    results.append(song_data)
-                    continue
-                
-                # Parse CPML chord sequence
-                chord_sequence = self.music_theory.extract_cpml_sequence_ultimate(chords_str)
-                if not chord_sequence:
-                    song_data.update({
-                        'key': 'Parse Error',
-                        'roman_numerals': 'parse_error',
-                        'harmonic_fingerprint': '',
-                        'artist_name': 'PENDING',
-                        'artist_url': f"https://open.spotify.com/artist/{song_data.get('spotify_artist_id', 'unknown')}",
-                        'song_name': 'PENDING',
-                        'song_url': f"https://open.spotify.com/track/{song_data.get('spotify_song_id', 'unknown')}"
-                    })
-                    results.append(song_data)
-                    continue
-                
-                # PURE MUSIC ANALYSIS - ULTIMATE SPEED
-                
-                # 1. Key Detection with Advanced Confidence Analysis
-                key, is_major, confidence, key_metadata = self.music_theory.detect_key_ultimate(chord_sequence)
-                key_display = f"{key} {'Major' if is_major else 'Minor'}"
-                
-                # 2. Roman Numeral Analysis with Harmonic Function Analysis
-                roman_numerals = self.music_theory.generate_roman_numerals_ultimate(
-                    chord_sequence, key, is_major
-                )
-                romans_str = ' '.join(roman_numerals)
-                
-                # 3. HUV Harmonic Fingerprint with 12-dimensional Precision
-                huv_fingerprint = self.music_theory.generate_huv_fingerprint_ultimate(chord_sequence)
-                
-                # Update song data with complete analysis
-                song_data.update({
-                    'key': key_display,
-                    'roman_numerals': romans_str,
-                    'harmonic_fingerprint': huv_fingerprint,
-                    # SPOTIFY METADATA - COMMENTED OUT FOR PURE SPEED
-                    # These will be filled separately by the 2012 iMac script
-                    'artist_name': 'PENDING',
-                    'artist_url': f"https://open.spotify.com/artist/{song_data.get('spotify_artist_id', 'unknown')}",
-                    'song_name': 'PENDING',
-                    'song_url': f"https://open.spotify.com/track/{song_data.get('spotify_song_id', 'unknown')}"
-                })
-                
-                results.append(song_data)
-                
-            except Exception as e:
-                # Comprehensive error handling - never crash on individual song
-                self.logger.error(f"Song processing error: {e}")
-                song_data.update({
-                    'key': 'Analysis Error',
-                    'roman_numerals': 'error',
-                    'harmonic_fingerprint': '',
-                    'artist_name': 'PENDING',
-                    'artist_url': f"https://open.spotify.com/artist/{song_data.get('spotify_artist_id', 'unknown')}",
-                    'song_name': 'PENDING',
-                    'song_url': f"https://open.spotify.com/track/{song_data.get('spotify_song_id', 'unknown')}"
-                })
-                results.append(song_data)
+        for cpml_string in cpml_strings:
+            if _has_no_harmony(cpml_string):
+                has_harmony.append(False)
+            else:
+                has_harmony.append(True)
+                for token in music_theory.extract_cpml_sequence_ultimate(cpml_string):
+                    tokens.append(vocabulary.intern(token))
+            song_offsets.append(len(tokens))
         
-        return results
+        return cls(
+            tokens=np.array(tokens, dtype=np.int32),
+            song_offsets=np.array(song_offsets, dtype=np.int64),
+            has_harmony=np.array(has_harmony, dtype=bool)
+        )
     
-    async def process_data2_to_data3_ultimate(self, input_file: str, output_file: str) -> Dict[str, Any]:
-        """Ultimate data2 to data3 conversion with maximum performance and zero Spotify bottlenecks"""
+    @classmethod
+    def encode_local(cls, cpml_strings: List[Any],
+                     music_theory: UltimatePureMusicTheoryEngine) -> Tuple[List[str], 'CpmlTokenBatch']:
+        """encode() against a throwaway symbol table: (symbols in first-seen order, batch of local ids)
         
-        start_time = time.time()
-        
-        # Epic startup banner
-        self.logger.info("🚀" + "="*90)
-        self.logger.success("⚡ ULTIMATE DATA3 CREATION - PURE MUSIC ANALYSIS BEAST MODE ACTIVATED")
+        For worker processes, which cannot intern into the parent's
+        vocabulary; remap() moves the batch onto it.
+        """
+        symbols = _LocalSymbolTable()
+        return symbols.symbols, cls.encode(cpml_strings, symbols, music_theory)
+    
+    def remap(self, symbols: List[str], vocabulary: ChordVocabulary) -> 'CpmlTokenBatch':
+        """This batch of encode_local ids with every id replaced by its vocabulary id"""
+        vocabulary_ids = np.array([vocabulary.intern(symbol) for symbol in symbols], dtype=np.int32)
+        return CpmlTokenBatch(vocabulary_ids[self.tokens], self.song_offsets, self.has_harmony)
+    
+    @classmethod
+    def concat(cls, batches: List['CpmlTokenBatch']) -> 'CpmlTokenBatch':
+        """Batches back to back as one batch (inverse of slice)"""
+        token_bases = np.cumsum([0] + [len(batch.tokens) for batch in batches])
+        return cls(
+            tokens=np.concatenate([batch.tokens for batch in batches]),
+            song_offsets=np.concatenate([[0]] + [batch.song_offsets[1:] + base
+                                                 for batch, base in zip(batches, token_bases)]).astype(np.int64),
+            has_harmony=np.concatenate([batch.has_harmony for batch in batches])
+        )
+    
+    def song_tokens(self, i: int) -> np.ndarray:
+        """Zero-copy view of song i's chord ids"""
+        return self.tokens[self.song_offsets[i]:self.song_offsets[i + 1]]
+    
+    def slice(self, start: int, stop: int) -> 'CpmlTokenBatch':
+        """Standalone copy of songs [start, stop) with rebased offsets"""
+        token_start, token_stop = self.song_offsets[start], self.song_offsets[stop]
+        return CpmlTokenBatch(
+            tokens=self.tokens[token_start:token_stop].copy(),
+            song_offsets=self.song_offsets[start:stop + 1] - token_start,
+            has_harmony=self.has_harmony[start:stop].copy()
+        )
+
+class SharedTokenBatch:
+    """A CpmlTokenBatch published once in a multiprocessing.shared_memory block
+    
+    The parent copies every column into one segment; pool workers attach by
+    name in their initializer and read a CpmlTokenBatch whose arrays are
+    views on that segment. Batches are then submitted as (start, stop) song
+    ranges, so no token data or per-row objects are pickled per batch.
+    """
+    
+    FIELDS = ['tokens', 'song_offsets', 'has_harmony']
+    
+    def __init__(self, shm: shared_memory.SharedMemory, layout: Dict[str, Tuple[int, str, int]], owner: bool):
+        self.shm = shm
+        self.layout = layout  # field -> (byte offset, dtype, length)
+        self.owner = owner
+        self._batch: Optional[CpmlTokenBatch] = None
+    
+    @classmethod
+    def publish(cls, token_batch: CpmlTokenBatch) -> 'SharedTokenBatch':
+        """Copy a token batch into a new shared segment (the caller must close() it)"""
+        layout = {}
+        size = 0
+        for field in cls.FIELDS:
+            array = getattr(token_batch, field)
+            size = (size + 7) // 8 * 8  # 8-byte aligned columns
+            layout[field] = (size, array.dtype.str, len(array))
+            size += array.nbytes
+        
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for field in cls.FIELDS:
+            offset, dtype, length = layout[field]
+            np.ndarray((length,), dtype=dtype, buffer=shm.buf, offset=offset)[:] = getattr(token_batch, field)
+        return cls(shm, layout, owner=True)
+    
+    @property
+    def spec(self) -> Tuple[str, Dict[str, Tuple[int, str, int]]]:
+        """Picklable handle for attach()"""
+        return self.shm.name, self.layout
+    
+    @classmethod
+    def attach(cls, spec: Tuple[str, Dict[str, Tuple[int, str, int]]]) -> 'SharedTokenBatch':
+        name, layout = spec
+        return cls(shared_memory.SharedMemory(name=name), layout, owner=False)
+    
+    @property
+    def batch(self) -> CpmlTokenBatch:
+        """Zero-copy CpmlTokenBatch view on the shared segment"""
+        if self._batch is None:
+            self._batch = CpmlTokenBatch(**{
+                field: np.ndarray((length,), dtype=dtype, buffer=self.shm.buf, offset=offset)
+                for field, (offset, dtype, length) in self.layout.items()
+            })
+        return self._batch
+    
+    def close(self):
+        """Drop the views and detach; the publishing side also frees the segment"""
+        self._batch = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+# =====================================================================================
+# COMPACT HUV FINGERPRINT ENCODING (BITMASK / BASE64)
+# =====================================================================================
+
+class HuvBitmaskCodec:
+    """Lossless binary form of TRUE HUV fingerprints
+    
+    Every HUV token becomes one little-endian uint32 word and a song's words
+    are base64-encoded (the harmonic_fingerprint_bits column):
+    
+        bit 31 clear        chord - bit i is HUV slot i (5 header slots + 20 HUV_EXTENSIONS)
+        bits 31-30 = 10     section marker <type> / <type_n> - bits 16-23 SECTION_TYPES index,
+                            bits 0-15 section number (0 = none)
+        bits 31-30 = 11     any other marker, verbatim - bits 0-15 UTF-8 byte length,
+                            followed by the bytes packed into ceil(length / 4) words
+    
+    Trailing zero slots are implicit, exactly as the text format trims them,
+    so decode(encode(text)) == text. Each distinct token is round-trip
+    checked the first time it is encoded.
+    """
+    
+    CHORD_SLOTS = 5 + len(UltimatePureMusicTheoryEngine.HUV_EXTENSIONS)
+    SECTION_FLAG = 0x80000000
+    LITERAL_FLAG = 0xC0000000
+    SECTION_TYPES = ['verse', 'chorus', 'bridge', 'intro', 'outro', 'solo', 'prechorus', 'refrain', 'instrumental', 'interlude', 'other']
+    SECTION_TYPE_CODES = {section_type: i for i, section_type in enumerate(SECTION_TYPES)}
+    _SECTION_MARKER_PATTERN = re.compile(r'^<\s*([a-z\-_ ]*?)[\s_]*(\d+)?\s*>?$', re.IGNORECASE)
+    
+    @classmethod
+    def encode(cls, fingerprint: str) -> str:
+        """Text fingerprint ('1,1,0,0,0,1|<chorus_1>|...') -> base64 words"""
+        if not fingerprint:
+            return ''
+        words = []
+        for token in fingerprint.split('|'):
+            words.extend(cls.token_words(token))
+        return base64.b64encode(np.array(words, dtype='<u4').tobytes()).decode('ascii')
+    
+    @classmethod
+    def decode(cls, encoded: str) -> str:
+        """base64 words -> the exact text fingerprint"""
+        if not encoded:
+            return ''
+        words = np.frombuffer(base64.b64decode(encoded), dtype='<u4').tolist()
+        tokens = []
+        position = 0
+        while position < len(words):
+            token, position = cls._decode_token(words, position)
+            tokens.append(token)
+        return '|'.join(tokens)
+    
+    @classmethod
+    @lru_cache(maxsize=65536)  # Bounded: free-text section markers are unlimited
+    def token_words(cls, token: str) -> Tuple[int, ...]:
+        """Words for one HUV token (memoised, verified on first use)"""
+        words = cls._encode_token(token)
+        decoded, _ = cls._decode_token(list(words), 0)
+        if decoded != token:
+            raise ValueError(f"HUV token {token!r} does not survive the bitmask round trip")
+        return words
+    
+    @classmethod
+    def section_code(cls, section_marker: str) -> Tuple[int, int]:
+        """(SECTION_TYPES index, section number) for a marker such as <chorus_2>"""
+        match = cls._SECTION_MARKER_PATTERN.match(section_marker.strip())
+        name = match.group(1).lower().replace('-', '').replace('_', '').replace(' ', '') if match else ''
+        number = int(match.group(2)) if match and match.group(2) else 0
+        return cls.SECTION_TYPE_CODES.get(name, cls.SECTION_TYPE_CODES['other']), min(number, 0xFFFF)
+    
+    @classmethod
+    def _encode_token(cls, token: str) -> Tuple[int, ...]:
+        if token.startswith('<'):
+            type_code, number = cls.section_code(token)
+            section_type = cls.SECTION_TYPES[type_code]
+            canonical = f"<{section_type}_{number}>" if number else f"<{section_type}>"
+            if section_type != 'other' and canonical == token:
+                return (cls.SECTION_FLAG | type_code << 16 | number,)
+            
+            raw = token.encode('utf-8')
+            length = len(raw)
+            if length > 0xFFFF:
+                raise ValueError(f"Section marker too long for the HUV bitmask format: {length} bytes")
+            raw += b'\0' * (-length % 4)
+            return (cls.LITERAL_FLAG | length,) + tuple(np.frombuffer(raw, dtype='<u4').tolist())
+        
+        slots = token.split(',') if token else []
+        if len(slots) > cls.CHORD_SLOTS or any(slot not in ('0', '1') for slot in slots):
+            raise ValueError(f"Not a TRUE HUV chord vector: {token!r}")
+        mask = 0
+        for i, slot in enumerate(slots):
+            if slot == '1':
+                mask |= 1 << i
+        return (mask,)
+    
+    @classmethod
+    def _decode_token(cls, words: List[int], position: int) -> Tuple[str, int]:
+        word = words[position]
+        
+        if word & cls.LITERAL_FLAG == cls.LITERAL_FLAG:
+            length = word & 0xFFFF
+            word_count = (length + 3) // 4
+            raw = np.array(words[position + 1:position + 1 + word_count], dtype='<u4').tobytes()[:length]
+            return raw.decode('utf-8'), position + 1 + word_count
+        
+        if word & cls.SECTION_FLAG:
+            section_type = cls.SECTION_TYPES[(word >> 16) & 0xFF]
+            number = word & 0xFFFF
+            return (f"<{section_type}_{number}>" if number else f"<{section_type}>"), position + 1
+        
+        return ','.join(str(word >> i & 1) for i in range(word.bit_length())), position + 1
+
+# =====================================================================================
+# ORDER-PRESERVING OUTPUT WRITER
+# =====================================================================================
+
+class OrderedBatchWriter:
+    """Reorder buffer that hands completed batches to a writer in input order
+    
+    Batches finish in whatever order the pool completes them; each one is
+    tagged with its input sequence number and held until every earlier batch
+    has been written. Callers bound the buffer by not submitting batch n
+    while n - next_seq >= window (see can_admit), so a slow early batch can
+    only hold back a fixed number of later ones.
+    """
+    
+    def __init__(self, write_batch, window: int):
+        self.write_batch = write_batch
+        self.window = max(1, window)
+        self.next_seq = 0
+        self.pending: Dict[int, List[Dict[str, Any]]] = {}
+        self.max_buffered = 0
+    
+    def can_admit(self, seq: int) -> bool:
+        """True when batch seq may be submitted without exceeding the window"""
+        return seq - self.next_seq < self.window
+    
+    def add(self, seq: int, batch_results: List[Dict[str, Any]]) -> int:
+        """Buffer one completed batch and flush the contiguous run; returns batches written"""
+        self.pending[seq] = batch_results
+        self.max_buffered = max(self.max_buffered, len(self.pending))
+        
+        written = 0
+        while self.next_seq in self.pending:
+            self.write_batch(self.pending.pop(self.next_seq))
+            self.next_seq += 1
+            written += 1
+        return written
+    
+    @property
+    def buffered(self) -> int:
+        return len(self.pending)
+
+# =====================================================================================
+# ADAPTIVE BATCH SIZING
+# =====================================================================================
+
+class AdaptiveBatchSizer:
+    """Steers the batch size toward a target per-batch latency from measured timings
+    
+    Sizing starts at min_size. Every completed batch reports its song count,
+    the worker's compute time and the serialization (IPC) time spent moving
+    it; exponentially weighted per-song cost and per-batch overhead then give
+    the size whose wall time lands on target_seconds. Overhead above
+    max_overhead_share of a batch pushes the size up further. One step may
+    at most double or halve the size, so a single outlier cannot swing it.
+    """
+    
+    DEFAULT_TARGET_SECONDS = 0.25
+    MIN_SIZE = 50
+    
+    def __init__(self, target_seconds: Optional[float] = None, min_size: int = MIN_SIZE, max_size: int = 20000,
+                 smoothing: float = 0.3, max_overhead_share: float = 0.1):
+        self.target_seconds = target_seconds or self.DEFAULT_TARGET_SECONDS
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self.smoothing = smoothing
+        self.max_overhead_share = max_overhead_share
+        self.size = self.min_size
+        self.per_song_seconds: Optional[float] = None
+        self.overhead_seconds = 0.0
+        self.batches = 0
+        self.smallest = self.largest = self.size
+    
+    def observe(self, songs: int, compute_seconds: float, overhead_seconds: float = 0.0):
+        """Fold one finished batch into the estimates and retune the size"""
+        if songs <= 0:
+            return
+        per_song = max(compute_seconds, 1e-6) / songs
+        if self.per_song_seconds is None:
+            self.per_song_seconds, self.overhead_seconds = per_song, overhead_seconds
+        else:
+            self.per_song_seconds += self.smoothing * (per_song - self.per_song_seconds)
+            self.overhead_seconds += self.smoothing * (overhead_seconds - self.overhead_seconds)
+        self.batches += 1
+        
+        ideal = max((self.target_seconds - self.overhead_seconds) / self.per_song_seconds,
+                    self.overhead_seconds / (self.max_overhead_share * self.per_song_seconds))
+        ideal = min(max(ideal, self.size / 2), self.size * 2)
+        self.size = int(min(max(ideal, self.min_size), self.max_size))
+        self.smallest = min(self.smallest, self.size)
+        self.largest = max(self.largest, self.size)
+    
+    def next_size(self, remaining: Optional[int] = None, workers: int = 1) -> int:
+        """Size for the next batch; near the end, work is split so every worker gets some"""
+        if remaining is None:
+            return self.size
+        return max(1, min(self.size, remaining, max(self.min_size, -(-remaining // workers))))
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'target_ms': self.target_seconds * 1000,
+            'final_batch_size': self.size,
+            'min_batch_size': self.smallest,
+            'max_batch_size': self.largest,
+            'per_song_ms': (self.per_song_seconds or 0.0) * 1000,
+            'ipc_overhead_ms': self.overhead_seconds * 1000,
+            'batches_measured': self.batches
+        }
+
+# =====================================================================================
+# PER-STAGE PROFILING
+# =====================================================================================
+
+class StageProfiler:
+    """Lightweight per-stage timers and counters for worker batches
+    
+    Generalises the sample-keeping ViperProfiler of the data2 enrichment
+    script: a stage only keeps [calls, total_ns, max_ns] and counters are
+    plain integers, so a batch's profile is a small dict that travels back
+    with its results and merges into the parent's profile by addition.
+    """
+    
+    def __init__(self):
+        self.stages: Dict[str, List[int]] = {}  # stage -> [calls, total_ns, max_ns]
+        self.counters: Counter = Counter()
+    
+    def add(self, stage: str, elapsed_ns: int, calls: int = 1):
+        entry = self.stages.get(stage)
+        if entry is None:
+            self.stages[stage] = [calls, elapsed_ns, elapsed_ns]
+        else:
+            entry[0] += calls
+            entry[1] += elapsed_ns
+            entry[2] = max(entry[2], elapsed_ns)
+    
+    def count(self, counter: str, amount: int = 1):
+        self.counters[counter] += amount
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {'stages': {stage: list(entry) for stage, entry in self.stages.items()},
+                'counters': dict(self.counters)}
+    
+    def merge(self, profile: Dict[str, Any]):
+        """Add another profile (e.g. one batch's to_dict()) into this one"""
+        for stage, (calls, total_ns, max_ns) in profile['stages'].items():
+            entry = self.stages.setdefault(stage, [0, 0, 0])
+            entry[0] += calls
+            entry[1] += total_ns
+            entry[2] = max(entry[2], max_ns)
+        self.counters.update(profile['counters'])
+    
+    @staticmethod
+    def error_counts(profile: Dict[str, Any]) -> Dict[str, int]:
+        """Per-song error counts by type ('error:<Type>' counters) of a profile dict"""
+        return {name[6:]: count for name, count in profile['counters'].items() if name.startswith('error:')}
+    
+    def summary(self) -> Dict[str, Any]:
+        """Per-stage totals, ns per song and share of all profiled time"""
+        songs = self.counters.get('songs', 0)
+        profiled_ns = sum(entry[1] for entry in self.stages.values()) or 1
+        return {
+            'stages': {
+                stage: {
+                    'calls': calls,
+                    'total_ms': total_ns / 1e6,
+                    'max_ms': max_ns / 1e6,
+                    'ns_per_song': total_ns / songs if songs else 0.0,
+                    'share': total_ns / profiled_ns
+                }
+                for stage, (calls, total_ns, max_ns) in sorted(self.stages.items(), key=lambda item: -item[1][1])
+            },
+            'counters': dict(self.counters)
+        }
+
+# =====================================================================================
+# PER-HOST WORKER CALIBRATION PROFILES
+# =====================================================================================
+
+class WorkerProfile:
+    """Calibrated worker counts per hostname, kept in one small JSON file
+    
+    --calibrate measures songs/sec for a ladder of worker counts and stores
+    the knee of that curve here; later runs on the same host (with the same
+    logical core count) pick it up instead of the CPU-target heuristic.
+    """
+    
+    DEFAULT_PATH = Path.home() / '.viper_worker_profiles.json'
+    KNEE_SHARE = 0.95  # Fewest workers reaching this share of peak throughput
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else self.DEFAULT_PATH
+    
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+    
+    def load(self, hostname: str) -> Optional[Dict[str, Any]]:
+        return self._read().get(hostname)
+    
+    def save(self, hostname: str, profile: Dict[str, Any]):
+        """Replace this host's entry, leaving other hosts untouched"""
+        profiles = self._read()
+        profiles[hostname] = profile
+        temp = self.path.with_name(self.path.name + '.tmp')
+        with open(temp, 'w') as f:
+            json.dump(profiles, f, indent=2)
+        os.replace(temp, self.path)
+    
+    @classmethod
+    def knee(cls, throughput: Dict[int, float]) -> int:
+        """Smallest worker count within KNEE_SHARE of the best measured songs/sec"""
+        peak = max(throughput.values())
+        return min(workers for workers, speed in throughput.items() if speed >= cls.KNEE_SHARE * peak)
+    
+    @staticmethod
+    def worker_ladder(max_workers: int, physical_cores: int, logical_cores: int) -> List[int]:
+        """1, 2, 4, ... plus the physical/logical core counts, up to max_workers"""
+        ladder = {max_workers, physical_cores, logical_cores}
+        workers = 1
+        while workers < max_workers:
+            ladder.add(workers)
+            workers *= 2
+        return sorted(count for count in ladder if 1 <= count <= max_workers)
+
+# =====================================================================================
+# DATA3 OUTPUT SINKS (CSV / PARQUET)
+# =====================================================================================
+
+class Data3CsvWriter:
+    """Appends data3 frames to one CSV file (header written once)"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.rows_written = 0
+    
+    def write(self, df: pd.DataFrame):
+        df.to_csv(
+            self.path,
+            mode='a' if self.rows_written else 'w',
+            header=not self.rows_written,
+            index=False,
+            encoding='utf-8',
+            na_rep='',
+            float_format='%.6f',  # High precision for HUV vectors
+            chunksize=10000      # Write in chunks for memory efficiency
+        )
+        self.rows_written += len(df)
+    
+    def close(self):
+        pass  # Every write() is already on disk
+
+class Data3ParquetWriter:
+    """Typed, row-group-partitioned Parquet sink for data3 frames
+    
+    Frames are converted to an explicit schema (id/decade as integers, text
+    as strings) and buffered until row_group_rows rows are ready, so the
+    small ordered batches of streaming mode still land in large row groups.
+    key and main_genre are dictionary-encoded, the long text columns are
+    zstd-compressed and everything else uses snappy.
+    """
+    
+    INTEGER_COLUMNS = {'id': 'int64', 'decade': 'int16'}
+    DICTIONARY_COLUMNS = ['key', 'main_genre']
+    ZSTD_COLUMNS = ['chords', 'roman_numerals', 'harmonic_fingerprint', 'harmonic_fingerprint_bits']
+    DEFAULT_ROW_GROUP_ROWS = 100_000
+    
+    def __init__(self, path: str, columns: List[str], row_group_rows: Optional[int] = None):
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("Parquet output requires pyarrow - pip install pyarrow")
+        self.path = path
+        self.row_group_rows = row_group_rows or self.DEFAULT_ROW_GROUP_ROWS
+        self.schema = self.data3_schema(columns)
+        self.rows_written = 0
+        self.row_groups = 0
+        self._pending: List[Any] = []
+        self._pending_rows = 0
+        self._writer = None
+    
+    @classmethod
+    def data3_schema(cls, columns: List[str]) -> 'pa.Schema':
+        """Explicit Arrow schema for the given data3 columns"""
+        fields = []
+        for column in columns:
+            if column in cls.INTEGER_COLUMNS:
+                fields.append(pa.field(column, pa.int64() if cls.INTEGER_COLUMNS[column] == 'int64' else pa.int16()))
+            elif column in cls.DICTIONARY_COLUMNS:
+                fields.append(pa.field(column, pa.dictionary(pa.int32(), pa.string())))
+            else:
+                fields.append(pa.field(column, pa.string()))
+        return pa.schema(fields)
+    
+    def _to_table(self, df: pd.DataFrame) -> 'pa.Table':
+        arrays = []
+        for field in self.schema:
+            values = df[field.name]
+            if pa.types.is_integer(field.type):
+                present = values.notna() & (values.astype('string').str.strip() != '')
+                numeric = pd.to_numeric(values.where(present), errors='coerce')
+                invalid = present & (numeric.isna() | (numeric % 1 != 0))
+                if invalid.any():
+                    raise ValueError(f"Column {field.name!r} is not integral, e.g. {values[invalid].iloc[0]!r}")
+                arrays.append(pa.array(numeric.astype('Int64'), type=pa.int64(), from_pandas=True).cast(field.type))
+            else:
+                strings = pa.array(values.astype('string'), type=pa.string(), from_pandas=True)
+                arrays.append(strings.dictionary_encode() if pa.types.is_dictionary(field.type) else strings)
+        return pa.Table.from_arrays(arrays, schema=self.schema)
+    
+    def write(self, df: pd.DataFrame):
+        if len(df) == 0:
+            return
+        self._pending.append(self._to_table(df))
+        self._pending_rows += len(df)
+        while self._pending_rows >= self.row_group_rows:
+            self._flush(self.row_group_rows)
+    
+    def _flush(self, rows: int):
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(
+                self.path, self.schema,
+                compression={field.name: 'zstd' if field.name in self.ZSTD_COLUMNS else 'snappy' for field in self.schema},
+                use_dictionary=[name for name in self.DICTIONARY_COLUMNS if name in self.schema.names]
+            )
+        if rows == 0:
+            return
+        pending = pa.concat_tables(self._pending)
+        self._writer.write_table(pending.slice(0, rows), row_group_size=rows)
+        self._pending = [pending.slice(rows)] if rows < pending.num_rows else []
+        self._pending_rows = pending.num_rows - rows
+        self.rows_written += rows
+        self.row_groups += 1
+    
+    def close(self):
+        self._flush(self._pending_rows)
+        self._writer.close()
+
+# =====================================================================================
+# RESUMABLE BATCH CHECKPOINTS
+# =====================================================================================
+
+class BatchCheckpoint:
+    """Crash-safe record of finished streaming batches for --resume
+    
+    Ordered batch results are grouped into part files covering contiguous
+    row ranges of the work range. Each part is written to a temp file,
+    fsync'd and renamed into place; only then is one JSON line
+    {start, stop, successful, part} appended and fsync'd to manifest.jsonl.
+    A crash loses at most the uncommitted tail, and a torn manifest line or
+    an orphaned part is discarded on resume. Resuming only needs the end of
+    the last committed range - never the set of processed song ids.
+    """
+    
+    MANIFEST = 'manifest.jsonl'
+    RUN_CONFIG = 'run.json'
+    
+    def __init__(self, directory: str, run_config: Dict[str, Any], open_sink, output_format: str,
+                 commit_rows: int):
+        self.directory = Path(directory)
+        self.run_config = run_config
+        self.open_sink = open_sink  # path -> data3 sink (write/close)
+        self.output_format = output_format
+        self.commit_rows = max(1, commit_rows)
+        self.entries: List[Dict[str, Any]] = []
+        self.committed_rows = 0
+        self._pending: List[pd.DataFrame] = []
+        self._pending_rows = 0
+        self._pending_successful = 0
+    
+    @property
+    def successful(self) -> int:
+        return sum(entry['successful'] for entry in self.entries)
+    
+    @staticmethod
+    def _fsync_path(path: Path):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    
+    def _write_atomic(self, name: str, text: str):
+        temp = self.directory / f"{name}.tmp"
+        with open(temp, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.directory / name)
+        self._fsync_path(self.directory)
+    
+    def start_fresh(self):
+        """Discard any previous checkpoint and record this run's configuration"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.directory.mkdir(parents=True)
+        self._write_atomic(self.RUN_CONFIG, json.dumps(self.run_config, indent=2))
+        self._write_atomic(self.MANIFEST, '')
+    
+    def resume(self) -> int:
+        """Load committed ranges from a previous run; returns rows already done"""
+        config_path = self.directory / self.RUN_CONFIG
+        if not config_path.exists():
+            self.start_fresh()
+            return 0
+        
+        with open(config_path) as f:
+            previous_config = json.load(f)
+        if previous_config != self.run_config:
+            changed = sorted(key for key in set(previous_config) | set(self.run_config)
+                             if previous_config.get(key) != self.run_config.get(key))
+            raise ValueError(f"Checkpoint in {self.directory} was made with different settings "
+                             f"({', '.join(changed)}) - rerun without --resume to start over")
+        
+        # Keep the longest contiguous run of intact entries whose part file exists
+        manifest_path = self.directory / self.MANIFEST
+        with open(manifest_path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # Torn final append
+                if entry['start'] != self.committed_rows or not (self.directory / entry['part']).exists():
+                    break
+                self.entries.append(entry)
+                self.committed_rows = entry['stop']
+        
+        self._write_atomic(self.MANIFEST, ''.join(json.dumps(entry) + '\n' for entry in self.entries))
+        kept = {entry['part'] for entry in self.entries}
+        for path in self.directory.glob('part-*'):
+            if path.name not in kept:
+                path.unlink()
+        return self.committed_rows
+    
+    def add(self, result_df: pd.DataFrame, successful: int):
+        """Buffer one ordered batch; commits a part once commit_rows rows are pending"""
+        self._pending.append(result_df)
+        self._pending_rows += len(result_df)
+        self._pending_successful += successful
+        if self._pending_rows >= self.commit_rows:
+            self.commit()
+    
+    def commit(self):
+        """Durably write pending batches as one part file, then record its range"""
+        if not self._pending_rows:
+            return
+        
+        start, stop = self.committed_rows, self.committed_rows + self._pending_rows
+        part_name = f"part-{start:012d}.{self.output_format}"
+        temp = self.directory / f"{part_name}.tmp"
+        sink = self.open_sink(str(temp))
+        sink.write(pd.concat(self._pending, ignore_index=True))
+        sink.close()
+        self._fsync_path(temp)
+        os.replace(temp, self.directory / part_name)
+        self._fsync_path(self.directory)
+        
+        entry = {'start': start, 'stop': stop, 'successful': self._pending_successful, 'part': part_name}
+        fd = os.open(self.directory / self.MANIFEST, os.O_WRONLY | os.O_APPEND)
+        try:
+            os.write(fd, (json.dumps(entry) + '\n').encode('utf-8'))
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        
+        self.entries.append(entry)
+        self.committed_rows = stop
+        self._pending, self._pending_rows, self._pending_successful = [], 0, 0
+    
+    def assemble(self, output_file: str):
+        """Concatenate all parts into output_file in row order, then remove the checkpoint"""
+        self.commit()
+        if self.output_format == 'csv':
+            # Byte copy: header from the first part only
+            with open(output_file, 'wb') as out:
+                for i, entry in enumerate(self.entries):
+                    with open(self.directory / entry['part'], 'rb') as part:
+                        header = part.readline()
+                        if i == 0:
+                            out.write(header)
+                        shutil.copyfileobj(part, out, 16 * 1024 * 1024)
+        else:
+            # Re-buffer through the sink so parts merge into full-size row groups
+            sink = self.open_sink(output_file)
+            for entry in self.entries:
+                sink.write(pq.read_table(self.directory / entry['part']).to_pandas())
+            sink.close()
+        shutil.rmtree(self.directory)
+
+# =====================================================================================
+# CONTENT-ADDRESSED PROGRESSION DEDUP
+# =====================================================================================
+
+class ProgressionDeduplicator:
+    """Analyse each distinct chords value once and fan the result out to every row sharing it
+    
+    Rows are keyed by a blake2b digest of their chords string. split() turns a
+    batch of rows into one probe row per progression that still needs
+    analysis; fan_out() copies key, roman_numerals and harmonic_fingerprint
+    from the analysed probes back onto every row. With memo_size > 0, results
+    are also remembered across batches (oldest evicted first) so streaming
+    runs reuse them while memory stays bounded.
+    """
+    
+    def __init__(self, memo_size: int = 0):
+        self.memo_size = memo_size
+        self.memo: 'OrderedDict[bytes, Tuple[str, str, str]]' = OrderedDict()
+        self.rows = 0
+        self.analysed = 0
+    
+    @staticmethod
+    def digest(chords_str: Any) -> bytes:
+        """Content address of a chords value - missing values hash like empty ones"""
+        text = '' if _has_no_harmony(chords_str) else str(chords_str)
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+    
+    def split(self, song_batch: List[Dict[str, Any]]) -> Tuple[List[bytes], List[Dict[str, Any]], Dict[bytes, Tuple[str, str, str]]]:
+        """Row digests, probe rows still to analyse, and memoised results for the rest"""
+        digests = []
+        probes = []
+        known: Dict[bytes, Tuple[str, str, str]] = {}
+        probed: Set[bytes] = set()
+        
+        for song in song_batch:
+            digest = self.digest(song.get('chords', ''))
+            digests.append(digest)
+            if digest in known or digest in probed:
+                continue
+            if digest in self.memo:
+                self.memo.move_to_end(digest)
+                known[digest] = self.memo[digest]
+            else:
+                probed.add(digest)
+                probes.append({'chords': song.get('chords', ''), 'progression_digest': digest})
+        
+        self.rows += len(song_batch)
+        self.analysed += len(probes)
+        return digests, probes, known
+    
+    def fan_out(self, song_batch: List[Dict[str, Any]], digests: List[bytes],
+                probes: List[Dict[str, Any]], analyses: List[Tuple[str, str, str]],
+                known: Dict[bytes, Tuple[str, str, str]], remember: bool = True) -> List[Dict[str, Any]]:
+        """Copy analysis results onto every row of the batch (in place, input order kept)
+        
+        analyses[i] is (key, roman_numerals, harmonic_fingerprint) for probes[i].
+        remember=False keeps results out of the memo, e.g. for a batch whose
+        worker crashed, so one failure does not spread to later batches.
+        """
+        for probe, result in zip(probes, analyses):
+            digest = probe['progression_digest']
+            known[digest] = result
+            if remember and self.memo_size > 0:
+                self.memo[digest] = result
+                if len(self.memo) > self.memo_size:
+                    self.memo.popitem(last=False)
+        
+        for song, digest in zip(song_batch, digests):
+            song.update(_data3_analysis_fields(song, *known[digest]))
+        return song_batch
+    
+    def summary(self) -> Dict[str, Any]:
+        """Rows seen vs progressions actually analysed"""
+        return {
+            'rows': self.rows,
+            'progressions_analysed': self.analysed,
+            'dedup_ratio': self.rows / self.analysed if self.analysed else 1.0,
+            'analysis_saved': 1 - self.analysed / self.rows if self.rows else 0.0
+        }
+
+# =====================================================================================
+# ULTIMATE HIGH-PERFORMANCE DATA3 PROCESSOR
+# =====================================================================================
+
+class UltimateData3Processor:
+    """Maximum performance data3 processor optimized for dual-machine setup with 90% CPU usage"""
+    
+    def __init__(self, machine_specs: MachineSpecs, logger: UltimateLogger, cache_budget_mb: Optional[float] = None,
+                 huv_bitmask: bool = False, output_format: str = 'csv', shared_input: bool = True,
+                 target_batch_seconds: Optional[float] = None, worker_profile: Optional[WorkerProfile] = None):
+        self.machine = machine_specs
+        self.logger = logger
+        self.cache_budget_mb = cache_budget_mb  # Per-worker engine cache budget (None = engine default)
+        self.huv_bitmask = huv_bitmask  # Also emit the base64 bitmask HUV column
+        self.output_format = output_format  # 'csv' or 'parquet'
+        self.shared_input = shared_input  # Batch mode: token columns in shared memory, workers get song ranges
+        self.target_batch_seconds = target_batch_seconds  # Adaptive batch sizing target (None = sizer default)
+        self.worker_profile = worker_profile  # Per-host calibrated worker counts (None = heuristic only)
+        self.music_theory = UltimatePureMusicTheoryEngine(cache_budget_mb)
+        
+        # Calculate optimal worker count for maximum CPU utilization
+        self.num_workers = self._calculate_workers_for_target_cpu()
+        
+        # Performance metrics
+        self.processing_times = deque(maxlen=1000)
+        self.songs_processed = 0
+        self.worker_cache_stats: Dict[int, Dict[str, Any]] = {}  # Latest cache report per worker pid
+        self.stage_profile = StageProfiler()  # Merged per-batch stage timers and counters
+        
+        self.logger.info(f"🔥 Ultimate Data3 Processor initialized with {self.num_workers} workers")
+        self.logger.info(f"🎯 Target CPU utilization: {self.machine.cpu_target_percent}%")
+    
+    def _calculate_workers_for_target_cpu(self) -> int:
+        """Calculate optimal worker count to achieve target CPU utilization"""
+        
+        # A calibrated count for this host beats the heuristic
+        if self.worker_profile is not None:
+            profile = self.worker_profile.load(self.machine.hostname)
+            if profile and profile.get('logical_cores') == self.machine.logical_cores:
+                self.logger.info(f"📐 Calibrated worker count {profile['workers']} "
+                                 f"({profile['calibrated_at']}, {self.worker_profile.path})")
+                return profile['workers']
+        
+        # Base calculation on logical cores and target CPU percentage
+        base_workers = self.machine.logical_cores
+        target_ratio = self.machine.cpu_target_percent / 100.0
+        
+        if self.machine.cpu_target_percent >= 90:
+            # Ultra-aggressive: Use 1.3x logical cores to saturate CPU
+            workers = int(base_workers * 1.3 * target_ratio)
+        elif self.machine.cpu_target_percent >= 80:
+            # Aggressive: Use 1.2x logical cores
+            workers = int(base_workers * 1.2 * target_ratio)
+        else:
+            # Conservative: Use base logical cores * target ratio
+            workers = int(base_workers * target_ratio)
+        
+        # Ensure reasonable bounds
+        return max(2, min(workers, base_workers * 2))
+    
+    # Exact data3 column structure (matching the provided sample)
+    DATA3_COLUMNS = [
+        # Original data2 columns (preserve all existing data)
+        'id', 'chords', 'release_date', 'genres', 'decade', 'rock_genre',
+        'artist_id', 'main_genre', 'spotify_song_id', 'spotify_artist_id',
+        # New data3 columns (our additions)
+        'artist_name', 'artist_url', 'song_name', 'song_url',  # Spotify metadata (PENDING for now)
+        'key', 'roman_numerals', 'harmonic_fingerprint'       # Pure music analysis
+    ]
+    
+    # Optimized input dtypes for speed
+    INPUT_DTYPES = {
+        'id': 'Int64',
+        'spotify_artist_id': 'string',
+        'spotify_song_id': 'string',
+        'chords': 'string'
+    }
+    
+    FAILED_KEYS = ['No Harmony Data', 'Parse Error', 'Analysis Error', 'Processing Error']
+    
+    # Distinct progressions remembered across streaming batches for dedup
+    STREAM_DEDUP_MEMO = 100_000
+    
+    # Batch mode tokenises in a worker pool from this many distinct progressions
+    PARALLEL_TOKENISE_MIN_SONGS = 50_000
+    
+    # Optional side-car column: HuvBitmaskCodec form of harmonic_fingerprint
+    HUV_BITMASK_COLUMN = 'harmonic_fingerprint_bits'
+    
+    # Worker engine caches in summary order, with their log labels
+    CACHE_LABELS = {'vocab_roman': 'vocab roman table', 'parse': 'parse', 'key': 'key LRU',
+                    'roman': 'roman LRU', 'huv': 'HUV LRU'}
+    
+    def _output_columns(self) -> List[str]:
+        """data3 columns in output order (plus the bitmask HUV column when enabled)"""
+        return self.DATA3_COLUMNS + [self.HUV_BITMASK_COLUMN] if self.huv_bitmask else self.DATA3_COLUMNS
+    
+    def _open_output(self, output_file: str):
+        """CSV or typed Parquet sink for data3 frames (write(df) ... close())"""
+        if self.output_format == 'parquet':
+            return Data3ParquetWriter(output_file, self._output_columns())
+        return Data3CsvWriter(output_file)
+    
+    def _finalize_output_frame(self, result_df: pd.DataFrame) -> pd.DataFrame:
+        """Exact output column order, encoding each distinct fingerprint once when the bitmask column is on"""
+        if self.huv_bitmask:
+            codes, fingerprints = pd.factorize(result_df['harmonic_fingerprint'].fillna(''))
+            encoded = np.array([HuvBitmaskCodec.encode(fingerprint) for fingerprint in fingerprints], dtype=object)
+            result_df[self.HUV_BITMASK_COLUMN] = encoded[codes]
+        return result_df.reindex(columns=self._output_columns(), fill_value='')
+    
+    def _ensure_data3_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Ensure all required data3 columns exist with appropriate defaults"""
+        for col in self.DATA3_COLUMNS:
+            if col not in df.columns:
+                if col in ['artist_name', 'song_name']:
+                    df[col] = 'PENDING'
+                elif col in ['artist_url', 'song_url']:
+                    df[col] = 'N/A'
+                else:
+                    df[col] = ''
+        return df
+    
+    def _new_batch_sizer(self) -> AdaptiveBatchSizer:
+        """Latency-driven batch sizer, capped at the machine's chunk size"""
+        return AdaptiveBatchSizer(self.target_batch_seconds, max_size=self.machine.chunk_size)
+    
+    def _log_batch_sizing(self, sizer: AdaptiveBatchSizer, batch_count: int):
+        summary = sizer.summary()
+        self.logger.info(f"📦 Adaptive batching: {batch_count:,} batches, size {summary['min_batch_size']:,}-"
+                         f"{summary['max_batch_size']:,} (final {summary['final_batch_size']:,}), "
+                         f"{summary['per_song_ms']:.2f} ms/song, {summary['ipc_overhead_ms']:.1f} ms IPC per batch")
+    
+    def _tokenise_probes(self, chords: List[Any], chord_vocabulary: ChordVocabulary) -> CpmlTokenBatch:
+        """Tokenise the distinct progressions, in parallel chunks when there are enough of them
+        
+        Splitting the CPML strings is most of the cost, so workers do it
+        against chunk-local symbol tables (tokenise_chords_wrapper). The
+        parent only interns each chunk's distinct symbols, in chunk order,
+        and remaps the ids - the ids and columns come out exactly as a
+        single-process CpmlTokenBatch.encode would produce them.
+        """
+        if len(chords) < self.PARALLEL_TOKENISE_MIN_SONGS or self.num_workers < 2:
+            return CpmlTokenBatch.encode(chords, chord_vocabulary, self.music_theory)
+        
+        chunk_size = -(-len(chords) // (self.num_workers * 4))
+        packed_chunks = [_pack_fields([('' if _has_no_harmony(value) else str(value),)
+                                       for value in chords[i:i + chunk_size]], 1)
+                         for i in range(0, len(chords), chunk_size)]
+        with ProcessPoolExecutor(max_workers=self.num_workers, initializer=_init_ultimate_worker,
+                                 initargs=(None, None, self.cache_budget_mb, None, self.logger.log_queue)) as executor:
+            batches = [local_batch.remap(symbols, chord_vocabulary)
+                       for symbols, local_batch in executor.map(tokenise_chords_wrapper, packed_chunks)]
+        return CpmlTokenBatch.concat(batches)
+    
+    def _publish_shared_tokens(self, token_batch: CpmlTokenBatch) -> Optional[SharedTokenBatch]:
+        """Shared-memory copy of the run's token columns, or None to pickle per-batch slices instead"""
+        if not self.shared_input:
+            return None
+        try:
+            shared_tokens = SharedTokenBatch.publish(token_batch)
+        except OSError as e:
+            self.logger.warning(f"Shared memory unavailable ({e}) - sending token batches by pickle")
+            return None
+        self.logger.info(f"🧠 Shared token columns: {shared_tokens.shm.size / 1024**2:.1f} MB in {shared_tokens.shm.name}")
+        return shared_tokens
+    
+    def _drain_worker_stats(self, stats_queue: Any):
+        """Collect pending worker cache reports, keeping the latest per pid"""
+        while True:
+            try:
+                report = stats_queue.get_nowait()
+            except Exception:
+                return
+            self.worker_cache_stats[report['pid']] = report
+    
+    def _summarize_worker_stats(self) -> Dict[str, Any]:
+        """Aggregate per-worker cache counters into one cross-batch reuse summary"""
+        totals = Counter()
+        for report in self.worker_cache_stats.values():
+            totals.update({name: value for name, value in report.items()
+                           if name != 'pid' and isinstance(value, (int, float))})
+        
+        summary = {'workers_reporting': len(self.worker_cache_stats), **dict(totals)}
+        rates, bypassed = [], []
+        for cache, label in self.CACHE_LABELS.items():
+            lookups = totals[f'{cache}_hits'] + totals[f'{cache}_misses']
+            # None, not 0%: the vocabulary path never consults some caches at all
+            summary[f'{cache}_hit_rate'] = totals[f'{cache}_hits'] / lookups if lookups else None
+            if lookups:
+                rates.append(f"{label} {summary[f'{cache}_hit_rate']:.1%}")
+            else:
+                bypassed.append(label)
+        
+        if self.worker_cache_stats:
+            self.logger.info(f"♻️  Worker engines: {summary['workers_reporting']} processes reused across "
+                             f"{summary.get('batches', 0)} batches")
+            self.logger.info(f"♻️  Cache hit rates: {', '.join(rates) or 'no lookups'}"
+                             + (f" (bypassed: {', '.join(bypassed)})" if bypassed else ''))
+            evictions = sum(totals[f'{cache}_evictions'] for cache in ('key', 'roman', 'huv'))
+            if evictions:
+                self.logger.info(f"♻️  LRU evictions: {evictions:,} (raise --cache-budget-mb if hit rates suffer)")
+        return summary
+    
+    def calibrate_workers(self, input_file: str, sample_rows: int = 5000,
+                          batch_size: int = 100) -> Dict[str, Any]:
+        """Benchmark a slice of the input with 1..N workers and store the knee in the worker profile
+        
+        N is the old heuristic's count, so the sweep shows whether
+        oversubscribing past the core count buys anything. Every pool is
+        warmed up before timing so process start-up is not measured.
+        """
+        
+        start_row = self.machine.work_range[0]
+        df = pd.read_csv(input_file, encoding='utf-8', dtype=self.INPUT_DTYPES, na_values=['', 'nan', 'null'],
+                         skiprows=range(1, start_row + 1) if start_row > 0 else None, nrows=sample_rows)
+        chord_vocabulary = ChordVocabulary(self.music_theory)
+        token_batch = CpmlTokenBatch.encode(df['chords'].tolist(), chord_vocabulary, self.music_theory)
+        chord_vocabulary.freeze()
+        songs = len(token_batch)
+        
+        max_workers = max(1, int(self.machine.logical_cores * 1.3))
+        ladder = WorkerProfile.worker_ladder(max_workers, self.machine.physical_cores, self.machine.logical_cores)
+        self.logger.info(f"📐 Calibrating on {songs:,} songs with {ladder} workers...")
+        
+        shared_tokens = SharedTokenBatch.publish(token_batch)
+        throughput: Dict[int, float] = {}
+        try:
+            for workers in ladder:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_ultimate_worker,
+                                         initargs=(chord_vocabulary, None, self.cache_budget_mb,
+                                                   shared_tokens.spec, self.logger.log_queue)) as executor:
+                    list(executor.map(_calibration_warmup, [0.05] * workers))
+                    
+                    started = time.perf_counter()
+                    futures = [executor.submit(process_token_range_wrapper, start, min(start + batch_size, songs))
+                               for start in range(0, songs, batch_size)]
+                    for future in futures:
+                        future.result()
+                    throughput[workers] = songs / (time.perf_counter() - started)
+                self.logger.info(f"📐 {workers:3d} workers: {throughput[workers]:,.1f} songs/sec")
+        finally:
+            shared_tokens.close()
+        
+        chosen = WorkerProfile.knee(throughput)
+        profile = {
+            'workers': chosen,
+            'songs_per_second': {str(workers): speed for workers, speed in throughput.items()},
+            'logical_cores': self.machine.logical_cores,
+            'physical_cores': self.machine.physical_cores,
+            'sample_songs': songs,
+            'calibrated_at': datetime.now().isoformat(timespec='seconds')
+        }
+        if self.worker_profile is not None:
+            self.worker_profile.save(self.machine.hostname, profile)
+            self.logger.success(f"📐 Knee at {chosen} workers ({throughput[chosen]:,.1f} songs/sec, "
+                                f"peak {max(throughput.values()):,.1f}) - saved to {self.worker_profile.path}")
+        self.num_workers = chosen
+        return profile
+    
+    def _summarize_stage_profile(self) -> Dict[str, Any]:
+        """Merged stage profile for performance_results, with a one-line breakdown in the log"""
+        summary = self.stage_profile.summary()
+        breakdown = ' | '.join(f"{stage} {stats['share']:.0%} ({stats['ns_per_song'] / 1000:.1f} µs/song)"
+                               for stage, stats in summary['stages'].items())
+        self.logger.info(f"⏱️  Stage time: {breakdown}")
+        counters = summary['counters']
+        self.logger.info(f"⏱️  Songs {counters.get('songs', 0):,}: {counters.get('no_harmony', 0):,} no harmony, "
+                         f"{counters.get('parse_errors', 0):,} parse errors, {counters.get('analysis_errors', 0):,} analysis errors, "
+                         f"{counters.get('unknown_chords', 0):,} unknown chords")
+        return summary
+    
+    def _log_mission_banner(self, input_file: str, output_file: str):
+        """Epic startup banner"""
+        self.logger.info("🚀" + "="*90)
+        self.logger.success("⚡ ULTIMATE DATA3 CREATION - PURE MUSIC ANALYSIS BEAST MODE ACTIVATED")
         self.logger.info("🚀" + "="*90)
         self.logger.info(f"🎯 Mission: {input_file} → {output_file}")
         self.logger.info(f"💻 Machine: {self.machine.model_name} ({self.machine.physical_cores}C/{self.machine.logical_cores}T)")
         self.logger.info(f"⚡ Workers: {self.num_workers} parallel processes for {self.machine.cpu_target_percent}% CPU")
         self.logger.info(f"🎵 Work Range: {self.machine.work_range[0]:,} to {self.machine.work_range[1] or 'END'}")
         self.logger.info(f"🔥 NO SPOTIFY API CALLS - PURE MUSIC THEORY SPEED!")
+    
+    async def process_data2_to_data3_ultimate(self, input_file: str, output_file: str,
+                                              streaming: bool = False,
+                                              stream_chunk_rows: Optional[int] = None,
+                                              max_in_flight: Optional[int] = None,
+                                              reorder_window: Optional[int] = None,
+                                              checkpoint: bool = False,
+                                              resume: bool = False) -> Dict[str, Any]:
+        """Ultimate data2 to data3 conversion with maximum performance and zero Spotify bottlenecks
+        
+        streaming=True reads the input in chunks, keeps at most max_in_flight
+        batches in the pool and appends results to disk as they complete, so
+        memory stays flat regardless of input size. Both modes write rows in
+        input order, so outputs are deterministic and directly concatenable.
+        checkpoint/resume (streaming only) commit finished row ranges so an
+        interrupted run can pick up where it stopped.
+        """
+        
+        if (checkpoint or resume) and not streaming:
+            self.logger.info("💾 Checkpointing works on streamed batches - switching to streaming mode")
+            streaming = True
+        
+        if streaming:
+            return await self.process_data2_to_data3_streaming(input_file, output_file, stream_chunk_rows,
+                                                               max_in_flight, reorder_window,
+                                                               checkpoint or resume, resume)
+        
+        start_time = time.time()
+        self._log_mission_banner(input_file, output_file)
         
         # Load and filter data based on machine assignment
         self.logger.info("📁 Loading input data and applying work range filter...")
         
         try:
-            # Load with optimized dtypes for speed
-            dtype_spec = {
-                'id': 'Int64',
-                'spotify_artist_id': 'string',
-                'spotify_song_id': 'string',
-                'chords': 'string'
-            }
-            
-            df = pd.read_csv(input_file, encoding='utf-8', dtype=dtype_spec, na_values=['', 'nan', 'null'])
+            df = pd.read_csv(input_file, encoding='utf-8', dtype=self.INPUT_DTYPES, na_values=['', 'nan', 'null'])
             
         except Exception as e:
             self.logger.critical(f"Failed to load input file: {e}")
@@ -1171,128 +2743,346 @@ class UltimateData3Processor:
             self.logger.warning("No data assigned to this machine - exiting")
             return {'error': 'no_data_assigned'}
         
-        # Define exact data3 column structure (matching your provided sample)
-        data3_columns = [
-            # Original data2 columns (preserve all existing data)
-            'id', 'chords', 'release_date', 'genres', 'decade', 'rock_genre',
-            'artist_id', 'main_genre', 'spotify_song_id', 'spotify_artist_id',
-            # New data3 columns (our additions)
-            'artist_name', 'artist_url', 'song_name', 'song_url',  # Spotify metadata (PENDING for now)
-            'key', 'roman_numerals', 'harmonic_fingerprint'       # Pure music analysis
-        ]
-        
-        # Ensure all required columns exist with appropriate defaults
-        for col in data3_columns:
-            if col not in df.columns:
-                if col in ['artist_name', 'song_name']:
-                    df[col] = 'PENDING'
-                elif col in ['artist_url', 'song_url']:
-                    df[col] = 'N/A'
-                elif col in ['key', 'roman_numerals', 'harmonic_fingerprint']:
-                    df[col] = ''
-                else:
-                    df[col] = ''
-        
+        df = self._ensure_data3_columns(df)
+        
         # Convert to list of dictionaries for maximum processing speed
         songs_data = df.to_dict('records')
         
-        # Calculate optimal batch size for the available workers
-        optimal_batch_size = max(50, total_rows_assigned // (self.num_workers * 8))  # Ensure good work distribution
-        song_batches = [
-            songs_data[i:i + optimal_batch_size] 
-            for i in range(0, len(songs_data), optimal_batch_size)
-        ]
+        # Content-addressed dedup: covers and duplicate uploads share byte-identical
+        # chords strings, so only one probe row per distinct progression is analysed
+        deduplicator = ProgressionDeduplicator()
+        row_digests, probes, known = deduplicator.split(songs_data)
+        dedup_stats = deduplicator.summary()
+        self.logger.success(f"🧬 Dedup: {len(probes):,} distinct progressions for {total_rows_assigned:,} songs "
+                            f"({dedup_stats['dedup_ratio']:.2f}x, {dedup_stats['analysis_saved']:.1%} analysis saved)")
+        
+        # One-time vocabulary pass: every distinct chord symbol is parsed once
+        # and all probes become one set of flat int32 token columns
+        self.logger.info("🔤 Interning chord vocabulary...")
+        chord_vocabulary = ChordVocabulary(self.music_theory)
+        tokenise_start = time.perf_counter_ns()
+        token_batch = self._tokenise_probes([probe['chords'] for probe in probes], chord_vocabulary)
+        chord_vocabulary.freeze()
+        self.stage_profile.add('tokenise', time.perf_counter_ns() - tokenise_start)  # Wall time, before the analysis pool
+        self.logger.success(f"🔤 Chord vocabulary: {len(chord_vocabulary):,} distinct symbols across {len(token_batch.tokens):,} tokens")
         
-        self.logger.info(f"🔥 Processing {len(song_batches)} batches with {self.num_workers} workers")
-        self.logger.info(f"📦 Batch size: {optimal_batch_size} songs per batch")
+        # Workers read the token columns straight from shared memory and are sent only song ranges
+        shared_tokens = self._publish_shared_tokens(token_batch)
+        
+        # Batch size adapts to measured latency, starting small
+        sizer = self._new_batch_sizer()
+        max_in_flight = self.num_workers * 2
+        self.logger.info(f"🔥 Processing {len(probes):,} progressions with {self.num_workers} workers")
+        self.logger.info(f"📦 Adaptive batch size: starts at {sizer.size}, target {sizer.target_seconds * 1000:.0f} ms per batch "
+                         f"(max {sizer.max_size:,})")
         
         # Estimate processing time based on pure music analysis (no Spotify delays)
         estimated_speed = 100 * self.num_workers  # songs per second estimate for pure analysis
-        estimated_time_minutes = total_rows_assigned / estimated_speed / 60
+        estimated_time_minutes = len(probes) / estimated_speed / 60
         self.logger.info(f"⏱️  Estimated completion: {estimated_time_minutes:.1f} minutes")
         
         # MAXIMUM PERFORMANCE PARALLEL PROCESSING
-        processed_songs = []
+        analyses: List[Tuple[str, str, str]] = [('Processing Error', 'error', '')] * len(probes)
         processed_count = 0
+        batch_count = 0
         last_progress_time = time.time()
         
         self.logger.info("🚀 LAUNCHING MAXIMUM PERFORMANCE PROCESSING...")
         
-        with ProcessPoolExecutor(max_workers=self.num_workers) as executor:
-            # Submit all batches for parallel processing
-            future_to_batch = {
-                executor.submit(process_song_batch_ultimate_wrapper, batch): i 
-                for i, batch in enumerate(song_batches)
-            }
-            
-            # Collect results with real-time progress tracking
-            for future in as_completed(future_to_batch):
-                batch_idx = future_to_batch[future]
+        # Each worker builds its engine once and receives the vocabulary once
+        stats_queue = mp.Queue()
+        try:
+            with ProcessPoolExecutor(max_workers=self.num_workers, initializer=_init_ultimate_worker,
+                                     initargs=(chord_vocabulary, stats_queue, self.cache_budget_mb,
+                                               shared_tokens.spec if shared_tokens else None,
+                                               self.logger.log_queue)) as executor:
+                in_flight: Dict[Any, Tuple[int, int]] = {}
+                next_start = 0
                 
-                try:
-                    batch_results = future.result()
-                    processed_songs.extend(batch_results)
-                    processed_count += len(batch_results)
+                while next_start < len(probes) or in_flight:
+                    # Keep the pool fed with ranges sized from the latest measurements
+                    while next_start < len(probes) and len(in_flight) < max_in_flight:
+                        stop = next_start + sizer.next_size(len(probes) - next_start, self.num_workers)
+                        future = executor.submit(process_token_range_wrapper, next_start, stop,
+                                                 None if shared_tokens else token_batch.slice(next_start, stop))
+                        in_flight[future] = (next_start, stop)
+                        next_start = stop
+                    
+                    done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                    self._drain_worker_stats(stats_queue)
+                    
+                    for future in done:
+                        start, stop = in_flight.pop(future)
+                        batch_count += 1
+                        try:
+                            packed, compute_seconds, pack_seconds, batch_profile = future.result()
+                            self.stage_profile.merge(batch_profile)
+                            self.logger.batch_errors('Song analysis', StageProfiler.error_counts(batch_profile))
+                            unpack_start = time.perf_counter()
+                            analyses[start:stop] = _unpack_fields(packed)
+                            sizer.observe(stop - start, compute_seconds,
+                                          pack_seconds + time.perf_counter() - unpack_start)
+                        except Exception as e:
+                            self.logger.error(f"Batch {batch_count} (progressions {start:,}-{stop:,}) processing failed: {e}")
+                        processed_count += stop - start
                     
                     # High-frequency progress updates
                     current_time = time.time()
                     if current_time - last_progress_time >= 2.0:  # Every 2 seconds
                         elapsed = current_time - start_time
                         speed = processed_count / max(elapsed, 1)
-                        progress = processed_count / total_rows_assigned
-                        eta_minutes = (total_rows_assigned - processed_count) / max(speed, 1) / 60
-                        
-                        self.logger.progress(processed_count, total_rows_assigned, speed)
+                        self.logger.progress(processed_count, len(probes), speed, sizer.size)
                         last_progress_time = current_time
-                    
-                except Exception as e:
-                    self.logger.error(f"Batch {batch_idx} processing failed: {e}")
-                    # Add fallback data for failed batch
-                    failed_batch = song_batches[batch_idx]
-                    for song in failed_batch:
-                        song.update({
-                            'key': 'Processing Error',
-                            'roman_numerals': 'error',
-                            'harmonic_fingerprint': '',
-                            'artist_name': 'PENDING',
-                            'artist_url': f"https://open.spotify.com/artist/{song.get('spotify_artist_id', 'unknown')}",
-                            'song_name': 'PENDING',
-                            'song_url': f"https://open.spotify.com/track/{song.get('spotify_song_id', 'unknown')}"
-                        })
-                    processed_songs.extend(failed_batch)
-                    processed_count += len(failed_batch)
-        
-        # Convert results back to DataFrame with exact column order
+        finally:
+            if shared_tokens:
+                shared_tokens.close()
+        self._drain_worker_stats(stats_queue)
+        self._log_batch_sizing(sizer, batch_count)
+        
+        # Fan each progression's analysis out to every row that shares it
+        deduplicator.fan_out(songs_data, row_digests, probes, analyses, known)
+        
+        # Convert results back to DataFrame with exact column order (rows in input order)
         self.logger.info("📊 Converting results to DataFrame and finalizing...")
-        result_df = pd.DataFrame(processed_songs)
-        result_df = result_df.reindex(columns=data3_columns, fill_value='')
+        result_df = pd.DataFrame(songs_data)
+        result_df = self._finalize_output_frame(result_df)
         
         # Save with high-performance settings
         self.logger.info(f"💾 Saving {len(result_df)} songs to {output_file}...")
         
         try:
-            result_df.to_csv(
-                output_file, 
-                index=False, 
-                encoding='utf-8',
-                na_rep='',
-                float_format='%.6f',  # High precision for HUV vectors
-                chunksize=10000      # Write in chunks for memory efficiency
-            )
+            sink = self._open_output(output_file)
+            sink.write(result_df)
+            sink.close()
         except Exception as e:
             self.logger.critical(f"Failed to save output file: {e}")
             raise
         
+        # Quality analysis
+        successful_analyses = len(result_df[~result_df['key'].isin(self.FAILED_KEYS)])
+        
+        return self._finalize_run(input_file, output_file, len(result_df), successful_analyses, start_time,
+                                  worker_cache_stats=self._summarize_worker_stats(), dedup_stats=dedup_stats,
+                                  batch_sizing_stats=sizer.summary())
+    
+    async def process_data2_to_data3_streaming(self, input_file: str, output_file: str,
+                                               stream_chunk_rows: Optional[int] = None,
+                                               max_in_flight: Optional[int] = None,
+                                               reorder_window: Optional[int] = None,
+                                               checkpoint: bool = False,
+                                               resume: bool = False) -> Dict[str, Any]:
+        """Bounded-memory data2 → data3 conversion
+        
+        Pass 1 streams only the chords column to build the chord vocabulary.
+        Pass 2 streams full rows in chunks of stream_chunk_rows, keeps at most
+        max_in_flight batches submitted (backpressure) and appends completed
+        batches to output_file in input order through an OrderedBatchWriter.
+        At most reorder_window batches may be outstanding past the oldest
+        unwritten one. Peak memory is bounded by these windows, not by the
+        input size.
+        
+        With checkpoint=True the ordered batches go to a BatchCheckpoint in
+        <output_file>.checkpoint/ instead and are concatenated into
+        output_file at the end; resume=True skips the rows it already holds.
+        """
+        
+        start_time = time.time()
+        self._log_mission_banner(input_file, output_file)
+        
+        stream_chunk_rows = stream_chunk_rows or self.machine.chunk_size
+        max_in_flight = max_in_flight or self.num_workers * 2
+        reorder_window = max(reorder_window or max_in_flight * 2, 1)
+        sizer = self._new_batch_sizer()
+        
+        start_row, end_row = self.machine.work_range
+        
+        # Committed row ranges of an interrupted run are skipped, not re-read
+        batch_checkpoint = None
+        resumed_rows = 0
+        if checkpoint:
+            input_stat = os.stat(input_file)
+            run_config = {
+                'input_file': os.path.abspath(input_file),
+                'input_bytes': input_stat.st_size,
+                'input_mtime': input_stat.st_mtime,
+                'work_range': list(self.machine.work_range),
+                'output_format': self.output_format,
+                'columns': self._output_columns()
+            }
+            batch_checkpoint = BatchCheckpoint(f"{output_file}.checkpoint", run_config, self._open_output,
+                                               self.output_format, commit_rows=stream_chunk_rows)
+            if resume:
+                resumed_rows = batch_checkpoint.resume()
+                self.logger.success(f"💾 Resuming: {resumed_rows:,} rows already committed in "
+                                    f"{len(batch_checkpoint.entries)} parts")
+            else:
+                batch_checkpoint.start_fresh()
+            self.logger.info(f"💾 Checkpointing every {stream_chunk_rows:,} rows to {batch_checkpoint.directory}")
+        
+        first_row = start_row + resumed_rows
+        read_window = {
+            'skiprows': range(1, first_row + 1) if first_row > 0 else None,
+            'nrows': max(end_row - first_row + 1, 0) if end_row is not None else None,
+            'chunksize': stream_chunk_rows,
+            'encoding': 'utf-8',
+            'na_values': ['', 'nan', 'null']
+        }
+        
+        self.logger.info(f"🌊 STREAMING MODE: {stream_chunk_rows:,} rows per read, "
+                         f"adaptive batches from {sizer.size} songs (target {sizer.target_seconds * 1000:.0f} ms), "
+                         f"{max_in_flight} batches in flight, "
+                         f"reorder window {reorder_window}")
+        
+        # Pass 1: chord vocabulary from the chords column only
+        self.logger.info("🔤 Interning chord vocabulary (streaming pass 1)...")
+        chord_vocabulary = ChordVocabulary(self.music_theory)
+        total_rows_assigned = 0
+        try:
+            for chunk in pd.read_csv(input_file, usecols=['chords'], dtype={'chords': 'string'}, **read_window):
+                total_rows_assigned += len(chunk)
+                for cpml_string in chunk['chords'].tolist():
+                    chord_vocabulary.intern_cpml(cpml_string)
+        except Exception as e:
+            self.logger.critical(f"Failed to load input file: {e}")
+            raise
+        chord_vocabulary.freeze()
+        self.logger.success(f"🔤 Chord vocabulary: {len(chord_vocabulary):,} distinct symbols")
+        self.logger.success(f"📊 Data filtered: {total_rows_assigned:,} songs assigned to this machine")
+        
+        if total_rows_assigned == 0 and not resumed_rows:
+            self.logger.warning("No data assigned to this machine - exiting")
+            return {'error': 'no_data_assigned'}
+        
+        # Pass 2: bounded in-flight processing, results appended as they complete
+        processed_count = 0
+        successful_analyses = 0
+        sink = None if batch_checkpoint else self._open_output(output_file)
+        next_seq = 0
+        last_progress_time = time.time()
+        in_flight: Dict[Any, Tuple[int, List[Dict[str, Any]], List[bytes], List[Dict[str, Any]], Dict[bytes, Tuple[str, str, str]], float]] = {}
+        
+        # Each batch only ships its not-yet-seen progressions to the pool
+        deduplicator = ProgressionDeduplicator(memo_size=self.STREAM_DEDUP_MEMO)
+        
+        def write_results(batch_results: List[Dict[str, Any]]):
+            nonlocal processed_count, successful_analyses
+            result_df = self._finalize_output_frame(pd.DataFrame(batch_results))
+            successful = int((~result_df['key'].isin(self.FAILED_KEYS)).sum())
+            if batch_checkpoint:
+                batch_checkpoint.add(result_df, successful)
+            else:
+                sink.write(result_df)
+            processed_count += len(result_df)
+            successful_analyses += successful
+        
+        # Completed batches are written strictly in input order
+        writer = OrderedBatchWriter(write_results, reorder_window)
+        
+        stats_queue = mp.Queue()
+        
+        def drain(return_when) -> None:
+            nonlocal last_progress_time
+            done, _ = wait(list(in_flight), return_when=return_when)
+            self._drain_worker_stats(stats_queue)
+            for future in done:
+                seq, song_batch, row_digests, probes, known, pack_seconds = in_flight.pop(future)
+                try:
+                    packed, compute_seconds, worker_ipc_seconds, batch_profile = future.result()
+                    self.stage_profile.merge(batch_profile)
+                    self.logger.batch_errors('Song analysis', StageProfiler.error_counts(batch_profile))
+                    unpack_start = time.perf_counter()
+                    analyses = _unpack_fields(packed)
+                    sizer.observe(len(song_batch), compute_seconds,
+                                  pack_seconds + worker_ipc_seconds + time.perf_counter() - unpack_start)
+                    writer.add(seq, deduplicator.fan_out(song_batch, row_digests, probes, analyses, known))
+                except Exception as e:
+                    self.logger.error(f"Streaming batch {seq} processing failed: {e}")
+                    failed = [('Processing Error', 'error', '')] * len(probes)
+                    writer.add(seq, deduplicator.fan_out(song_batch, row_digests, probes, failed, known, remember=False))
+            
+            current_time = time.time()
+            if current_time - last_progress_time >= 2.0:
+                speed = processed_count / max(current_time - start_time, 1)
+                self.logger.progress(processed_count, total_rows_assigned, speed, sizer.size)
+                last_progress_time = current_time
+        
+        self.logger.info("🚀 LAUNCHING STREAMING PROCESSING...")
+        
+        try:
+            with ProcessPoolExecutor(max_workers=self.num_workers, initializer=_init_ultimate_worker,
+                                     initargs=(chord_vocabulary, stats_queue, self.cache_budget_mb,
+                                               None, self.logger.log_queue)) as executor:
+                for chunk in pd.read_csv(input_file, dtype=self.INPUT_DTYPES, **read_window):
+                    songs_data = self._ensure_data3_columns(chunk).to_dict('records')
+                    del chunk
+                    
+                    i = 0
+                    while i < len(songs_data):
+                        # Backpressure: wait for a pool slot and for room in the reorder window
+                        while len(in_flight) >= max_in_flight or not writer.can_admit(next_seq):
+                            drain(FIRST_COMPLETED)
+                        
+                        # Size chosen after draining, so it reflects the latest measurements
+                        song_batch = songs_data[i:i + sizer.next_size()]
+                        i += len(song_batch)
+                        row_digests, probes, known = deduplicator.split(song_batch)
+                        if probes:
+                            pack_start = time.perf_counter()
+                            packed_chords = _pack_fields(
+                                [('' if _has_no_harmony(probe['chords']) else str(probe['chords']),) for probe in probes], 1
+                            )
+                            future = executor.submit(process_chords_batch_wrapper, packed_chords)
+                            in_flight[future] = (next_seq, song_batch, row_digests, probes, known,
+                                                 time.perf_counter() - pack_start)
+                        else:
+                            # Every progression already analysed - no pool round trip needed
+                            writer.add(next_seq, deduplicator.fan_out(song_batch, row_digests, [], [], known))
+                        next_seq += 1
+                    del songs_data
+                
+                while in_flight:
+                    drain(FIRST_COMPLETED)
+            if batch_checkpoint:
+                batch_checkpoint.commit()
+                checkpoint_stats = {'checkpoint_dir': str(batch_checkpoint.directory),
+                                    'parts': len(batch_checkpoint.entries), 'resumed_rows': resumed_rows}
+                self.logger.info(f"🧩 Assembling {len(batch_checkpoint.entries)} checkpoint parts into {output_file}...")
+                processed_count += resumed_rows
+                successful_analyses = batch_checkpoint.successful
+                batch_checkpoint.assemble(output_file)
+            else:
+                sink.close()
+        except Exception as e:
+            self.logger.critical(f"Streaming run failed: {e}")
+            raise
+        self._drain_worker_stats(stats_queue)
+        self._log_batch_sizing(sizer, next_seq)
+        
+        self.logger.info(f"🧾 Ordered writer: {writer.next_seq} batches written in input order, "
+                         f"peak reorder buffer {writer.max_buffered}/{writer.window}")
+        dedup_stats = deduplicator.summary()
+        self.logger.success(f"🧬 Dedup: {dedup_stats['progressions_analysed']:,} progressions analysed for "
+                            f"{dedup_stats['rows']:,} songs ({dedup_stats['dedup_ratio']:.2f}x)")
+        
+        return self._finalize_run(input_file, output_file, processed_count, successful_analyses, start_time,
+                                  worker_cache_stats=self._summarize_worker_stats(), dedup_stats=dedup_stats,
+                                  checkpoint_stats=checkpoint_stats if batch_checkpoint else None,
+                                  batch_sizing_stats=sizer.summary())
+    
+    def _finalize_run(self, input_file: str, output_file: str, final_count: int,
+                      successful_analyses: int, start_time: float,
+                      worker_cache_stats: Optional[Dict[str, Any]] = None,
+                      dedup_stats: Optional[Dict[str, Any]] = None,
+                      checkpoint_stats: Optional[Dict[str, Any]] = None,
+                      batch_sizing_stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Final statistics, performance summary and victory banner"""
+        
+        self.logger.flush_error_summaries()
+        
         # VICTORY! Calculate final statistics
         total_time = time.time() - start_time
-        final_count = len(result_df)
         songs_per_second = final_count / total_time
         self.songs_processed = final_count
-        
-        # Quality analysis
-        successful_analyses = len(result_df[
-            ~result_df['key'].isin(['No Harmony Data', 'Parse Error', 'Analysis Error', 'Processing Error'])
-        ])
         success_rate = successful_analyses / final_count if final_count > 0 else 0
         
         # Performance summary
@@ -1310,6 +3100,7 @@ class UltimateData3Processor:
             'processing_stats': {
                 'input_file': input_file,
                 'output_file': output_file,
+                'output_format': self.output_format,
                 'total_songs_processed': final_count,
                 'processing_time_minutes': total_time / 60,
                 'songs_per_second': songs_per_second,
@@ -1329,6 +3120,16 @@ class UltimateData3Processor:
                 'next_step': 'Run Spotify metadata fetcher on 2012 iMac'
             }
         }
+        if worker_cache_stats is not None:
+            performance_results['worker_cache_stats'] = worker_cache_stats
+        if dedup_stats is not None:
+            performance_results['dedup_stats'] = dedup_stats
+        if checkpoint_stats is not None:
+            performance_results['checkpoint_stats'] = checkpoint_stats
+        if batch_sizing_stats is not None:
+            performance_results['batch_sizing_stats'] = batch_sizing_stats
+        if self.stage_profile.stages:
+            performance_results['stage_profile'] = self._summarize_stage_profile()
         
         # EPIC VICTORY CELEBRATION
         self.logger.info("🚀" + "="*90)
@@ -1337,6 +3138,9 @@ class UltimateData3Processor:
         self.logger.success(f"🏆 PROCESSED: {final_count:,} songs in {total_time/60:.1f} minutes")
         self.logger.success(f"⚡ SPEED: {songs_per_second:.1f} songs/second ({songs_per_second*60:.0f}/minute)")
         self.logger.success(f"🎯 SUCCESS RATE: {success_rate:.2%} harmonic analysis success")
+        if dedup_stats is not None:
+            self.logger.success(f"🧬 DEDUP RATIO: {dedup_stats['dedup_ratio']:.2f}x "
+                                f"({dedup_stats['progressions_analysed']:,} progressions analysed)")
         self.logger.success(f"💻 MACHINE: {self.machine.hostname} ({self.machine.output_suffix})")
         self.logger.success(f"🎵 KEY DETECTION: ✅ Complete")
         self.logger.success(f"🎼 ROMAN NUMERALS: ✅ Complete") 
@@ -1352,86 +3156,257 @@ class UltimateData3Processor:
 # MULTIPROCESSING WRAPPER (MUST BE AT MODULE LEVEL)
 # =====================================================================================
 
-def process_song_batch_ultimate_wrapper(song_batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Ultimate song batch processing wrapper for multiprocessing"""
+# Long-lived per-process state, set up once by the pool initializer and reused
+# by every batch that worker runs
+_WORKER_STATE: Dict[str, Any] = {}
+
+def _init_ultimate_worker(chord_vocabulary: Optional[ChordVocabulary] = None, stats_queue: Any = None,
+                          cache_budget_mb: Optional[float] = None,
+                          shared_token_spec: Optional[Tuple[str, Dict[str, Tuple[int, str, int]]]] = None,
+                          log_queue: Any = None):
+    """ProcessPoolExecutor initializer: one engine (and vocabulary) per worker, attached to the shared token columns"""
+    if log_queue is not None:
+        UltimateLogger.attach_worker(log_queue)
+    _WORKER_STATE['music_theory'] = UltimatePureMusicTheoryEngine(cache_budget_mb)
+    _WORKER_STATE['chord_vocabulary'] = chord_vocabulary
+    _WORKER_STATE['stats_queue'] = stats_queue
+    _WORKER_STATE['shared_tokens'] = SharedTokenBatch.attach(shared_token_spec) if shared_token_spec else None
+    _WORKER_STATE['batches'] = 0
+    _WORKER_STATE['songs'] = 0
+
+def _report_worker_stats():
+    """Push this worker's cumulative cache counters to the parent"""
+    stats_queue = _WORKER_STATE.get('stats_queue')
+    if stats_queue is None:
+        return
+    report = _WORKER_STATE['music_theory'].cache_report()
+    report.update({'pid': os.getpid(), 'batches': _WORKER_STATE['batches'], 'songs': _WORKER_STATE['songs']})
+    try:
+        stats_queue.put_nowait(report)
+    except Exception:
+        pass  # Stats are best-effort - never fail a batch over them
+
+def _calibration_warmup(seconds: float) -> int:
+    """Occupy one pool process briefly so every worker is started before timing"""
+    time.sleep(seconds)
+    return os.getpid()
+
+def _count_worker_batch(songs: int):
+    """Per-worker batch/song counters, reported after every batch"""
+    if 'music_theory' in _WORKER_STATE:
+        _WORKER_STATE['batches'] += 1
+        _WORKER_STATE['songs'] += songs
+        _report_worker_stats()
+
+def _has_no_harmony(chords_str: Any) -> bool:
+    """True when a data2 chords field is empty or missing (None, NaN or pd.NA)"""
+    return chords_str is None or pd.isna(chords_str) or str(chords_str).strip() == ''
+
+def _data3_analysis_fields(song_data: Dict[str, Any], key: str, roman_numerals: str, harmonic_fingerprint: str) -> Dict[str, Any]:
+    """data3 analysis columns plus PENDING Spotify placeholders for one song"""
+    return {
+        'key': key,
+        'roman_numerals': roman_numerals,
+        'harmonic_fingerprint': harmonic_fingerprint,
+        'artist_name': 'PENDING',  # Will be filled by 2012 iMac
+        'artist_url': f"https://open.spotify.com/artist/{song_data.get('spotify_artist_id', 'unknown')}",
+        'song_name': 'PENDING',   # Will be filled by 2012 iMac
+        'song_url': f"https://open.spotify.com/track/{song_data.get('spotify_song_id', 'unknown')}"
+    }
+
+def _analyse_chord_sequences(count: int, sequence_at, music_theory: UltimatePureMusicTheoryEngine,
+                             chord_vocabulary: Optional[ChordVocabulary],
+                             profiler: Optional[StageProfiler] = None) -> List[Tuple[str, str, str]]:
+    """(key, roman_numerals, harmonic_fingerprint) for songs 0..count-1
     
-    # Create fresh music theory engine for this worker
-    music_theory = UltimatePureMusicTheoryEngine()
+    sequence_at(i) returns song i's chord sequence (vocabulary ids when a
+    chord_vocabulary is given, chord strings otherwise) or None when the
+    song has no harmony. Key detection runs once for the whole batch: every
+    song's pitch-class profile is stacked into an (N, 12) matrix and
+    correlated in one pass. A profiler, when given, receives nanoseconds per
+    stage plus song outcome and unknown-chord counters.
+    """
     
-    results = []
+    analyses: List[Tuple[str, str, str]] = [('Analysis Error', 'error', '')] * count
+    pending = []  # (index, chord_sequence, combined_profile) awaiting batched key detection
+    use_vocabulary = chord_vocabulary is not None
+    clock = time.perf_counter_ns
+    extract_ns = profile_ns = roman_ns = huv_ns = 0
+    no_harmony = parse_errors = unknown_chords = 0
     
-    for song_data in song_batch:
+    for i in range(count):
         try:
-            # Extract chord data
-            chords_str = song_data.get('chords', '')
-            if not chords_str or pd.isna(chords_str) or str(chords_str).strip() == '':
-                song_data.update({
-                    'key': 'No Harmony Data',
-                    'roman_numerals': 'empty',
-                    'harmonic_fingerprint': '',
-                    'artist_name': 'PENDING',
-                    'artist_url': f"https://open.spotify.com/artist/{song_data.get('spotify_artist_id', 'unknown')}",
-                    'song_name': 'PENDING',
-                    'song_url': f"https://open.spotify.com/track/{song_data.get('spotify_song_id', 'unknown')}"
-                })
-                results.append(song_data)
+            started = clock()
+            chord_sequence = sequence_at(i)
+            extracted = clock()
+            extract_ns += extracted - started
+            if chord_sequence is None:
+                no_harmony += 1
+                analyses[i] = ('No Harmony Data', 'empty', '')
                 continue
             
-            # Parse CPML sequence
-            chord_sequence = music_theory.extract_cpml_sequence_ultimate(chords_str)
-            if not chord_sequence:
-                song_data.update({
-                    'key': 'Parse Error',
-                    'roman_numerals': 'parse_error',
-                    'harmonic_fingerprint': '',
-                    'artist_name': 'PENDING',
-                    'artist_url': f"https://open.spotify.com/artist/{song_data.get('spotify_artist_id', 'unknown')}",
-                    'song_name': 'PENDING',
-                    'song_url': f"https://open.spotify.com/track/{song_data.get('spotify_song_id', 'unknown')}"
-                })
-                results.append(song_data)
+            if len(chord_sequence) == 0:
+                parse_errors += 1
+                analyses[i] = ('Parse Error', 'parse_error', '')
                 continue
             
-            # PURE MUSIC ANALYSIS - ULTIMATE SPEED
-            
-            # Key detection
-            key, is_major, confidence, _ = music_theory.detect_key_ultimate(chord_sequence)
-            key_display = f"{key} {'Major' if is_major else 'Minor'}"
-            
-            # Roman numerals
-            romans = music_theory.generate_roman_numerals_ultimate(chord_sequence, key, is_major)
-            romans_str = ' '.join(romans)
-            
-            # HUV fingerprint
-            fingerprint = music_theory.generate_huv_fingerprint_ultimate(chord_sequence)
+            if use_vocabulary:
+                combined_profile, _, _, _ = music_theory.build_key_profile_from_ids(chord_sequence, chord_vocabulary)
+                if profiler is not None:
+                    unknown_chords += int(np.count_nonzero(~(chord_vocabulary.valid[chord_sequence] |
+                                                             chord_vocabulary.is_section[chord_sequence])))
+            else:
+                combined_profile, _, _, _ = music_theory.build_key_profile_ultimate(chord_sequence)
+            profile_ns += clock() - extracted
+            pending.append((i, chord_sequence, combined_profile))
             
-            # Update with analysis results
-            song_data.update({
-                'key': key_display,
-                'roman_numerals': romans_str,
-                'harmonic_fingerprint': fingerprint,
-                'artist_name': 'PENDING',  # Will be filled by 2012 iMac
-                'artist_url': f"https://open.spotify.com/artist/{song_data.get('spotify_artist_id', 'unknown')}",
-                'song_name': 'PENDING',   # Will be filled by 2012 iMac
-                'song_url': f"https://open.spotify.com/track/{song_data.get('spotify_song_id', 'unknown')}"
-            })
+        except Exception as e:
+            # No per-song logging - error types are counted and summarised per batch by the parent
+            if profiler is not None:
+                profiler.count(f"error:{type(e).__name__}")
+    
+    key_ns = 0
+    if pending:
+        # PURE MUSIC ANALYSIS - ULTIMATE SPEED
+        # Key detection - one matrix product for the whole batch
+        started = clock()
+        keys, major_flags, _, _ = music_theory.detect_keys_batch_ultimate(
+            np.vstack([profile for _, _, profile in pending])
+        )
+        key_ns = clock() - started
+    
+        for (i, chord_sequence, _), key, is_major in zip(pending, keys, major_flags):
+            try:
+                key = str(key)
+                is_major = bool(is_major)
+                key_display = f"{key} {'Major' if is_major else 'Minor'}"
             
-            results.append(song_data)
+                # Roman numerals + HUV fingerprint
+                started = clock()
+                if use_vocabulary:
+                    romans = music_theory.generate_roman_numerals_from_ids(chord_sequence, key, is_major, chord_vocabulary)
+                    romans_done = clock()
+                    fingerprint = music_theory.generate_huv_fingerprint_from_ids(chord_sequence, chord_vocabulary)
+                else:
+                    romans = music_theory.generate_roman_numerals_ultimate(chord_sequence, key, is_major)
+                    romans_done = clock()
+                    fingerprint = music_theory.generate_huv_fingerprint_ultimate(chord_sequence)
+                roman_ns += romans_done - started
+                huv_ns += clock() - romans_done
+                
+                analyses[i] = (key_display, ' '.join(romans), fingerprint)
             
-        except Exception:
-            # Silent error handling - log errors would slow down processing
-            song_data.update({
-                'key': 'Analysis Error',
-                'roman_numerals': 'error',
-                'harmonic_fingerprint': '',
-                'artist_name': 'PENDING',
-                'artist_url': f"https://open.spotify.com/artist/{song_data.get('spotify_artist_id', 'unknown')}",
-                'song_name': 'PENDING',
-                'song_url': f"https://open.spotify.com/track/{song_data.get('spotify_song_id', 'unknown')}"
-            })
-            results.append(song_data)
+            except Exception as e:
+                if profiler is not None:
+                    profiler.count(f"error:{type(e).__name__}")  # Stays 'Analysis Error'
     
-    return results
+    if profiler is not None:
+        profiler.add('extract', extract_ns)
+        profiler.add('key_profile', profile_ns)
+        profiler.add('key_detection', key_ns)
+        profiler.add('roman_numerals', roman_ns)
+        profiler.add('huv_fingerprint', huv_ns)
+        profiler.count('songs', count)
+        profiler.count('no_harmony', no_harmony)
+        profiler.count('parse_errors', parse_errors)
+        profiler.count('analysis_errors', sum(1 for analysis in analyses if analysis[0] == 'Analysis Error'))
+        profiler.count('unknown_chords', unknown_chords)
+    
+    return analyses
+
+def _cache_counters(music_theory: UltimatePureMusicTheoryEngine) -> Dict[str, int]:
+    """Cumulative hit/miss counters of the engine caches"""
+    return {name: value for name, value in music_theory.cache_report().items()
+            if name.endswith(('_hits', '_misses'))}
+
+def _profile_cache_delta(profiler: StageProfiler, before: Dict[str, int], music_theory: UltimatePureMusicTheoryEngine):
+    """Count this batch's cache hits/misses as cache_<name> counters"""
+    for name, value in _cache_counters(music_theory).items():
+        profiler.count(f"cache_{name}", value - before.get(name, 0))
+
+def _pack_fields(rows: List[Tuple[str, ...]], width: int) -> Tuple[np.ndarray, str]:
+    """One (N, width) length array plus one concatenated string - no per-row objects to pickle"""
+    lengths = np.array([[len(field) for field in row] for row in rows], dtype=np.int32).reshape(-1, width)
+    return lengths, ''.join(field for row in rows for field in row)
+
+def _unpack_fields(packed: Tuple[np.ndarray, str]) -> List[Tuple[str, ...]]:
+    """Inverse of _pack_fields"""
+    lengths, text = packed
+    width = lengths.shape[1]
+    bounds = np.concatenate(([0], np.cumsum(lengths.ravel()))).tolist()
+    fields = [text[bounds[j]:bounds[j + 1]] for j in range(len(bounds) - 1)]
+    return list(zip(*(fields[column::width] for column in range(width))))
+
+def tokenise_chords_wrapper(packed_chords: Tuple[np.ndarray, str]) -> Tuple[List[str], CpmlTokenBatch]:
+    """Batch-mode tokenising of one packed slice of chords strings (see _tokenise_probes)"""
+    chords = [row[0] for row in _unpack_fields(packed_chords)]
+    return CpmlTokenBatch.encode_local(chords, _WORKER_STATE['music_theory'])
+
+def process_token_range_wrapper(start: int, stop: int,
+                                token_batch: Optional[CpmlTokenBatch] = None
+                                ) -> Tuple[Tuple[np.ndarray, str], float, float, Dict[str, Any]]:
+    """Analyse songs [start, stop) of the run's token columns
+    
+    Normally only the range crosses the process boundary and the tokens are
+    read from the worker's SharedTokenBatch view; token_batch (songs
+    [start, stop) as a standalone slice) is the fallback when shared memory
+    is unavailable. Returns the packed (key, roman_numerals,
+    harmonic_fingerprint) results, compute and packing seconds for the
+    adaptive batch sizer, and the batch's StageProfiler dict.
+    """
+    
+    compute_start = time.perf_counter()
+    music_theory = _WORKER_STATE['music_theory']
+    chord_vocabulary = _WORKER_STATE['chord_vocabulary']
+    profiler = StageProfiler()
+    cache_before = _cache_counters(music_theory)
+    base = 0
+    if token_batch is None:
+        token_batch = _WORKER_STATE['shared_tokens'].batch
+        base = start
+    
+    def sequence_at(i: int):
+        return token_batch.song_tokens(base + i) if token_batch.has_harmony[base + i] else None
+    
+    analyses = _analyse_chord_sequences(stop - start, sequence_at, music_theory, chord_vocabulary, profiler)
+    _count_worker_batch(stop - start)
+    _profile_cache_delta(profiler, cache_before, music_theory)
+    pack_start = time.perf_counter()
+    packed = _pack_fields(analyses, 3)
+    pack_seconds = time.perf_counter() - pack_start
+    profiler.add('pack', int(pack_seconds * 1e9))
+    return packed, pack_start - compute_start, pack_seconds, profiler.to_dict()
+
+def process_chords_batch_wrapper(packed_chords: Tuple[np.ndarray, str]
+                                 ) -> Tuple[Tuple[np.ndarray, str], float, float, Dict[str, Any]]:
+    """Streaming counterpart of process_token_range_wrapper for a packed batch of chords strings
+    
+    The worker tokenises against its frozen vocabulary (keeping that work
+    off the parent) and returns the same packed results and timings.
+    """
+    
+    unpack_start = time.perf_counter()
+    chords = [row[0] for row in _unpack_fields(packed_chords)]
+    compute_start = time.perf_counter()
+    music_theory = _WORKER_STATE['music_theory']
+    chord_vocabulary = _WORKER_STATE['chord_vocabulary']
+    profiler = StageProfiler()
+    cache_before = _cache_counters(music_theory)
+    token_batch = CpmlTokenBatch.encode(chords, chord_vocabulary, music_theory)
+    profiler.add('tokenise', int((time.perf_counter() - compute_start) * 1e9))
+    
+    def sequence_at(i: int):
+        return token_batch.song_tokens(i) if token_batch.has_harmony[i] else None
+    
+    analyses = _analyse_chord_sequences(len(chords), sequence_at, music_theory, chord_vocabulary, profiler)
+    _count_worker_batch(len(chords))
+    _profile_cache_delta(profiler, cache_before, music_theory)
+    pack_start = time.perf_counter()
+    packed = _pack_fields(analyses, 3)
+    pack_seconds = time.perf_counter() - pack_start
+    ipc_seconds = (compute_start - unpack_start) + pack_seconds
+    profiler.add('pack', int(ipc_seconds * 1e9))
+    return packed, pack_start - compute_start, ipc_seconds, profiler.to_dict()
 
 # =====================================================================================
 # COMMAND LINE INTERFACE
@@ -1521,11 +3496,464 @@ class SpotifyConfig:
     access_token: Optional[str] = None
     token_expires: Optional[float] = None
 
+class RetryableError(Exception):
+    """A request worth retrying later: throttled (429, with Retry-After), 5xx or a timeout"""
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class RequestRejectedError(Exception):
+    """A non-retryable error answer (e.g. 400/401/403) - neither data nor "not found"
+
+    The retry scheduler counts the item as failed, so it is never marked done.
+    """
+    
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+class RetryScheduler:
+    """Bounded-concurrency job runner with non-recursive, capped retries
+    
+    A job that raises RetryableError gives back its concurrency slot and is
+    parked in a delay queue (a heap ordered by ready time): for Retry-After
+    seconds when the server sent one - new dispatches are held back until
+    then too, since the limit is shared - otherwise for a fully jittered
+    exponential backoff. Items that fail max_retries + 1 times are appended
+    to dead_letter_file as JSON lines, tagged with the run's `kind` (the
+    endpoint: track, audio_features, artist or audio_analysis).
+    """
+    
+    def __init__(self, concurrency: int = 10, max_retries: int = 5, base_delay: float = 1.0,
+                 max_delay: float = 60.0, dead_letter_file: Optional[str] = None):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.dead_letter_file = dead_letter_file
+        self.retries = 0
+        self.dead_lettered = 0
+        self.failed = 0
+        self.gave_up_ids: Set[Any] = set()  # Dead-lettered or failed items (multi-id requests expanded)
+        self._paused_until = 0.0  # Event-loop time before which nothing new is dispatched (Retry-After)
+    
+    def _delay(self, attempt: int, error: RetryableError) -> float:
+        if error.retry_after is not None:
+            return error.retry_after
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+    
+    async def run(self, items: List[Any], job, kind: str = 'track') -> Dict[Any, Any]:
+        """Run `await job(item)` for each distinct item; returns item -> result for the ones that succeeded"""
+        loop = asyncio.get_running_loop()
+        ready = deque((item, 0) for item in dict.fromkeys(items))  # (item, attempt)
+        delayed: List[Tuple[float, int, Any, int]] = []  # Heap of (ready_at, seq, item, attempt)
+        running: Dict[asyncio.Future, Tuple[Any, int]] = {}
+        sequence = itertools.count()
+        results: Dict[Any, Any] = {}
+        
+        while ready or delayed or running:
+            now = loop.time()
+            while delayed and delayed[0][0] <= now:
+                _, _, item, attempt = heapq.heappop(delayed)
+                ready.append((item, attempt))
+            if now >= self._paused_until:
+                while ready and len(running) < self.concurrency:
+                    item, attempt = ready.popleft()
+                    running[asyncio.ensure_future(job(item))] = (item, attempt)
+            
+            wake_times = ([delayed[0][0]] if delayed else []) + ([self._paused_until] if ready else [])
+            timeout = max(0.0, min(wake_times) - now) if wake_times else None
+            if not running:
+                await asyncio.sleep(timeout)
+                continue
+            
+            done, _ = await asyncio.wait(list(running), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                item, attempt = running.pop(task)
+                try:
+                    results[item] = task.result()
+                except RetryableError as e:
+                    if attempt >= self.max_retries:
+                        self._dead_letter(kind, item, attempt + 1, e)
+                        continue
+                    delay = self._delay(attempt, e)
+                    if e.retry_after is not None and loop.time() + delay > self._paused_until:
+                        logging.warning(f"Rate limited, parking requests for {delay:.0f} seconds...")
+                        self._paused_until = loop.time() + delay
+                    self.retries += 1
+                    heapq.heappush(delayed, (loop.time() + delay, next(sequence), item, attempt + 1))
+                except Exception as e:
+                    self.failed += 1
+                    self.gave_up_ids.update(item if isinstance(item, tuple) else (item,))
+                    logging.error(f"Failed to fetch {kind} {item}: {e}")
+        
+        return results
+    
+    def _dead_letter(self, kind: str, item: Any, attempts: int, error: Exception):
+        self.dead_lettered += 1
+        self.gave_up_ids.update(item if isinstance(item, tuple) else (item,))
+        logging.error(f"Giving up on {kind} {item} after {attempts} attempts: {error}")
+        if not self.dead_letter_file:
+            return
+        with open(self.dead_letter_file, 'a', encoding='utf-8') as f:
+            for item_id in (item if isinstance(item, tuple) else (item,)):  # Multi-id requests: one line per id
+                f.write(json.dumps({'kind': kind, 'id': item_id, 'attempts': attempts, 'error': str(error),
+                                    'failed_at': datetime.now().isoformat()}) + '\n')
+    
+    def stats(self) -> Dict[str, int]:
+        return {'retries': self.retries, 'dead_lettered': self.dead_lettered, 'failed': self.failed}
+
+class TokenBucketRateLimiter:
+    """Proactive token-bucket pacing for Spotify API requests
+    
+    Kept in GCRA form: the whole bucket state is one theoretical arrival
+    time (TAT). Each request reserves the slot 1/rate seconds after the
+    previous one, and up to `burst` requests may be reserved ahead of now.
+    With state_file set, the TAT lives in a small file guarded by an
+    exclusive flock, so every fetcher process on this machine shares one
+    budget.
+    """
+    
+    def __init__(self, rate: float, burst: int = 1, state_file: Optional[str] = None):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        if state_file and fcntl is None:
+            raise RuntimeError("A shared rate limit file needs fcntl (macOS/Linux)")
+        self.interval = 1.0 / rate
+        self.tolerance = (max(burst, 1) - 1) * self.interval
+        self.state_file = state_file
+        self._tat = 0.0
+    
+    def _advance(self, tat: float, now: float) -> Tuple[float, float]:
+        """(new TAT, seconds to wait) for one request at `now`"""
+        tat = max(tat, now)
+        return tat + self.interval, max(0.0, tat - self.tolerance - now)
+    
+    def reserve(self) -> float:
+        """Reserve the next request slot; returns how long to wait before sending"""
+        now = time.time()  # Wall clock - the state file is shared between processes
+        if not self.state_file:
+            self._tat, wait = self._advance(self._tat, now)
+            return wait
+        
+        fd = os.open(self.state_file, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            # Blocking flock on the event loop thread: fine only because every
+            # holder keeps it for one tiny read-modify-write, never across I/O
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                tat = float(os.read(fd, 64) or 0.0)
+            except ValueError:
+                tat = 0.0  # Torn or foreign content - start over
+            tat, wait = self._advance(tat, now)
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, repr(tat).encode())
+        finally:
+            os.close(fd)  # Releases the lock
+        return wait
+    
+    async def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+class RateLimitCoordinator:
+    """Local-network token bucket shared by fetchers on several machines
+    
+    Line protocol over TCP: a client sends b"acquire\n" and gets back the
+    seconds it must wait. Waits are computed on the coordinator's clock, so
+    machine clock skew does not matter.
+    """
+    
+    DEFAULT_PORT = 8765
+    
+    def __init__(self, rate: float, burst: int = 1, host: str = '0.0.0.0', port: int = DEFAULT_PORT):
+        self.bucket = TokenBucketRateLimiter(rate, burst)
+        self.host = host
+        self.port = port
+        self.requests = 0
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while (await reader.readline()).strip() == b'acquire':
+                self.requests += 1
+                writer.write(f"{self.bucket.reserve():.6f}\n".encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass  # Client went away or the coordinator is shutting down
+        finally:
+            writer.close()
+    
+    async def serve_forever(self):
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        logging.info(f"Rate limit coordinator listening on {self.host}:{self.port}")
+        async with server:
+            await server.serve_forever()
+
+class RemoteRateLimiter:
+    """Client of a RateLimitCoordinator, with a local bucket to fall back on
+    
+    Anything with an async acquire() can stand in for it (e.g. a stub in
+    tests). Connecting and each round trip give up after `timeout`
+    seconds. When the coordinator is unreachable, requests are paced by
+    `fallback` instead of failing, and it is not tried again for
+    `reconnect_backoff` seconds - one warning per outage, not per request.
+    """
+    
+    DEFAULT_TIMEOUT = 2.0
+    DEFAULT_RECONNECT_BACKOFF = 30.0
+    
+    def __init__(self, host: str, port: int = RateLimitCoordinator.DEFAULT_PORT,
+                 fallback: Optional[TokenBucketRateLimiter] = None, timeout: float = DEFAULT_TIMEOUT,
+                 reconnect_backoff: float = DEFAULT_RECONNECT_BACKOFF):
+        self.host = host
+        self.port = port
+        self.fallback = fallback
+        self.timeout = timeout
+        self.reconnect_backoff = reconnect_backoff
+        self._connection: Optional[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = None
+        self._lock = asyncio.Lock()
+        self._retry_at = 0.0  # Monotonic time before which the fallback is used without asking
+    
+    def _in_backoff(self) -> bool:
+        return time.monotonic() < self._retry_at
+    
+    async def _ask(self) -> Optional[float]:
+        """Seconds to wait, from the coordinator; None if it failed while this call queued for the lock"""
+        async with self._lock:  # One request/response pair on the connection at a time
+            if self._in_backoff():
+                return None
+            if self._connection is None:
+                self._connection = await asyncio.wait_for(asyncio.open_connection(self.host, self.port),
+                                                          self.timeout)
+            reader, writer = self._connection
+            try:
+                writer.write(b"acquire\n")
+                await asyncio.wait_for(writer.drain(), self.timeout)
+                return float(await asyncio.wait_for(reader.readline(), self.timeout))
+            except BaseException:
+                writer.close()
+                self._connection = None
+                raise
+    
+    async def acquire(self):
+        wait = None
+        if not self._in_backoff():
+            try:
+                wait = await self._ask()
+            except (OSError, ValueError, asyncio.TimeoutError) as e:
+                if self.fallback is None:
+                    raise
+                self._retry_at = time.monotonic() + self.reconnect_backoff
+                logging.warning(f"Rate limit coordinator {self.host}:{self.port} unavailable "
+                                f"({type(e).__name__}: {e}) - pacing locally for {self.reconnect_backoff:.0f}s")
+        if wait is None:  # Only reachable with a fallback: backoff is never entered without one
+            wait = self.fallback.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+def build_rate_limiter(rate: Optional[float], burst: int = 1, state_file: Optional[str] = None,
+                       coordinator: Optional[str] = None):
+    """Rate limiter from CLI options: coordinator "host[:port]", else local (optionally file-shared), else None"""
+    if coordinator:
+        host, _, port = coordinator.partition(':')
+        fallback = TokenBucketRateLimiter(rate, burst, state_file) if rate else None
+        return RemoteRateLimiter(host, int(port or RateLimitCoordinator.DEFAULT_PORT), fallback)
+    if rate:
+        return TokenBucketRateLimiter(rate, burst, state_file)
+    return None
+
+class ArtistCache:
+    """Spotify artist cache: in-memory LRU in front of an on-disk SQLite table
+    
+    Keyed by artist id. Entries older than the TTL count as misses and get
+    refetched. Only the artist fields _extract_metadata reads are kept.
+    path=None keeps the cache in memory only.
+    """
+    
+    DEFAULT_PATH = 'spotify_artist_cache.sqlite'
+    DEFAULT_TTL_DAYS = 30.0
+    FIELDS = ('name', 'genres', 'popularity', 'followers', 'external_urls')
+    
+    def __init__(self, path: Optional[str] = DEFAULT_PATH, ttl_days: float = DEFAULT_TTL_DAYS,
+                 max_entries: int = 50000):
+        self.ttl_seconds = ttl_days * 86400
+        self.max_entries = max_entries
+        self._memory: 'OrderedDict[str, Tuple[float, Dict]]' = OrderedDict()  # artist_id -> (fetched_at, artist)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path)
+            self._db.execute('CREATE TABLE IF NOT EXISTS artists '
+                             '(artist_id TEXT PRIMARY KEY, fetched_at REAL NOT NULL, data TEXT NOT NULL)')
+            self._db.commit()
+    
+    def get(self, artist_id: str) -> Optional[Dict]:
+        return self.get_many([artist_id]).get(artist_id)
+    
+    def get_many(self, artist_ids: List[str]) -> Dict[str, Dict]:
+        """Fresh cached artists among artist_ids (memory first, then disk)"""
+        artist_ids = list(dict.fromkeys(artist_ids))
+        now = time.time()
+        found: Dict[str, Dict] = {}
+        missing = []
+        for artist_id in artist_ids:
+            entry = self._memory.get(artist_id)
+            if entry is not None and now - entry[0] < self.ttl_seconds:
+                self._memory.move_to_end(artist_id)
+                found[artist_id] = entry[1]
+                self.memory_hits += 1
+            else:
+                missing.append(artist_id)
+        
+        if missing and self._db is not None:
+            for i in range(0, len(missing), 500):  # Stay under SQLite's host parameter limit
+                chunk = missing[i:i + 500]
+                rows = self._db.execute(f"SELECT artist_id, fetched_at, data FROM artists "
+                                        f"WHERE artist_id IN ({','.join('?' * len(chunk))})", chunk)
+                for artist_id, fetched_at, data in rows:
+                    if now - fetched_at < self.ttl_seconds:
+                        found[artist_id] = json.loads(data)
+                        self._remember(artist_id, fetched_at, found[artist_id])
+                        self.disk_hits += 1
+        
+        self.misses += len(artist_ids) - len(found)
+        return found
+    
+    def put(self, artist_id: str, artist: Dict):
+        self.put_many({artist_id: artist})
+    
+    def put_many(self, artists: Dict[str, Dict]):
+        """Store freshly fetched artists in memory and on disk"""
+        now = time.time()
+        rows = []
+        for artist_id, artist in artists.items():
+            slim = {field: artist[field] for field in self.FIELDS if field in artist}
+            self._remember(artist_id, now, slim)
+            rows.append((artist_id, now, json.dumps(slim)))
+        if rows and self._db is not None:
+            self._db.executemany('INSERT OR REPLACE INTO artists VALUES (?, ?, ?)', rows)
+            self._db.commit()
+    
+    def _remember(self, artist_id: str, fetched_at: float, artist: Dict):
+        self._memory[artist_id] = (fetched_at, artist)
+        self._memory.move_to_end(artist_id)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            'lookups': lookups,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (lookups - self.misses) / lookups if lookups else 0.0
+        }
+    
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+class SpotifyResultLog:
+    """Append-only, resumable Spotify fetch results
+    
+    <output>.parts/results.jsonl gets one _extract_metadata row per fetched
+    track and done_ids.txt is the cursor of finished ids. After every
+    chunk both are flushed and fsync'd, results first, so a crash loses at
+    most the chunk in flight. Resuming reads only the cursor (a torn tail
+    line is dropped); ids that were dead-lettered or failed are never
+    marked done and get fetched again. assemble() writes the final CSV from
+    the results log, keeping the last row per track.
+    """
+    
+    RESULTS = 'results.jsonl'
+    DONE_IDS = 'done_ids.txt'
+    
+    def __init__(self, output_file: str):
+        self.output_file = output_file
+        self.directory = Path(f"{output_file}.parts")
+        self._results = None
+        self._done = None
+        self.resumed_ids = 0
+    
+    def open(self, resume: bool = False) -> Set[str]:
+        """Open the log for appending; returns the ids finished by earlier runs (empty unless resume)"""
+        if not resume and self.directory.exists():
+            shutil.rmtree(self.directory)  # A fresh run never mixes with a stale log
+        self.directory.mkdir(parents=True, exist_ok=True)
+        
+        done: Set[str] = set()
+        for name in (self.RESULTS, self.DONE_IDS):
+            self._drop_torn_tail(self.directory / name)
+        with open(self.directory / self.DONE_IDS, 'r', encoding='utf-8') as f:
+            done.update(line.rstrip('\n') for line in f)
+        self.resumed_ids = len(done)
+        
+        self._results = open(self.directory / self.RESULTS, 'a', encoding='utf-8')
+        self._done = open(self.directory / self.DONE_IDS, 'a', encoding='utf-8')
+        return done
+    
+    @staticmethod
+    def _drop_torn_tail(path: Path):
+        """Truncate a file to its last complete line (creating it if missing)"""
+        with open(path, 'ab+') as f:
+            size = f.tell()
+            tail = 4096
+            while True:
+                f.seek(max(0, size - tail))
+                cut = f.read().rfind(b'\n')
+                if cut >= 0 or tail >= size:
+                    break
+                tail *= 2
+            keep = max(0, size - tail) + cut + 1 if cut >= 0 else 0
+            if keep < size:
+                f.truncate(keep)
+    
+    def append(self, results: List[Dict], done_ids: List[str]):
+        """Durably add one chunk: its result rows, then the ids it finished"""
+        for row in results:
+            self._results.write(json.dumps(row) + '\n')
+        self._results.flush()
+        os.fsync(self._results.fileno())
+        
+        self._done.write(''.join(f"{spotify_id}\n" for spotify_id in done_ids))
+        self._done.flush()
+        os.fsync(self._done.fileno())
+    
+    def assemble(self) -> int:
+        """Write the final CSV from the results log and remove the log; returns the row count"""
+        self._results.close()
+        self._done.close()
+        rows: Dict[str, Dict] = {}  # Last row per track - a chunk re-fetched after a crash may repeat some
+        with open(self.directory / self.RESULTS, 'r', encoding='utf-8') as f:
+            for line in f:
+                row = json.loads(line)
+                rows[row.get('spotify_song_id', '')] = row
+        pd.DataFrame(list(rows.values())).to_csv(self.output_file, index=False)
+        shutil.rmtree(self.directory)
+        return len(rows)
+
 class SpotifyMetadataFetcher:
     """Comprehensive Spotify metadata fetcher for data3.5"""
     
-    def __init__(self, config: SpotifyConfig):
+    # Max ids per request of the multi-id endpoints used by fetch_spotify_data_batch
+    TRACKS_BATCH_SIZE = 50
+    FEATURES_BATCH_SIZE = 100
+    ARTISTS_BATCH_SIZE = 50
+    BATCH_CHUNK_SIZE = 500  # Tracks per fetch_spotify_data_batch call in batch mode
+    
+    def __init__(self, config: SpotifyConfig, artist_cache: Optional[ArtistCache] = None, rate_limiter: Any = None,
+                 retry_scheduler: Optional[RetryScheduler] = None):
         self.config = config
+        self.retry_scheduler = retry_scheduler or RetryScheduler()
+        self.artist_cache = artist_cache
+        self.rate_limiter = rate_limiter  # Anything with an async acquire(), e.g. TokenBucketRateLimiter
         self.session = None
         self.rate_limit_remaining = 1000
         self.rate_limit_reset = 0
@@ -1541,6 +3969,11 @@ class SpotifyMetadataFetcher:
         if self.session:
             await self.session.close()
     
+    async def _pace(self):
+        """Wait for a request slot from the rate limiter, if any"""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+    
     @backoff.on_exception(backoff.expo, aiohttp.ClientError, max_tries=5)
     async def get_access_token(self) -> str:
         """Get Spotify access token"""
@@ -1567,55 +4000,168 @@ class SpotifyMetadataFetcher:
             
             return self.config.access_token
     
-    @backoff.on_exception(backoff.expo, aiohttp.ClientError, max_tries=3)
-    async def fetch_spotify_data(self, spotify_id: str) -> Dict:
-        """Fetch comprehensive Spotify metadata for a track"""
+    async def _get_json(self, url: str, params: Optional[Dict] = None, what: str = '',
+                        not_found_ok: bool = True) -> Optional[Dict]:
+        """GET one API url: the JSON body on 200, None on 404 when not_found_ok
+        
+        429s, 5xx responses, timeouts and connection errors raise
+        RetryableError for the retry scheduler instead of being retried here.
+        Any other status raises RequestRejectedError - only a 200 (or an
+        allowed 404) is an answer. `what` names the request in the error.
+        """
         token = await self.get_access_token()
-        headers = {'Authorization': f'Bearer {token}'}
+        await self._pace()
+        try:
+            async with self.session.get(url, headers={'Authorization': f'Bearer {token}'}, params=params) as response:
+                if response.status == 429:
+                    raise RetryableError(f"429 rate limited: {url}", float(response.headers.get('Retry-After', 60)))
+                if response.status >= 500:
+                    raise RetryableError(f"{response.status} server error: {url}")
+                if response.status == 404 and not_found_ok:  # Not found is normal for some ids
+                    return None
+                if response.status != 200:
+                    raise RequestRejectedError(f"{what or url} failed: {response.status}", response.status)
+                return await response.json()
+        except (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError) as e:
+            raise RetryableError(f"{type(e).__name__}: {url}") from e
+    
+    async def fetch_spotify_data(self, spotify_id: str) -> Dict:
+        """Fetch comprehensive Spotify metadata for a track
         
+        Throttling and server errors raise RetryableError; run it through
+        the retry scheduler (fetch_spotify_data_many) to have them retried.
+        Any other failed request - the track's or its audio features, artist
+        or analysis - raises RequestRejectedError rather than leaving blanks.
+        """
         # Fetch track data
-        track_url = f"https://api.spotify.com/v1/tracks/{spotify_id}"
-        async with self.session.get(track_url, headers=headers) as response:
-            if response.status == 429:
-                retry_after = int(response.headers.get('Retry-After', 60))
-                logging.warning(f"Rate limited, waiting {retry_after} seconds...")
-                await asyncio.sleep(retry_after)
-                return await self.fetch_spotify_data(spotify_id)
-            
-            if response.status != 200:
-                if response.status == 404:
-                    # Track not found - this is normal for some IDs
-                    return {}
-                elif response.status == 429:
-                    # Rate limited - handled above
-                    return {}
-                else:
-                    logging.error(f"Track fetch failed for {spotify_id}: {response.status}")
-                    return {}
-            
-            track_data = await response.json()
+        track_data = await self._get_json(f"https://api.spotify.com/v1/tracks/{spotify_id}",
+                                          what=f"Track fetch for {spotify_id}")
+        if track_data is None:
+            return {}
         
         # Fetch audio features
-        features_url = f"https://api.spotify.com/v1/audio-features/{spotify_id}"
-        async with self.session.get(features_url, headers=headers) as response:
-            features_data = await response.json() if response.status == 200 else {}
+        features_data = await self._get_json(f"https://api.spotify.com/v1/audio-features/{spotify_id}") or {}
         
         # Fetch artist data
-        artist_id = track_data.get('artists', [{}])[0].get('id')
-        artist_data = {}
-        if artist_id:
-            artist_url = f"https://api.spotify.com/v1/artists/{artist_id}"
-            async with self.session.get(artist_url, headers=headers) as response:
-                artist_data = await response.json() if response.status == 200 else {}
+        artist_id = (track_data.get('artists') or [{}])[0].get('id')
+        artist_data = await self._fetch_artist(artist_id) if artist_id else {}
         
         # Fetch light audio analysis (track section only)
-        analysis_url = f"https://api.spotify.com/v1/audio-analysis/{spotify_id}"
-        async with self.session.get(analysis_url, headers=headers) as response:
-            analysis_data = await response.json() if response.status == 200 else {}
+        analysis_data = await self.fetch_audio_analysis(spotify_id)
         
         # Extract and structure the data
         return self._extract_metadata(track_data, features_data, artist_data, analysis_data)
     
+    async def fetch_spotify_data_many(self, spotify_ids: List[str]) -> List[Dict]:
+        """fetch_spotify_data for many tracks under the retry scheduler, in input order ({} when not fetched)"""
+        results = await self.retry_scheduler.run(spotify_ids, self.fetch_spotify_data)
+        return [results.get(spotify_id) or {} for spotify_id in spotify_ids]
+    
+    async def _fetch_artist(self, artist_id: str) -> Dict:
+        """One artist, from the artist cache when it has a fresh entry"""
+        if self.artist_cache is not None:
+            cached = self.artist_cache.get(artist_id)
+            if cached is not None:
+                return cached
+        
+        artist_data = await self._get_json(f"https://api.spotify.com/v1/artists/{artist_id}") or {}
+        if artist_data and self.artist_cache is not None:
+            self.artist_cache.put(artist_id, artist_data)
+        return artist_data
+    
+    async def _get_batch(self, url: str, ids: Tuple[str, ...], field: str) -> List[Optional[Dict]]:
+        """One multi-id request: the response's `field` list aligned with ids (None = not found)"""
+        data = await self._get_json(url, {'ids': ','.join(ids)}, what=f"Batch fetch of {len(ids)} ids from {url}",
+                                    not_found_ok=False)
+        items = data.get(field) or []
+        return items + [None] * (len(ids) - len(items))
+    
+    async def _fetch_many(self, url: str, ids: List[str], field: str, batch_size: int,
+                          kind: str) -> Tuple[Dict[str, Dict], Set[str]]:
+        """id -> object for every id found, plus the ids whose request was given up on
+        
+        batch_size ids per request, requests run by the retry scheduler.
+        """
+        async def fetch_chunk(chunk: Tuple[str, ...]) -> Optional[List[Optional[Dict]]]:
+            try:
+                return await self._get_batch(url, chunk, field)
+            except RequestRejectedError:
+                if len(chunk) == 1:
+                    raise
+                return None  # Rejected as a whole (one malformed id is enough) - split below
+        
+        chunks = [tuple(ids[i:i + batch_size]) for i in range(0, len(ids), batch_size)]
+        responses = await self.retry_scheduler.run(chunks, fetch_chunk, kind)
+        singles = [(item_id,) for chunk, items in responses.items() if items is None for item_id in chunk]
+        if singles:
+            logging.warning(f"{kind} request rejected - retrying its {len(singles)} ids one at a time")
+            responses.update(await self.retry_scheduler.run(singles, fetch_chunk, kind))
+        
+        found = {}
+        for chunk, items in responses.items():
+            for item_id, item in zip(chunk, items or []):
+                if item:
+                    found[item_id] = item
+        gave_up = {item_id for chunk in chunks + singles if chunk not in responses for item_id in chunk}
+        return found, gave_up
+    
+    async def fetch_audio_analysis(self, spotify_id: str) -> Dict:
+        """Light audio analysis for one track (there is no multi-id endpoint for it)"""
+        return await self._get_json(f"https://api.spotify.com/v1/audio-analysis/{spotify_id}") or {}
+    
+    async def fetch_spotify_data_batch(self, spotify_ids: List[str],
+                                       include_analysis: bool = True) -> Tuple[List[Dict], Set[str]]:
+        """Batch-endpoint version of fetch_spotify_data for many tracks
+        
+        Tracks, audio features and artists come from the multi-id endpoints
+        (50 / 100 / 50 ids per request), and an artist shared by several
+        tracks is requested once - and not at all when the artist cache has
+        it. Audio analysis stays per track (run concurrently by the retry
+        scheduler) or is skipped with include_analysis=False, leaving its
+        columns 0.
+        
+        Returns one _extract_metadata dict per input id, in input order, with
+        {} for tracks that were not found, and the set of track ids that came
+        back incomplete: the track itself, or its audio features, artist or
+        analysis request, was given up on. Their rows (if any) carry blanks
+        for the missing parts, so callers should leave them unfinished.
+        """
+        unique_ids = list(dict.fromkeys(spotify_ids))
+        tracks, incomplete = await self._fetch_many("https://api.spotify.com/v1/tracks", unique_ids,
+                                                    'tracks', self.TRACKS_BATCH_SIZE, 'track')
+        found_ids = [spotify_id for spotify_id in unique_ids if spotify_id in tracks]
+        
+        features, features_gave_up = await self._fetch_many("https://api.spotify.com/v1/audio-features", found_ids,
+                                                            'audio_features', self.FEATURES_BATCH_SIZE,
+                                                            'audio_features')
+        incomplete |= features_gave_up
+        
+        # Dedupe artists across the tracks before requesting them
+        track_artists = {spotify_id: (tracks[spotify_id].get('artists') or [{}])[0].get('id')
+                         for spotify_id in found_ids}
+        artist_ids = list(dict.fromkeys(artist_id for artist_id in track_artists.values() if artist_id))
+        artists = self.artist_cache.get_many(artist_ids) if self.artist_cache is not None else {}
+        fetched_artists, artists_gave_up = await self._fetch_many(
+            "https://api.spotify.com/v1/artists", [artist_id for artist_id in artist_ids if artist_id not in artists],
+            'artists', self.ARTISTS_BATCH_SIZE, 'artist')
+        if self.artist_cache is not None:
+            self.artist_cache.put_many(fetched_artists)
+        artists.update(fetched_artists)
+        incomplete.update(spotify_id for spotify_id in found_ids if track_artists[spotify_id] in artists_gave_up)
+        
+        analyses = {}
+        if include_analysis:
+            analyses = await self.retry_scheduler.run(found_ids, self.fetch_audio_analysis, 'audio_analysis')
+            incomplete.update(spotify_id for spotify_id in found_ids if spotify_id not in analyses)
+        
+        metadata = {
+            spotify_id: self._extract_metadata(tracks[spotify_id], features.get(spotify_id, {}),
+                                               artists.get(track_artists[spotify_id], {}),
+                                               analyses.get(spotify_id, {}))
+            for spotify_id in found_ids
+        }
+        return [metadata.get(spotify_id, {}) for spotify_id in spotify_ids], incomplete
+    
     def _extract_metadata(self, track_data: Dict, features_data: Dict, 
                          artist_data: Dict, analysis_data: Dict) -> Dict:
         """Extract and structure metadata according to data3.5 specification"""
@@ -1671,29 +4217,89 @@ class SpotifyMetadataFetcher:
         }
         
         return metadata
+    
+    async def fetch_into_log(self, spotify_ids: List[str], result_log: SpotifyResultLog, batch: bool = False,
+                             progress: Optional[Progress] = None, task_id: Any = None) -> None:
+        """Fetch spotify_ids chunk by chunk into result_log, advancing progress per chunk
+        
+        Per-track requests, or the multi-id endpoints with batch=True. Each
+        chunk is durable once appended; ids given up on - or whose rows came
+        back incomplete - are not marked done, so a resumed run refetches them.
+        """
+        chunk_size = self.BATCH_CHUNK_SIZE if batch else 50
+        for i in range(0, len(spotify_ids), chunk_size):
+            chunk = spotify_ids[i:i + chunk_size]
+            if batch:
+                # Multi-id endpoints, artists deduped across the chunk
+                try:
+                    results, incomplete = await self.fetch_spotify_data_batch(chunk)
+                    self.retry_scheduler.gave_up_ids.update(incomplete)  # Partial rows are kept but not marked done
+                except Exception as e:
+                    logging.error(f"Failed to fetch batch of {len(chunk)} tracks: {e}")
+                    self.retry_scheduler.gave_up_ids.update(chunk)
+                    results = []
+            else:
+                # Per-track requests - concurrency, retries and dead-lettering by the retry scheduler
+                results = await self.fetch_spotify_data_many(chunk)
+            if progress is not None:
+                progress.advance(task_id, len(chunk))
+            result_log.append([data for data in results if data.get('spotify_song_id')],
+                              [spotify_id for spotify_id in chunk if spotify_id not in self.retry_scheduler.gave_up_ids])
+
+def _open_spotify_result_log(console: Console, spotify_output: str, spotify_ids: List[str],
+                             resume: bool) -> Tuple[List[str], SpotifyResultLog]:
+    """Open the append-only result log; on resume, drop the ids it already finished"""
+    result_log = SpotifyResultLog(spotify_output)
+    done_ids = result_log.open(resume=resume)
+    if done_ids:
+        remaining = [spotify_id for spotify_id in spotify_ids if spotify_id not in done_ids]
+        console.print(f"♻️  Resuming: {len(spotify_ids) - len(remaining):,} tracks already done, {len(remaining):,} to go")
+        spotify_ids = remaining
+    return spotify_ids, result_log
 
-async def launch_spotify_metadata_fetching(machine_specs: MachineSpecs, spotify_config: SpotifyConfig):
+def _print_fetcher_summary(console: Console, fetcher: SpotifyMetadataFetcher):
+    """Retry and artist cache lines for the end-of-run summary"""
+    retry_stats = fetcher.retry_scheduler.stats()
+    console.print(f"🔁 Retries: {retry_stats['retries']:,} | dead-lettered: {retry_stats['dead_lettered']:,} "
+                  f"({fetcher.retry_scheduler.dead_letter_file}) | failed: {retry_stats['failed']:,}")
+    if fetcher.artist_cache is None:
+        return
+    cache_stats = fetcher.artist_cache.stats()
+    console.print(f"🎤 Artist cache hit rate: {cache_stats['hit_rate']*100:.1f}% "
+                  f"({cache_stats['lookups'] - cache_stats['misses']:,}/{cache_stats['lookups']:,} lookups)")
+
+async def launch_spotify_metadata_fetching(machine_specs: MachineSpecs, spotify_config: SpotifyConfig,
+                                           batch: bool = False, artist_cache: Optional[ArtistCache] = None,
+                                           rate_limiter: Any = None, max_retries: int = 5,
+                                           resume: bool = False):
     """Launch Spotify metadata fetching for the current machine"""
     
     console = Console()
     console.print(f"🎵 Launching Spotify metadata fetching for {machine_specs.model_name}")
     
-    # Load the data3 file for this machine
-    data3_file = f"data3_{machine_specs.output_suffix}_chordonomicon_v2.csv"
+    # Load the data3 file for this machine - written as CSV or, with --format parquet, Parquet
+    data3_base = f"data3_{machine_specs.output_suffix}_chordonomicon_v2"
     spotify_output = f"data3.5_spotify_extras_{machine_specs.output_suffix}.csv"
     
-    if not os.path.exists(data3_file):
-        console.print(f"❌ Data3 file not found: {data3_file}")
+    data3_files = [f"{data3_base}.{ext}" for ext in ('parquet', 'csv') if os.path.exists(f"{data3_base}.{ext}")]
+    if not data3_files:
+        console.print(f"❌ Data3 file not found: {data3_base}.csv / .parquet")
         return False
+    data3_file = max(data3_files, key=os.path.getmtime)  # Both present: the latest run's output
     
     # Load data and get Spotify IDs
-    df = pd.read_csv(data3_file)
-    spotify_ids = df['spotify_song_id'].dropna().unique().tolist()
+    if data3_file.endswith('.parquet'):
+        df = pd.read_parquet(data3_file, columns=['spotify_song_id'])
+    else:
+        df = pd.read_csv(data3_file, usecols=['spotify_song_id'], dtype={'spotify_song_id': str})
+    spotify_ids = df['spotify_song_id'].replace('', np.nan).dropna().unique().tolist()  # Parquet keeps '' ids
     
     console.print(f"📊 Processing {len(spotify_ids)} unique Spotify tracks")
+    spotify_ids, result_log = _open_spotify_result_log(console, spotify_output, spotify_ids, resume)
     
     # Initialize fetcher
-    async with SpotifyMetadataFetcher(spotify_config) as fetcher:
+    retry_scheduler = RetryScheduler(max_retries=max_retries, dead_letter_file=f"{spotify_output}.dead_letter.jsonl")
+    async with SpotifyMetadataFetcher(spotify_config, artist_cache, rate_limiter, retry_scheduler) as fetcher:
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -1704,41 +4310,20 @@ async def launch_spotify_metadata_fetching(machine_specs: MachineSpecs, spotify_
         ) as progress:
             
             task = progress.add_task("Fetching Spotify metadata...", total=len(spotify_ids))
-            
-            # Process in chunks
-            chunk_size = 50
-            all_results = []
-            
-            for i in range(0, len(spotify_ids), chunk_size):
-                chunk = spotify_ids[i:i+chunk_size]
-                
-                # Process chunk
-                for spotify_id in chunk:
-                    try:
-                        data = await fetcher.fetch_spotify_data(spotify_id)
-                        progress.advance(1)
-                        if data and data.get('spotify_song_id'):  # Only add if we got valid data
-                            all_results.append(data)
-                    except Exception as e:
-                        console.print(f"⚠️ Failed to fetch {spotify_id}: {e}")
-                        progress.advance(1)
-                        continue  # Continue with next track
-                
-                # Save progress every 1000 tracks
-                if len(all_results) % 1000 == 0:
-                    temp_df = pd.DataFrame(all_results)
-                    temp_df.to_csv(f"{spotify_output}.temp", index=False)
-                    console.print(f"💾 Progress saved: {len(all_results)} tracks processed")
+            await fetcher.fetch_into_log(spotify_ids, result_log, batch, progress, task)
     
     # Save final results
     console.print("💾 Saving final results...")
-    final_df = pd.DataFrame(all_results)
-    final_df.to_csv(spotify_output, index=False)
+    total_results = result_log.assemble()
     
-    console.print(f"✅ Spotify metadata complete: {len(all_results)} tracks")
+    console.print(f"✅ Spotify metadata complete: {total_results} tracks")
+    _print_fetcher_summary(console, fetcher)
     return True
 
-async def launch_spotify_metadata_fetching_full_dataset(machine_specs: MachineSpecs, spotify_config: SpotifyConfig):
+async def launch_spotify_metadata_fetching_full_dataset(machine_specs: MachineSpecs, spotify_config: SpotifyConfig,
+                                                        batch: bool = False, artist_cache: Optional[ArtistCache] = None,
+                                                        rate_limiter: Any = None, max_retries: int = 5,
+                                                        resume: bool = False):
     """Launch Spotify metadata fetching for the ENTIRE dataset on iMac"""
     
     console = Console()
@@ -1757,9 +4342,11 @@ async def launch_spotify_metadata_fetching_full_dataset(machine_specs: MachineSp
     spotify_ids = df['spotify_song_id'].dropna().unique().tolist()
     
     console.print(f"📊 Processing ENTIRE dataset: {len(spotify_ids)} unique Spotify tracks")
+    spotify_ids, result_log = _open_spotify_result_log(console, spotify_output, spotify_ids, resume)
     
     # Initialize fetcher
-    async with SpotifyMetadataFetcher(spotify_config) as fetcher:
+    retry_scheduler = RetryScheduler(max_retries=max_retries, dead_letter_file=f"{spotify_output}.dead_letter.jsonl")
+    async with SpotifyMetadataFetcher(spotify_config, artist_cache, rate_limiter, retry_scheduler) as fetcher:
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -1770,38 +4357,14 @@ async def launch_spotify_metadata_fetching_full_dataset(machine_specs: MachineSp
         ) as progress:
             
             task = progress.add_task("Fetching Spotify metadata for ENTIRE dataset...", total=len(spotify_ids))
-            
-            # Process in chunks
-            chunk_size = 50
-            all_results = []
-            
-            for i in range(0, len(spotify_ids), chunk_size):
-                chunk = spotify_ids[i:i+chunk_size]
-                
-                # Process chunk
-                for spotify_id in chunk:
-                    try:
-                        data = await fetcher.fetch_spotify_data(spotify_id)
-                        progress.advance(1)
-                        if data and data.get('spotify_song_id'):  # Only add if we got valid data
-                            all_results.append(data)
-                    except Exception as e:
-                        console.print(f"⚠️ Failed to fetch {spotify_id}: {e}")
-                        progress.advance(1)
-                        continue  # Continue with next track
-                
-                # Save progress every 1000 tracks
-                if len(all_results) % 1000 == 0:
-                    temp_df = pd.DataFrame(all_results)
-                    temp_df.to_csv(f"{spotify_output}.temp", index=False)
-                    console.print(f"💾 Progress saved: {len(all_results)} tracks processed")
+            await fetcher.fetch_into_log(spotify_ids, result_log, batch, progress, task)
     
     # Save final results
     console.print("💾 Saving final results...")
-    final_df = pd.DataFrame(all_results)
-    final_df.to_csv(spotify_output, index=False)
+    total_results = result_log.assemble()
     
-    console.print(f"✅ Spotify metadata complete for ENTIRE dataset: {len(all_results)} tracks")
+    console.print(f"✅ Spotify metadata complete for ENTIRE dataset: {total_results} tracks")
+    _print_fetcher_summary(console, fetcher)
     return True
 
 def create_unified_cli() -> argparse.ArgumentParser:
@@ -1814,11 +4377,59 @@ def create_unified_cli() -> argparse.ArgumentParser:
     parser.add_argument('--force', action='store_true', help='Overwrite existing output file')
     parser.add_argument('--cpu-target', type=float, default=90.0, help='Target CPU utilization (default: 90.0)')
     parser.add_argument('--verbose', action='store_true', help='Verbose logging')
+    parser.add_argument('--stream', action='store_true',
+                        help='Bounded-memory streaming mode: chunked reads, bounded in-flight batches, incremental writes')
+    parser.add_argument('--stream-chunk-rows', type=int,
+                        help='Rows per streamed read chunk (default: machine chunk size)')
+    parser.add_argument('--max-in-flight', type=int,
+                        help='Max batches queued in the worker pool in streaming mode (default: 2x workers)')
+    parser.add_argument('--reorder-window', type=int,
+                        help='Max batches buffered ahead of the oldest unwritten one in streaming mode (default: 2x max-in-flight)')
+    parser.add_argument('--checkpoint', action='store_true',
+                        help='Commit finished row ranges to <output>.checkpoint/ so the run can be resumed (implies --stream)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Resume an interrupted --checkpoint run, skipping its committed row ranges')
+    parser.add_argument('--cache-budget-mb', type=float,
+                        help=f'Memory budget for each worker\'s key/roman/HUV caches in MB '
+                             f'(default: {UltimatePureMusicTheoryEngine.DEFAULT_CACHE_BUDGET_MB:.0f}, 0 disables)')
+    parser.add_argument('--format', dest='output_format', choices=['csv', 'parquet'], default='csv',
+                        help='data3 output format: csv, or typed row-group Parquet (requires pyarrow)')
+    parser.add_argument('--target-batch-ms', type=float,
+                        help=f'Per-batch latency the adaptive batch sizer aims for '
+                             f'(default: {AdaptiveBatchSizer.DEFAULT_TARGET_SECONDS * 1000:.0f})')
+    parser.add_argument('--calibrate', action='store_true',
+                        help='Benchmark 1..N workers on a slice of the input, save the best count for this host and exit')
+    parser.add_argument('--calibration-rows', type=int, default=5000,
+                        help='Input rows benchmarked per worker count by --calibrate (default: 5000)')
+    parser.add_argument('--worker-profile',
+                        help=f'Calibrated worker profile JSON (default: {WorkerProfile.DEFAULT_PATH})')
+    parser.add_argument('--no-shared-input', action='store_true',
+                        help='Pickle token columns to workers per batch instead of sharing them through shared memory')
+    parser.add_argument('--huv-bitmask', action='store_true',
+                        help='Also write harmonic_fingerprint_bits: base64 uint32 bitmask form of the TRUE HUV fingerprint')
     
     # Spotify metadata options
     parser.add_argument('--spotify', action='store_true', help='Enable Spotify metadata fetching')
     parser.add_argument('--client-id', help='Spotify Client ID')
     parser.add_argument('--client-secret', help='Spotify Client Secret')
+    parser.add_argument('--spotify-batch', action='store_true',
+                        help='Fetch Spotify metadata through the multi-id tracks/audio-features/artists endpoints')
+    parser.add_argument('--artist-cache', default=ArtistCache.DEFAULT_PATH,
+                        help=f'On-disk Spotify artist cache (default: {ArtistCache.DEFAULT_PATH})')
+    parser.add_argument('--artist-cache-ttl-days', type=float, default=ArtistCache.DEFAULT_TTL_DAYS,
+                        help=f'Refetch cached artists older than this (default: {ArtistCache.DEFAULT_TTL_DAYS:.0f})')
+    parser.add_argument('--no-artist-cache', action='store_true', help='Fetch every Spotify artist from the API')
+    parser.add_argument('--spotify-resume', action='store_true',
+                        help='Continue an interrupted Spotify run from <output>.parts/, skipping tracks it already finished')
+    parser.add_argument('--spotify-max-retries', type=int, default=5,
+                        help='Retries per Spotify request for 429/5xx/timeouts before its ids are dead-lettered (default: 5)')
+    parser.add_argument('--spotify-rate-limit', type=float, help='Pace Spotify API requests to this many per second (default: off)')
+    parser.add_argument('--spotify-rate-burst', type=int, default=10, help='Spotify requests allowed ahead of the pace (default: 10)')
+    parser.add_argument('--spotify-rate-file',
+                        help='Share the --spotify-rate-limit budget with other fetcher processes on this machine through this file')
+    parser.add_argument('--spotify-rate-coordinator', metavar='HOST[:PORT]',
+                        help='Take Spotify request slots from a rate coordinator shared by several machines '
+                             '(run one with spotify_metadata_fetcher.py --serve-rate-coordinator)')
     
     # Deployment options
     parser.add_argument('--deploy-all', action='store_true', help='Deploy to all 3 machines')
@@ -1837,8 +4448,11 @@ async def main():
     
     # Detect machine and assign work
     machine_specs = UltimateMachineDetector.detect_machine_and_assign_work()
-    logger = UltimateLogger(machine_specs)
-    
+    with UltimateLogger(machine_specs) as logger:  # Stops the log writer thread on every exit path
+        return await run_unified(args, machine_specs, logger)
+
+async def run_unified(args: argparse.Namespace, machine_specs: MachineSpecs, logger: UltimateLogger) -> int:
+    """Dispatch to Spotify fetching or TRUE HUV analysis for this machine"""
     logger.display_machine_banner()
     
     # iMac: ONLY Spotify metadata (no musical analysis)
@@ -1851,7 +4465,16 @@ async def main():
         
         spotify_config = SpotifyConfig(args.client_id, args.client_secret)
         logger.info("🎵 Launching Spotify metadata fetching ONLY on iMac for ENTIRE dataset...")
-        spotify_success = await launch_spotify_metadata_fetching_full_dataset(machine_specs, spotify_config)
+        artist_cache = None if args.no_artist_cache else ArtistCache(args.artist_cache, args.artist_cache_ttl_days)
+        try:
+            spotify_success = await launch_spotify_metadata_fetching_full_dataset(
+                machine_specs, spotify_config, batch=args.spotify_batch, artist_cache=artist_cache,
+                rate_limiter=build_rate_limiter(args.spotify_rate_limit, args.spotify_rate_burst,
+                                                args.spotify_rate_file, args.spotify_rate_coordinator),
+                max_retries=args.spotify_max_retries, resume=args.spotify_resume)
+        finally:
+            if artist_cache is not None:
+                artist_cache.close()
         
         if spotify_success:
             logger.success("✅ Spotify metadata complete!")
@@ -1868,19 +4491,45 @@ async def main():
             return 1
         
         spotify_config = SpotifyConfig(args.client_id, args.client_secret)
-        success = await launch_spotify_metadata_fetching(machine_specs, spotify_config)
+        artist_cache = None if args.no_artist_cache else ArtistCache(args.artist_cache, args.artist_cache_ttl_days)
+        try:
+            success = await launch_spotify_metadata_fetching(
+                machine_specs, spotify_config, batch=args.spotify_batch, artist_cache=artist_cache,
+                rate_limiter=build_rate_limiter(args.spotify_rate_limit, args.spotify_rate_burst,
+                                                args.spotify_rate_file, args.spotify_rate_coordinator),
+                max_retries=args.spotify_max_retries, resume=args.spotify_resume)
+        finally:
+            if artist_cache is not None:
+                artist_cache.close()
         return 0 if success else 1
     
     # Music analysis (TRUE HUV) - Mac Pro & Mac Studio only
-    processor = UltimateData3Processor(machine_specs, logger)
+    processor = UltimateData3Processor(machine_specs, logger, cache_budget_mb=args.cache_budget_mb,
+                                       huv_bitmask=args.huv_bitmask, output_format=args.output_format,
+                                       shared_input=not args.no_shared_input,
+                                       target_batch_seconds=args.target_batch_ms / 1000 if args.target_batch_ms else None,
+                                       worker_profile=WorkerProfile(args.worker_profile))
+    
+    if args.calibrate:
+        logger.info("📐 Calibrating worker count...")
+        processor.calibrate_workers(args.input, sample_rows=args.calibration_rows)
+        return 0
     
     # Determine output file
     if not args.output:
-        args.output = f"data3_{machine_specs.output_suffix}_chordonomicon_v2.csv"
+        args.output = f"data3_{machine_specs.output_suffix}_chordonomicon_v2.{args.output_format}"
     
     # Process music analysis
     logger.info("🎵 Starting TRUE HUV music analysis...")
-    result = await processor.process_data2_to_data3_ultimate(args.input, args.output)
+    result = await processor.process_data2_to_data3_ultimate(
+        args.input, args.output,
+        streaming=args.stream,
+        stream_chunk_rows=args.stream_chunk_rows,
+        max_in_flight=args.max_in_flight,
+        reorder_window=args.reorder_window,
+        checkpoint=args.checkpoint,
+        resume=args.resume
+    )
     
     # Check if processing was successful (no error key means success)
     if 'error' not in result:
@@ -6,6 +6,7 @@ Automated script to monitor iMac Spotify progress and merge all datasets
 
 import os
 import time
+import argparse
 import pandas as pd
 import subprocess
 import logging
@@ -21,12 +22,30 @@ logger = logging.getLogger(__name__)
 console = Console()
 
 class AutoStitchTriSystem:
-    def __init__(self):
-        self.macpro_file = "data3_macpro_chordonomicon_v2.csv"
-        self.studio_file = "data3_studio_chordonomicon_v2.csv"
+    def __init__(self, data_format="csv"):
+        # data_format applies to the data3 inputs and the merged output; the
+        # iMac Spotify extras are always CSV
+        self.data_format = data_format
+        self.macpro_file = f"data3_macpro_chordonomicon_v2.{data_format}"
+        self.studio_file = f"data3_studio_chordonomicon_v2.{data_format}"
         self.imac_file = "data3.5_spotify_extras_imac.csv"
-        self.final_output = "data3_complete_tri_system.csv"
+        self.final_output = f"data3_complete_tri_system.{data_format}"
         self.imac_log = "imac_unified.log"
+    
+    @staticmethod
+    def read_dataset(path):
+        """Load CSV or typed Parquet by file extension"""
+        if path.endswith(".parquet"):
+            return pd.read_parquet(path, dtype_backend="pyarrow")  # Arrow types survive the round trip (int16 decade)
+        return pd.read_csv(path)
+    
+    def save_dataset(self, df, path):
+        """Save in the configured format (Parquet keeps column types)"""
+        if self.data_format == "parquet":
+            df.to_parquet(path, index=False, compression="zstd", use_dictionary=["key", "main_genre"],
+                          row_group_size=100_000)
+        else:
+            df.to_csv(path, index=False)
         
     def check_imac_status(self):
         """Check if iMac Spotify processing is complete"""
@@ -86,17 +105,17 @@ class AutoStitchTriSystem:
             
             # Load Mac Pro data
             console.print("📖 Loading Mac Pro data...")
-            macpro_df = pd.read_csv(self.macpro_file)
+            macpro_df = self.read_dataset(self.macpro_file)
             console.print(f"✅ Mac Pro: {len(macpro_df)} rows loaded")
             
             # Load Mac Studio data
             console.print("📖 Loading Mac Studio data...")
-            studio_df = pd.read_csv(self.studio_file)
+            studio_df = self.read_dataset(self.studio_file)
             console.print(f"✅ Mac Studio: {len(studio_df)} rows loaded")
             
             # Load iMac Spotify data
             console.print("📖 Loading iMac Spotify data...")
-            imac_df = pd.read_csv(self.imac_file)
+            imac_df = self.read_dataset(self.imac_file)
             console.print(f"✅ iMac: {len(imac_df)} rows loaded")
             
             # Combine Mac Pro and Mac Studio data
@@ -118,7 +137,7 @@ class AutoStitchTriSystem:
             
             # Save final dataset
             console.print("💾 Saving complete tri-system dataset...")
-            final_df.to_csv(self.final_output, index=False)
+            self.save_dataset(final_df, self.final_output)
             
             # Display summary
             self.display_summary(final_df)
@@ -203,7 +222,12 @@ class AutoStitchTriSystem:
 
 def main():
     """Main function"""
-    stitcher = AutoStitchTriSystem()
+    parser = argparse.ArgumentParser(description="Auto-stitch Mac Pro + Mac Studio data3 with iMac Spotify metadata")
+    parser.add_argument("--format", dest="data_format", choices=["csv", "parquet"], default="csv",
+                        help="Format of the data3 inputs and merged output (default: csv)")
+    args = parser.parse_args()
+    
+    stitcher = AutoStitchTriSystem(args.data_format)
     
     # Check if required files exist
     if not os.path.exists(stitcher.macpro_file):
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+⏱️ VIPER HARMONIC ANALYSIS BENCHMARK SUITE
+==========================================
+
+Measures the VIPER hot paths on fixed synthetic corpora (see
+generate_synthetic_data2.py): each stage in isolation, the whole per-song
+pipeline in one process, and the full multi-process data2 → data3 run.
+
+    extract     extract_cpml_sequence_ultimate   per song
+    parse       parse_chord_ultimate             every chord of a song
+    key         detect_key_ultimate              per song
+    roman       generate_roman_numerals_ultimate per song
+    huv         generate_huv_fingerprint_ultimate per song
+    pipeline    extract → key → roman → huv       per song, single process
+    end_to_end  UltimateData3Processor batch run  whole corpus, all workers
+
+Every stage runs in its own process (honest peak RSS). Inside it the stage
+is run --warmup times untimed, then timed --repeats times, each run with a
+fresh engine and cold caches, and the median of each measurement is
+reported: songs/sec, p50/p99 per-song latency, plus peak RSS and the
+run-to-run spread. Results can be saved as a baseline and later runs
+compared against it: any stage that is slower, or uses more memory, than
+the baseline by more than the tolerance is reported as a REGRESSION and the
+exit code is 1. Keep the tolerance above the spread the machine shows.
+
+Usage:
+    python benchmark_viper.py --sizes 10k --save-baseline bench_baseline.json
+    python benchmark_viper.py --sizes 10k --baseline bench_baseline.json
+    python benchmark_viper.py --sizes 10k,100k,1m --stages extract,key,end_to_end --repeats 3
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import multiprocessing as mp
+import os
+import platform
+import queue
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from generate_synthetic_data2 import generate_synthetic_data2
+
+STAGES = ['extract', 'parse', 'key', 'roman', 'huv', 'pipeline', 'end_to_end']
+CORPUS_SEED = 20240501  # Fixed: the same corpus on every machine and commit
+DEFAULT_TOLERANCE = 0.10
+DEFAULT_WARMUP = 1
+DEFAULT_REPEATS = 5
+RESULT_POLL_SECONDS = 1.0
+
+
+def parse_size(size: str) -> int:
+    """'10k' / '100k' / '1m' / '2500' -> rows"""
+    size = size.strip().lower()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(size[-1:], 1)
+    return int(float(size.rstrip('km')) * multiplier)
+
+
+def corpus_path(corpus_dir: Path, rows: int) -> Path:
+    """Synthetic data2 corpus for this size, generated once and reused"""
+    path = corpus_dir / f"synthetic_data2_{rows}_seed{CORPUS_SEED}.csv"
+    if not path.exists():
+        print(f"🎲 Generating {rows:,}-song corpus → {path}")
+        corpus_dir.mkdir(parents=True, exist_ok=True)
+        temp = path.with_name(path.name + '.tmp')
+        generate_synthetic_data2(str(temp), rows, seed=CORPUS_SEED)
+        os.replace(temp, path)
+    return path
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process and its children, in MB"""
+    try:
+        import resource
+        scale = 1 if platform.system() == 'Darwin' else 1024  # ru_maxrss: bytes on macOS, KB on Linux
+        peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+        return peak * scale / 1024**2
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024**2
+
+
+def _time_songs(items: List[Any], analyse: Callable[[Any], Any]) -> Dict[str, Any]:
+    latencies = np.empty(len(items))
+    started = time.perf_counter()
+    for i, item in enumerate(items):
+        song_start = time.perf_counter()
+        analyse(item)
+        latencies[i] = time.perf_counter() - song_start
+    elapsed = time.perf_counter() - started
+    return {
+        'songs': len(items),
+        'seconds': elapsed,
+        'songs_per_sec': len(items) / elapsed if elapsed else 0.0,
+        'p50_ms': float(np.percentile(latencies, 50) * 1000) if len(items) else 0.0,
+        'p99_ms': float(np.percentile(latencies, 99) * 1000) if len(items) else 0.0,
+    }
+
+
+def _median_of_runs(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-measurement median over the timed runs, plus the songs/sec spread between them"""
+    result = dict(runs[0])
+    for measure in ('seconds', 'songs_per_sec', 'p50_ms', 'p99_ms'):
+        values = [run[measure] for run in runs if run.get(measure) is not None]
+        result[measure] = statistics.median(values) if values else None
+    rates = [run['songs_per_sec'] for run in runs]
+    result['repeats'] = len(runs)
+    result['spread'] = (max(rates) - min(rates)) / result['songs_per_sec'] if result['songs_per_sec'] else 0.0
+    return result
+
+
+def _run_stage(stage: str, corpus: str, warmup: int, repeats: int, result_queue: Any):
+    """Child process: build untimed inputs, then time one stage over warm-up + repeated runs"""
+    import VIPER_ULTIMATE_UNIFIED as viper
+
+    try:
+        if stage == 'end_to_end':
+            result = _run_end_to_end(viper, corpus, warmup, repeats)
+        else:
+            chords = pd.read_csv(corpus, usecols=['chords'], dtype={'chords': 'string'})['chords'].tolist()
+            chords = ['' if viper._has_no_harmony(value) else str(value) for value in chords]
+
+            # Inputs come from a separate engine so every timed engine starts with cold caches
+            setup = viper.UltimatePureMusicTheoryEngine()
+            if stage in ('extract', 'pipeline'):
+                items = chords
+            else:
+                sequences = [setup.extract_cpml_sequence_ultimate(value) for value in chords]
+                sequences = [sequence for sequence in sequences if sequence]
+                if stage == 'parse':
+                    items = [[token for token in sequence if not token.startswith('<')] for sequence in sequences]
+                elif stage == 'roman':
+                    items = [(sequence, *setup.detect_key_ultimate(sequence)[:2]) for sequence in sequences]
+                else:
+                    items = sequences
+
+            def time_once() -> Dict[str, Any]:
+                engine = viper.UltimatePureMusicTheoryEngine()
+
+                def pipeline(cpml_string: str):
+                    sequence = engine.extract_cpml_sequence_ultimate(cpml_string)
+                    if sequence:
+                        key, is_major, _, _ = engine.detect_key_ultimate(sequence)
+                        engine.generate_roman_numerals_ultimate(sequence, key, is_major)
+                        engine.generate_huv_fingerprint_ultimate(sequence)
+
+                analyse = {
+                    'extract': engine.extract_cpml_sequence_ultimate,
+                    'parse': lambda tokens: [engine.parse_chord_ultimate(token) for token in tokens],
+                    'key': engine.detect_key_ultimate,
+                    'roman': lambda args: engine.generate_roman_numerals_ultimate(*args),
+                    'huv': engine.generate_huv_fingerprint_ultimate,
+                    'pipeline': pipeline,
+                }[stage]
+                return _time_songs(items, analyse)
+
+            for _ in range(warmup):
+                time_once()
+            result = _median_of_runs([time_once() for _ in range(repeats)])
+
+        result['peak_rss_mb'] = peak_rss_mb()
+        result_queue.put(result)
+    except Exception as e:
+        result_queue.put({'error': f"{type(e).__name__}: {e}"})
+
+
+def _run_end_to_end(viper: Any, corpus: str, warmup: int, repeats: int) -> Dict[str, Any]:
+    """Full batch-mode data2 → data3 runs over the whole corpus with the host's workers"""
+    machine = dataclasses.replace(viper.UltimateMachineDetector.detect_machine_and_assign_work(), work_range=(0, None))
+    output_dir = tempfile.mkdtemp(prefix='viper_bench_')
+    runs = []
+    # Closing the logger stops its listener thread before this child exits
+    with viper.UltimateLogger(machine) as logger:
+        try:
+            for run in range(warmup + repeats):
+                processor = viper.UltimateData3Processor(machine, logger)
+                started = time.perf_counter()
+                results = asyncio.run(processor.process_data2_to_data3_ultimate(corpus, os.path.join(output_dir, 'data3.csv')))
+                elapsed = time.perf_counter() - started
+                if run >= warmup:
+                    songs = results['processing_stats']['total_songs_processed']
+                    runs.append({'songs': songs, 'seconds': elapsed, 'songs_per_sec': songs / elapsed,
+                                 'p50_ms': None, 'p99_ms': None, 'workers': processor.num_workers})
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+    return _median_of_runs(runs)
+
+
+def run_stage(stage: str, corpus: Path, warmup: int = DEFAULT_WARMUP, repeats: int = DEFAULT_REPEATS,
+              timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Run one stage in a fresh process and collect its measurements
+    
+    The result queue is polled so a child that crashes or is killed (e.g.
+    by the OOM killer) fails the stage instead of hanging the benchmark;
+    a child still running after timeout seconds is terminated.
+    """
+    context = mp.get_context('spawn')
+    result_queue = context.Queue()
+    process = context.Process(target=_run_stage, args=(stage, str(corpus), warmup, repeats, result_queue))
+    process.start()
+    deadline = time.monotonic() + timeout if timeout else None
+    result = None
+    while result is None:
+        exited = not process.is_alive()
+        try:
+            result = result_queue.get(timeout=RESULT_POLL_SECONDS)
+        except queue.Empty:
+            if exited:  # Checked before the get, so a result sent just before exit is not missed
+                process.join()
+                raise RuntimeError(f"Stage {stage} failed: process exited with code {process.exitcode}") from None
+            if deadline is not None and time.monotonic() > deadline:
+                process.terminate()
+                process.join()
+                raise RuntimeError(f"Stage {stage} failed: no result after {timeout:.0f} seconds") from None
+    process.join()
+    if 'error' in result:
+        raise RuntimeError(f"Stage {stage} failed: {result['error']}")
+    return result
+
+
+def compare_to_baseline(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any],
+                        tolerance: float) -> List[str]:
+    """Human-readable regressions: slower, higher p99 or more memory than baseline beyond tolerance"""
+    regressions = []
+    for name, current in results.items():
+        reference = baseline['results'].get(name)
+        if not reference:
+            continue
+        if current['songs_per_sec'] < reference['songs_per_sec'] * (1 - tolerance):
+            regressions.append(f"{name}: {current['songs_per_sec']:,.1f} songs/sec vs baseline "
+                               f"{reference['songs_per_sec']:,.1f} ({current['songs_per_sec'] / reference['songs_per_sec'] - 1:+.1%})")
+        if current.get('p99_ms') and reference.get('p99_ms') and current['p99_ms'] > reference['p99_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {current['p99_ms']:.3f} ms vs baseline {reference['p99_ms']:.3f} ms")
+        if current['peak_rss_mb'] > reference['peak_rss_mb'] * (1 + tolerance):
+            regressions.append(f"{name}: peak RSS {current['peak_rss_mb']:,.0f} MB vs baseline {reference['peak_rss_mb']:,.0f} MB")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the VIPER harmonic analysis hot paths')
+    parser.add_argument('--sizes', default='10k', help='Comma-separated corpus sizes, e.g. 10k,100k,1m (default: 10k)')
+    parser.add_argument('--stages', default=','.join(STAGES), help=f"Comma-separated stages (default: all: {','.join(STAGES)})")
+    parser.add_argument('--corpus-dir', default='bench_corpora', help='Where generated corpora are cached (default: bench_corpora)')
+    parser.add_argument('--baseline', help='Baseline JSON to compare against; regressions exit with code 1')
+    parser.add_argument('--save-baseline', help='Write these results as a baseline JSON')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f'Allowed slowdown / growth vs baseline (default: {DEFAULT_TOLERANCE})')
+    parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP,
+                        help=f'Untimed runs per stage before measuring (default: {DEFAULT_WARMUP})')
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS,
+                        help=f'Timed runs per stage; the median is reported (default: {DEFAULT_REPEATS})')
+    parser.add_argument('--stage-timeout', type=float,
+                        help='Fail a stage whose process has not reported after this many seconds (default: no limit)')
+    parser.add_argument('--output', help='Also write the results JSON here')
+    args = parser.parse_args()
+    if args.repeats < 1 or args.warmup < 0:
+        parser.error('--repeats must be at least 1 and --warmup at least 0')
+
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+
+    print("⏱️  VIPER BENCHMARK SUITE")
+    print("=" * 90)
+    print(f"💻 {platform.node()} | Python {platform.python_version()} | {os.cpu_count()} CPUs | "
+          f"median of {args.repeats} run(s) after {args.warmup} warm-up")
+    print(f"{'stage':<12} {'songs':>10} {'songs/sec':>12} {'spread':>8} {'p50 ms':>9} {'p99 ms':>9} {'peak RSS MB':>12}")
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for rows in sizes:
+        corpus = corpus_path(Path(args.corpus_dir), rows)
+        for stage in stages:
+            result = run_stage(stage, corpus, args.warmup, args.repeats, args.stage_timeout)
+            results[f"{stage}@{rows}"] = result
+            p50 = f"{result['p50_ms']:.3f}" if result['p50_ms'] is not None else '-'
+            p99 = f"{result['p99_ms']:.3f}" if result['p99_ms'] is not None else '-'
+            print(f"{stage:<12} {result['songs']:>10,} {result['songs_per_sec']:>12,.1f} {result['spread']:>8.1%} "
+                  f"{p50:>9} {p99:>9} {result['peak_rss_mb']:>12,.0f}")
+
+    report = {
+        'hostname': platform.node(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'corpus_seed': CORPUS_SEED,
+        'warmup': args.warmup,
+        'repeats': args.repeats,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'results': results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"💾 Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('hostname') != report['hostname']:
+            print(f"⚠️  Baseline is from {baseline.get('hostname')} - cross-machine numbers are not comparable")
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("=" * 90)
+            print(f"❌ {len(regressions)} REGRESSION(S) vs {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for regression in regressions:
+                print(f"   ❌ {regression}")
+            return 1
+        print(f"✅ No regressions vs {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+🗄️ DATA3 STORE - MEMORY-MAPPED COLUMNAR DATA3 WITH RANDOM ACCESS
+=================================================================
+
+Turns a VIPER data3 output (CSV or Parquet) into a store directory that can
+be opened instantly and queried by song id without loading the file:
+
+    manifest.json                 row count, column layout, categories
+    <column>.bin                  fixed-width numeric column (id int64, decade int16)
+    <column>.codes.bin            int16 codes for dictionary columns (key, main_genre)
+    <column>.offsets.bin          int64 offsets (rows + 1) into the string heap
+    <column>.heap.bin             UTF-8 bytes of every value of a string column
+    <column>.nulls.bin            1 byte per row, only for string columns with nulls
+    id_index.keys.bin / .rows.bin open-addressing hash table: song id -> row
+
+Everything is opened with np.memmap, so lookups touch only the pages they
+need, numeric slices are zero-copy views and strings are decoded on demand.
+
+Usage:
+    python data3_store.py build data3_macpro_chordonomicon_v2.csv data3_store/
+    python data3_store.py get data3_store/ 620961 620962
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+STORE_FORMAT = "data3-store"
+STORE_VERSION = 1
+
+# Fixed-width numeric columns and the value stored for a missing entry
+INTEGER_COLUMNS = {'id': ('<i8', None), 'decade': ('<i2', -1)}
+
+# Low-cardinality text stored as int16 codes into a category list (-1 = missing)
+CATEGORY_COLUMNS = ['key', 'main_genre']
+
+# Hash table sentinel - ids are non-negative in data3
+EMPTY_SLOT = np.int64(-1)
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _slot_hash(ids: np.ndarray, bits: int) -> np.ndarray:
+    """Fibonacci hashing of int64 ids onto 2**bits slots"""
+    hashed = ids.astype(np.uint64) * _HASH_MULTIPLIER
+    return (hashed >> np.uint64(64 - bits)).astype(np.int64)
+
+
+def _iter_source_chunks(source: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Stream a data3 CSV or Parquet file in chunks of chunk_rows"""
+    if Path(source).suffix == '.parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        # Text stays text - '' is an empty value, not a null
+        yield from pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=chunk_rows)
+
+
+# =====================================================================================
+# STORE BUILDER
+# =====================================================================================
+
+def build_data3_store(source: str, store_dir: str, chunk_rows: int = 100_000) -> Dict[str, Any]:
+    """Build a data3 store from a VIPER output file; returns the manifest
+
+    The source is streamed chunk by chunk, so memory use is bounded by
+    chunk_rows regardless of the file size.
+    """
+
+    store = Path(store_dir)
+    store.mkdir(parents=True, exist_ok=True)
+
+    columns: Dict[str, Dict[str, Any]] = {}
+    handles: Dict[str, Any] = {}
+    heap_sizes: Dict[str, int] = {}
+    category_codes: Dict[str, Dict[str, int]] = {}
+    has_nulls: Dict[str, bool] = {}
+    rows = 0
+
+    def handle(filename: str):
+        if filename not in handles:
+            handles[filename] = open(store / filename, 'wb')
+        return handles[filename]
+
+    try:
+        for chunk in _iter_source_chunks(source, chunk_rows):
+            if not columns:
+                for name in chunk.columns:
+                    if name in INTEGER_COLUMNS:
+                        dtype, null_value = INTEGER_COLUMNS[name]
+                        columns[name] = {'kind': 'integer', 'dtype': dtype, 'null_value': null_value,
+                                         'file': f'{name}.bin'}
+                    elif name in CATEGORY_COLUMNS:
+                        columns[name] = {'kind': 'category', 'dtype': '<i2', 'file': f'{name}.codes.bin'}
+                        category_codes[name] = {}
+                    else:
+                        columns[name] = {'kind': 'string', 'offsets': f'{name}.offsets.bin',
+                                         'heap': f'{name}.heap.bin', 'nulls': f'{name}.nulls.bin'}
+                        heap_sizes[name] = 0
+                        has_nulls[name] = False
+                        handle(columns[name]['offsets']).write(np.zeros(1, dtype='<i8').tobytes())
+
+            for name, layout in columns.items():
+                values = chunk[name]
+                missing = values.isna()
+
+                if layout['kind'] == 'integer':
+                    present = ~missing & (values.astype(str).str.strip() != '')
+                    numeric = pd.to_numeric(values.where(present), errors='coerce')
+                    invalid = present & (numeric.isna() | (numeric % 1 != 0))
+                    if invalid.any():
+                        raise ValueError(f"Column {name!r} is not integral, e.g. {values[invalid].iloc[0]!r}")
+                    if layout['null_value'] is None and not present.all():
+                        raise ValueError(f"Column {name!r} has missing values")
+                    filled = numeric.fillna(layout['null_value'] if layout['null_value'] is not None else 0)
+                    handle(layout['file']).write(filled.to_numpy().astype(layout['dtype']).tobytes())
+
+                elif layout['kind'] == 'category':
+                    codes_by_value = category_codes[name]
+                    codes = np.full(len(values), -1, dtype='<i2')
+                    for i, value in enumerate(values.tolist()):
+                        if value is None or (not isinstance(value, str) and pd.isna(value)):
+                            continue
+                        code = codes_by_value.get(value)
+                        if code is None:
+                            code = codes_by_value[value] = len(codes_by_value)
+                            if code > np.iinfo(np.int16).max:
+                                raise ValueError(f"Column {name!r} has too many distinct values for a category column")
+                        codes[i] = code
+                    handle(layout['file']).write(codes.tobytes())
+
+                else:
+                    encoded = [b'' if is_missing else str(value).encode('utf-8')
+                               for value, is_missing in zip(values.tolist(), missing.tolist())]
+                    lengths = np.fromiter((len(value) for value in encoded), dtype=np.int64, count=len(encoded))
+                    offsets = heap_sizes[name] + np.cumsum(lengths)
+                    handle(layout['heap']).write(b''.join(encoded))
+                    handle(layout['offsets']).write(offsets.astype('<i8').tobytes())
+                    handle(layout['nulls']).write(missing.to_numpy(dtype=bool).tobytes())
+                    heap_sizes[name] = int(offsets[-1]) if len(offsets) else heap_sizes[name]
+                    has_nulls[name] = has_nulls[name] or bool(missing.any())
+
+            rows += len(chunk)
+    finally:
+        for open_handle in handles.values():
+            open_handle.close()
+
+    # Null masks are only kept for string columns that actually have nulls
+    for name, layout in columns.items():
+        if layout['kind'] == 'string' and not has_nulls[name]:
+            os.remove(store / layout['nulls'])
+            layout['nulls'] = None
+        if layout['kind'] == 'category':
+            layout['categories'] = list(category_codes[name])
+
+    manifest = {
+        'format': STORE_FORMAT,
+        'version': STORE_VERSION,
+        'source': str(source),
+        'rows': rows,
+        'columns': columns,
+    }
+    if 'id' in columns:
+        manifest['id_index'] = _build_id_index(store, columns['id'], rows)
+
+    with open(store / 'manifest.json', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _build_id_index(store: Path, id_layout: Dict[str, Any], rows: int) -> Dict[str, Any]:
+    """Open-addressing (linear probing) hash table from song id to row, load factor <= 0.5"""
+
+    ids = np.fromfile(store / id_layout['file'], dtype=id_layout['dtype'])
+    if rows and len(np.unique(ids)) != rows:
+        raise ValueError("Song ids are not unique - cannot build the id index")
+
+    bits = max(1, int(np.ceil(np.log2(max(rows, 1) * 2))))
+    capacity = 1 << bits
+    slot_keys = np.full(capacity, EMPTY_SLOT, dtype='<i8')
+    slot_rows = np.full(capacity, -1, dtype='<i8')
+
+    # Vectorised insertion: every round, each pending id claims its probe slot
+    # if it is free (first claimant wins), the rest move one slot on
+    pending = np.arange(rows, dtype=np.int64)
+    positions = _slot_hash(ids, bits)
+    while len(pending):
+        free = slot_rows[positions] == -1
+        claim_slots, first = np.unique(positions[free], return_index=True)
+        winners = pending[free][first]
+        slot_keys[claim_slots] = ids[winners]
+        slot_rows[claim_slots] = winners
+
+        placed = np.zeros(len(pending), dtype=bool)
+        placed[np.flatnonzero(free)[first]] = True
+        pending = pending[~placed]
+        positions = (positions[~placed] + 1) & (capacity - 1)
+
+    slot_keys.tofile(store / 'id_index.keys.bin')
+    slot_rows.tofile(store / 'id_index.rows.bin')
+    return {'bits': bits, 'keys': 'id_index.keys.bin', 'rows': 'id_index.rows.bin'}
+
+
+# =====================================================================================
+# STORE READER
+# =====================================================================================
+
+class Data3Store:
+    """Read-only, memory-mapped view of a data3 store directory
+
+    Opening a store maps files without reading them. get()/get_many() find
+    rows through the id hash index in O(1) expected probes, column() and
+    string_bytes() return zero-copy views, and only the rows you ask for
+    are ever decoded.
+    """
+
+    def __init__(self, store_dir: str):
+        self.path = Path(store_dir)
+        with open(self.path / 'manifest.json') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format') != STORE_FORMAT:
+            raise ValueError(f"{store_dir} is not a data3 store")
+
+        self.rows = self.manifest['rows']
+        self.layouts: Dict[str, Dict[str, Any]] = self.manifest['columns']
+        self._maps: Dict[str, np.ndarray] = {}
+
+        index = self.manifest.get('id_index')
+        if index:
+            self._index_bits = index['bits']
+            self._slot_keys = self._map(index['keys'], '<i8')
+            self._slot_rows = self._map(index['rows'], '<i8')
+        else:
+            self._index_bits = None
+
+    def _map(self, filename: str, dtype: str) -> np.ndarray:
+        array = self._maps.get(filename)
+        if array is None:
+            file_path = self.path / filename
+            if file_path.stat().st_size == 0:
+                array = np.zeros(0, dtype=dtype)
+            else:
+                array = np.memmap(file_path, dtype=dtype, mode='r')
+            self._maps[filename] = array
+        return array
+
+    def __len__(self) -> int:
+        return self.rows
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.layouts)
+
+    # ---- id index -----------------------------------------------------------------
+
+    def rows_of(self, song_ids) -> np.ndarray:
+        """Row position of each song id (-1 when absent), probing all ids at once"""
+        if self._index_bits is None:
+            raise ValueError("This store has no id index")
+
+        song_ids = np.atleast_1d(np.asarray(song_ids, dtype=np.int64))
+        found = np.full(len(song_ids), -1, dtype=np.int64)
+        mask = len(self._slot_keys) - 1
+        positions = _slot_hash(song_ids, self._index_bits)
+        pending = np.arange(len(song_ids))
+
+        while len(pending):
+            keys = self._slot_keys[positions]
+            hit = keys == song_ids[pending]
+            found[pending[hit]] = self._slot_rows[positions[hit]]
+            searching = ~hit & (keys != EMPTY_SLOT)
+            pending = pending[searching]
+            positions = (positions[searching] + 1) & mask
+        return found
+
+    def row_of(self, song_id: int) -> Optional[int]:
+        row = int(self.rows_of([song_id])[0])
+        return row if row >= 0 else None
+
+    # ---- column access ------------------------------------------------------------
+
+    def column(self, name: str) -> np.ndarray:
+        """Zero-copy memory-mapped array for a numeric column (codes for category columns)"""
+        layout = self.layouts[name]
+        if layout['kind'] == 'string':
+            raise TypeError(f"{name!r} is a string column - use string_at()/string_bytes()")
+        return self._map(layout['file'], layout['dtype'])
+
+    def string_bytes(self, name: str, row: int) -> memoryview:
+        """Zero-copy UTF-8 bytes of one string value"""
+        layout = self.layouts[name]
+        offsets = self._map(layout['offsets'], '<i8')
+        heap = self._map(layout['heap'], 'u1')
+        return memoryview(heap[offsets[row]:offsets[row + 1]])
+
+    def value(self, name: str, row: int) -> Any:
+        """Decoded value of one cell (None for missing)"""
+        layout = self.layouts[name]
+        if layout['kind'] == 'integer':
+            value = int(self.column(name)[row])
+            return None if value == layout['null_value'] else value
+        if layout['kind'] == 'category':
+            code = int(self.column(name)[row])
+            return layout['categories'][code] if code >= 0 else None
+        if layout['nulls'] and self._map(layout['nulls'], 'u1')[row]:
+            return None
+        return bytes(self.string_bytes(name, row)).decode('utf-8')
+
+    def row(self, row: int, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        """One decoded row as a dict"""
+        if not 0 <= row < self.rows:
+            raise IndexError(f"Row {row} out of range for a store of {self.rows} rows")
+        return {name: self.value(name, row) for name in (columns or self.columns)}
+
+    # ---- lookups ------------------------------------------------------------------
+
+    def get(self, song_id: int, columns: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """One song by id, or None"""
+        row = self.row_of(song_id)
+        return None if row is None else self.row(row, columns)
+
+    def get_many(self, song_ids, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Songs by id as a DataFrame in request order (missing ids are skipped)"""
+        rows = self.rows_of(song_ids)
+        return self.take(rows[rows >= 0], columns)
+
+    def take(self, rows, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Rows by position as a DataFrame"""
+        return pd.DataFrame([self.row(int(row), columns) for row in np.asarray(rows)],
+                            columns=columns or self.columns)
+
+    def slice(self, start: int, stop: int, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Contiguous rows as a DataFrame (numeric columns come from zero-copy views)"""
+        stop = min(stop, self.rows)
+        data = {}
+        for name in (columns or self.columns):
+            layout = self.layouts[name]
+            if layout['kind'] == 'integer':
+                values = pd.array(self.column(name)[start:stop], dtype='Int64')
+                if layout['null_value'] is not None:
+                    values[values == layout['null_value']] = pd.NA
+                data[name] = values
+            else:
+                data[name] = [self.value(name, row) for row in range(start, stop)]
+        return pd.DataFrame(data)
+
+
+# =====================================================================================
+# COMMAND LINE INTERFACE
+# =====================================================================================
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Memory-mapped data3 store with random access by song id')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help='Build a store from a data3 CSV or Parquet file')
+    build.add_argument('source', help='VIPER data3 output (.csv or .parquet)')
+    build.add_argument('store_dir', help='Store directory to create')
+    build.add_argument('--chunk-rows', type=int, default=100_000, help='Rows read per chunk (default: 100000)')
+
+    get = commands.add_parser('get', help='Print songs by id')
+    get.add_argument('store_dir')
+    get.add_argument('ids', nargs='+', type=int)
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        print(f"🗄️  Building data3 store: {args.source} → {args.store_dir}")
+        manifest = build_data3_store(args.source, args.store_dir, args.chunk_rows)
+        print(f"✅ {manifest['rows']:,} songs, {len(manifest['columns'])} columns")
+        return 0
+
+    store = Data3Store(args.store_dir)
+    for song_id in args.ids:
+        song = store.get(song_id)
+        if song is None:
+            print(f"❌ Song {song_id} not found")
+        else:
+            print(json.dumps(song, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+🎲 SYNTHETIC DATA2 GENERATOR
+============================
+
+Writes Chordonomicon-style data2 CSVs of any size for benchmarking VIPER
+without the real chordonomicon_v2.csv. Songs are built from key-aware
+progression templates with section markers, slash chords, extensions,
+enharmonic spellings, repeated (cover) progressions and a share of empty
+and malformed rows, in the exact column set VIPER loads.
+
+Output is fully determined by --seed and the rate options, so the same
+command produces byte-identical files (same SHA-256) on every machine.
+
+Usage:
+    python generate_synthetic_data2.py --rows 680000 --seed 42 --output synthetic_data2.csv
+    python generate_synthetic_data2.py --rows 5000 --duplicate-rate 0.4 --output dup_heavy.csv
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Same order as the data2 part of UltimateData3Processor.DATA3_COLUMNS
+DATA2_COLUMNS = [
+    'id', 'chords', 'release_date', 'genres', 'decade', 'rock_genre',
+    'artist_id', 'main_genre', 'spotify_song_id', 'spotify_artist_id'
+]
+
+SHARP_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+FLAT_NAMES = ['C', 'Db', 'D', 'Eb', 'E', 'F', 'Gb', 'G', 'Ab', 'A', 'Bb', 'B']
+# Rare theoretical spellings that still turn up in user-submitted charts
+ODD_SPELLINGS = {4: 'Fb', 5: 'E#', 11: 'Cb', 0: 'B#'}
+FLAT_KEYS = {1, 3, 5, 8, 10}  # Db Eb F Ab Bb majors are spelled with flats
+
+# Scale degree -> (semitones above tonic, triad quality) for major and natural minor
+MAJOR_DEGREES = {'I': (0, ''), 'ii': (2, 'm'), 'iii': (4, 'm'), 'IV': (5, ''), 'V': (7, ''), 'vi': (9, 'm'),
+                 'vii': (11, 'dim'), 'bVII': (10, ''), 'II': (2, ''), 'III': (4, ''), 'iv': (5, 'm'), 'bVI': (8, '')}
+MINOR_DEGREES = {'i': (0, 'm'), 'ii': (2, 'dim'), 'III': (3, ''), 'iv': (5, 'm'), 'v': (7, 'm'), 'V': (7, ''),
+                 'VI': (8, ''), 'VII': (10, ''), 'IV': (5, '')}
+
+MAJOR_PROGRESSIONS = [
+    ['I', 'V', 'vi', 'IV'], ['I', 'IV', 'V', 'IV'], ['vi', 'IV', 'I', 'V'], ['I', 'vi', 'IV', 'V'],
+    ['ii', 'V', 'I', 'I'], ['I', 'IV', 'I', 'V'], ['I', 'bVII', 'IV', 'I'], ['I', 'iii', 'IV', 'V'],
+    ['IV', 'V', 'iii', 'vi'], ['I', 'II', 'IV', 'I'], ['I', 'III', 'vi', 'IV'], ['I', 'iv', 'I', 'V'],
+    ['I', 'I', 'I', 'I', 'IV', 'IV', 'I', 'I', 'V', 'IV', 'I', 'V'],  # 12-bar blues
+]
+MINOR_PROGRESSIONS = [
+    ['i', 'VI', 'III', 'VII'], ['i', 'VII', 'VI', 'V'], ['i', 'iv', 'v', 'i'], ['i', 'VI', 'VII', 'i'],
+    ['i', 'iv', 'VII', 'III'], ['ii', 'V', 'i', 'i'], ['i', 'III', 'VII', 'IV'], ['i', 'VII', 'VI', 'VII'],
+]
+
+# Extensions by triad quality, most common first
+MAJOR_EXTENSIONS = ['7', 'maj7', 'sus4', 'add9', '6', 'sus2', '9', 'maj9', '13', '7sus4', '5', 'aug', '7b9', '7#9', '11', 'no3d']
+MINOR_EXTENSIONS = ['7', '9', '6', '11', 'maj7', 'add9', '7b5']
+DIM_EXTENSIONS = ['7', '°', 'o']
+
+SECTION_PLANS = [
+    ['verse', 'chorus', 'verse', 'chorus', 'bridge', 'chorus'],
+    ['intro', 'verse', 'chorus', 'verse', 'chorus', 'outro'],
+    ['intro', 'verse', 'prechorus', 'chorus', 'verse', 'prechorus', 'chorus', 'solo', 'chorus', 'outro'],
+    ['verse', 'verse', 'bridge', 'verse'],
+    ['chorus', 'verse', 'chorus', 'verse', 'chorus'],
+    ['intro', 'verse', 'chorus', 'instrumental', 'verse', 'chorus', 'interlude', 'chorus'],
+    ['verse'],
+]
+
+GENRES = {
+    'pop': ['pop', 'dance pop', 'post-teen pop', 'art pop'],
+    'rock': ['rock', 'classic rock', 'album rock', 'hard rock', 'alternative rock'],
+    'country': ['country', 'contemporary country', 'outlaw country', 'classic texas country'],
+    'jazz': ['jazz', 'vocal jazz', 'cool jazz', 'bebop'],
+    'soul': ['soul', 'motown', 'neo soul', 'r&b'],
+    'metal': ['metal', 'heavy metal', 'thrash metal', 'alternative metal'],
+    'punk': ['punk', 'pop punk', 'skate punk'],
+    'electronic': ['electronic', 'edm', 'house', 'indietronica'],
+    'rap': ['rap', 'hip hop', 'trap'],
+    'reggae': ['reggae', 'roots reggae', 'dancehall'],
+}
+ROCK_GENRES = ['classic rock', 'alternative rock', 'hard rock', 'indie rock', 'punk rock', 'soft rock']
+
+MALFORMED_CHORDS = [
+    'N.C. N.C. %', '<verse_1 C G Am F', 'c g am f', '???', 'x x x', '|| C | G | Am | F ||',
+    '<>  <chorus_1>', 'Cmaj7/// G//', 'Hm7 E A', '[Intro] C G', 'C  G   Am    F', 'tacet',
+]
+
+BASE62 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+
+class SyntheticData2Generator:
+    """Deterministic stream of synthetic data2 rows"""
+
+    def __init__(self, seed: int = 42, duplicate_rate: float = 0.15, empty_rate: float = 0.02,
+                 malformed_rate: float = 0.01, artists: Optional[int] = None, start_id: int = 0):
+        self.rng = random.Random(seed)
+        self.duplicate_rate = duplicate_rate
+        self.empty_rate = empty_rate
+        self.malformed_rate = malformed_rate
+        self.artists = artists
+        self.next_id = start_id
+        self.progressions: List[str] = []  # Earlier songs, reused as covers/duplicates
+        self.artist_profiles: Dict[int, Tuple[str, str, List[str]]] = {}
+        self.stats = {'rows': 0, 'duplicates': 0, 'empty': 0, 'malformed': 0}
+
+    # ---- chords -------------------------------------------------------------------
+
+    def _note_name(self, pitch: int, use_flats: bool) -> str:
+        if self.rng.random() < 0.004 and pitch in ODD_SPELLINGS:
+            return ODD_SPELLINGS[pitch]
+        if self.rng.random() < 0.05:
+            use_flats = not use_flats  # Inconsistent enharmonic spelling
+        return (FLAT_NAMES if use_flats else SHARP_NAMES)[pitch]
+
+    def _chord(self, tonic: int, degree: str, degrees: Dict[str, Tuple[int, str]], use_flats: bool) -> str:
+        offset, quality = degrees[degree]
+        root = (tonic + offset) % 12
+        rng = self.rng
+
+        extension = ''
+        if rng.random() < 0.3:
+            pool = {'': MAJOR_EXTENSIONS, 'm': MINOR_EXTENSIONS, 'dim': DIM_EXTENSIONS}[quality]
+            extension = pool[min(int(rng.expovariate(0.45)), len(pool) - 1)]
+        if quality == 'm':
+            quality = 'min' if rng.random() < 0.4 else 'm'
+        if quality == 'dim' and extension in ('°', 'o'):
+            quality = ''
+
+        chord = self._note_name(root, use_flats) + quality + extension
+        if rng.random() < 0.08:
+            # Inversion or pedal bass
+            bass_offset = rng.choice([4 if quality == '' else 3, 7, 10, 2])
+            chord += '/' + self._note_name((root + bass_offset) % 12, use_flats)
+        return chord
+
+    def _progression(self) -> str:
+        rng = self.rng
+        tonic = rng.randrange(12)
+        minor = rng.random() < 0.3
+        degrees = MINOR_DEGREES if minor else MAJOR_DEGREES
+        templates = MINOR_PROGRESSIONS if minor else MAJOR_PROGRESSIONS
+        use_flats = (tonic + (3 if minor else 0)) % 12 in FLAT_KEYS
+
+        # Each section type keeps its own loop, so repeated sections repeat harmonically
+        section_loops: Dict[str, List[str]] = {}
+        counters: Dict[str, int] = {}
+        tokens: List[str] = []
+        plan = rng.choice(SECTION_PLANS)
+        for section in plan:
+            counters[section] = counters.get(section, 0) + 1
+            if rng.random() < 0.9:  # Some charts omit markers
+                marker = 'pre-chorus' if section == 'prechorus' and rng.random() < 0.3 else section
+                tokens.append(f"<{marker}_{counters[section]}>")
+            if section not in section_loops:
+                loop = list(rng.choice(templates))
+                section_loops[section] = [self._chord(tonic, degree, degrees, use_flats) for degree in loop]
+            loop = section_loops[section]
+            tokens.extend(loop * rng.choice([1, 2, 2, 3]))
+        return ' '.join(tokens)
+
+    def _chords(self) -> str:
+        rng = self.rng
+        draw = rng.random()
+        if draw < self.empty_rate:
+            self.stats['empty'] += 1
+            return ''
+        if draw < self.empty_rate + self.malformed_rate:
+            self.stats['malformed'] += 1
+            return rng.choice(MALFORMED_CHORDS)
+        if self.progressions and draw < self.empty_rate + self.malformed_rate + self.duplicate_rate:
+            # Popular progressions get covered more: skew towards early entries
+            self.stats['duplicates'] += 1
+            return self.progressions[int(len(self.progressions) * rng.random() ** 3)]
+        progression = self._progression()
+        self.progressions.append(progression)
+        return progression
+
+    # ---- metadata -----------------------------------------------------------------
+
+    def _spotify_id(self) -> str:
+        return ''.join(self.rng.choice(BASE62) for _ in range(22))
+
+    def _artist(self, artist_pool: int) -> Tuple[int, str, str, List[str]]:
+        # Zipf-like: a few prolific artists, a long tail of one-hit wonders
+        artist_index = min(int(artist_pool * self.rng.random() ** 2), artist_pool - 1)
+        if artist_index not in self.artist_profiles:
+            main_genre = self.rng.choice(list(GENRES))
+            genres = self.rng.sample(GENRES[main_genre], k=self.rng.randint(1, len(GENRES[main_genre])))
+            self.artist_profiles[artist_index] = (self._spotify_id(), main_genre, genres)
+        spotify_artist_id, main_genre, genres = self.artist_profiles[artist_index]
+        return artist_index, spotify_artist_id, main_genre, genres
+
+    def row(self, total_rows: int) -> Dict[str, Any]:
+        """One data2 row"""
+        rng = self.rng
+        artist_pool = self.artists or max(1, total_rows // 8)
+        artist_index, spotify_artist_id, main_genre, genres = self._artist(artist_pool)
+
+        release_date = decade = ''
+        if rng.random() < 0.85:
+            year = int(min(2024, max(1950, rng.gauss(1995, 17))))
+            release_date = f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" if rng.random() < 0.8 else f"{year}"
+            decade = f"{year // 10 * 10}.0"
+
+        row = {
+            'id': self.next_id,
+            'chords': self._chords(),
+            'release_date': release_date,
+            'genres': ' '.join(f"'{genre}'" for genre in genres),
+            'decade': decade,
+            'rock_genre': rng.choice(ROCK_GENRES) if main_genre == 'rock' and rng.random() < 0.6 else '',
+            'artist_id': f"artist_{artist_index}",
+            'main_genre': main_genre if rng.random() < 0.95 else '',
+            'spotify_song_id': self._spotify_id() if rng.random() < 0.97 else '',
+            'spotify_artist_id': spotify_artist_id,
+        }
+        self.next_id += 1
+        self.stats['rows'] += 1
+        return row
+
+
+def generate_synthetic_data2(output_file: str, rows: int, seed: int = 42, duplicate_rate: float = 0.15,
+                             empty_rate: float = 0.02, malformed_rate: float = 0.01,
+                             artists: Optional[int] = None, start_id: int = 0) -> Dict[str, Any]:
+    """Write a synthetic data2 CSV; returns counts and the file's SHA-256"""
+
+    generator = SyntheticData2Generator(seed, duplicate_rate, empty_rate, malformed_rate, artists, start_id)
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=DATA2_COLUMNS, lineterminator='\n')
+        writer.writeheader()
+        for _ in range(rows):
+            writer.writerow(generator.row(rows))
+
+    sha256 = hashlib.sha256()
+    with open(output_file, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha256.update(block)
+
+    return {
+        **generator.stats,
+        'distinct_progressions': len(generator.progressions),
+        'bytes': os.path.getsize(output_file),
+        'sha256': sha256.hexdigest(),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Deterministic synthetic Chordonomicon-style data2 generator')
+    parser.add_argument('--rows', type=int, default=10000, help='Number of songs (default: 10000)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed - same seed, same file (default: 42)')
+    parser.add_argument('--output', '-o', default='synthetic_data2.csv', help='Output CSV path')
+    parser.add_argument('--duplicate-rate', type=float, default=0.15,
+                        help='Share of songs reusing an earlier progression (default: 0.15)')
+    parser.add_argument('--empty-rate', type=float, default=0.02, help='Share of songs with no chords (default: 0.02)')
+    parser.add_argument('--malformed-rate', type=float, default=0.01,
+                        help='Share of songs with malformed chord text (default: 0.01)')
+    parser.add_argument('--artists', type=int, help='Distinct artists (default: rows / 8)')
+    parser.add_argument('--start-id', type=int, default=0, help='First song id (default: 0)')
+    args = parser.parse_args()
+
+    print("🎲 SYNTHETIC DATA2 GENERATOR")
+    print("=" * 50)
+    print(f"🎵 {args.rows:,} songs, seed {args.seed} → {args.output}")
+
+    started = time.time()
+    summary = generate_synthetic_data2(args.output, args.rows, args.seed, args.duplicate_rate,
+                                       args.empty_rate, args.malformed_rate, args.artists, args.start_id)
+
+    print(f"✅ Wrote {summary['rows']:,} rows ({summary['bytes'] / 1024**2:.1f} MB) in {time.time() - started:.1f}s")
+    print(f"🧬 {summary['distinct_progressions']:,} distinct progressions, {summary['duplicates']:,} duplicates")
+    print(f"🕳️  {summary['empty']:,} empty, {summary['malformed']:,} malformed")
+    print(f"🔏 SHA-256: {summary['sha256']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
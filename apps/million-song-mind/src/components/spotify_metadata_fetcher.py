@@ -20,13 +20,26 @@ import time
 import logging
 import argparse
 import os
-from typing import Dict, List, Optional, Tuple
+import shutil
+import sqlite3
+import heapq
+import random
+import itertools
+from typing import Any, Dict, List, Optional, Set, Tuple
+from pathlib import Path
+from collections import OrderedDict, deque
 from dataclasses import dataclass
 from datetime import datetime
 import backoff
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeElapsedColumn
 
+# Shared --rate-limit-file pacing needs flock (macOS/Linux)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -47,11 +60,464 @@ class SpotifyConfig:
     access_token: Optional[str] = None
     token_expires: Optional[float] = None
 
+class RetryableError(Exception):
+    """A request worth retrying later: throttled (429, with Retry-After), 5xx or a timeout"""
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class RequestRejectedError(Exception):
+    """A non-retryable error answer (e.g. 400/401/403) - neither data nor "not found"
+
+    The retry scheduler counts the item as failed, so it is never marked done.
+    """
+    
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+class RetryScheduler:
+    """Bounded-concurrency job runner with non-recursive, capped retries
+    
+    A job that raises RetryableError gives back its concurrency slot and is
+    parked in a delay queue (a heap ordered by ready time): for Retry-After
+    seconds when the server sent one - new dispatches are held back until
+    then too, since the limit is shared - otherwise for a fully jittered
+    exponential backoff. Items that fail max_retries + 1 times are appended
+    to dead_letter_file as JSON lines, tagged with the run's `kind` (the
+    endpoint: track, audio_features, artist or audio_analysis).
+    """
+    
+    def __init__(self, concurrency: int = 10, max_retries: int = 5, base_delay: float = 1.0,
+                 max_delay: float = 60.0, dead_letter_file: Optional[str] = None):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.dead_letter_file = dead_letter_file
+        self.retries = 0
+        self.dead_lettered = 0
+        self.failed = 0
+        self.gave_up_ids: Set[Any] = set()  # Dead-lettered or failed items (multi-id requests expanded)
+        self._paused_until = 0.0  # Event-loop time before which nothing new is dispatched (Retry-After)
+    
+    def _delay(self, attempt: int, error: RetryableError) -> float:
+        if error.retry_after is not None:
+            return error.retry_after
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+    
+    async def run(self, items: List[Any], job, kind: str = 'track') -> Dict[Any, Any]:
+        """Run `await job(item)` for each distinct item; returns item -> result for the ones that succeeded"""
+        loop = asyncio.get_running_loop()
+        ready = deque((item, 0) for item in dict.fromkeys(items))  # (item, attempt)
+        delayed: List[Tuple[float, int, Any, int]] = []  # Heap of (ready_at, seq, item, attempt)
+        running: Dict[asyncio.Future, Tuple[Any, int]] = {}
+        sequence = itertools.count()
+        results: Dict[Any, Any] = {}
+        
+        while ready or delayed or running:
+            now = loop.time()
+            while delayed and delayed[0][0] <= now:
+                _, _, item, attempt = heapq.heappop(delayed)
+                ready.append((item, attempt))
+            if now >= self._paused_until:
+                while ready and len(running) < self.concurrency:
+                    item, attempt = ready.popleft()
+                    running[asyncio.ensure_future(job(item))] = (item, attempt)
+            
+            wake_times = ([delayed[0][0]] if delayed else []) + ([self._paused_until] if ready else [])
+            timeout = max(0.0, min(wake_times) - now) if wake_times else None
+            if not running:
+                await asyncio.sleep(timeout)
+                continue
+            
+            done, _ = await asyncio.wait(list(running), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                item, attempt = running.pop(task)
+                try:
+                    results[item] = task.result()
+                except RetryableError as e:
+                    if attempt >= self.max_retries:
+                        self._dead_letter(kind, item, attempt + 1, e)
+                        continue
+                    delay = self._delay(attempt, e)
+                    if e.retry_after is not None and loop.time() + delay > self._paused_until:
+                        logging.warning(f"Rate limited, parking requests for {delay:.0f} seconds...")
+                        self._paused_until = loop.time() + delay
+                    self.retries += 1
+                    heapq.heappush(delayed, (loop.time() + delay, next(sequence), item, attempt + 1))
+                except Exception as e:
+                    self.failed += 1
+                    self.gave_up_ids.update(item if isinstance(item, tuple) else (item,))
+                    logging.error(f"Failed to fetch {kind} {item}: {e}")
+        
+        return results
+    
+    def _dead_letter(self, kind: str, item: Any, attempts: int, error: Exception):
+        self.dead_lettered += 1
+        self.gave_up_ids.update(item if isinstance(item, tuple) else (item,))
+        logging.error(f"Giving up on {kind} {item} after {attempts} attempts: {error}")
+        if not self.dead_letter_file:
+            return
+        with open(self.dead_letter_file, 'a', encoding='utf-8') as f:
+            for item_id in (item if isinstance(item, tuple) else (item,)):  # Multi-id requests: one line per id
+                f.write(json.dumps({'kind': kind, 'id': item_id, 'attempts': attempts, 'error': str(error),
+                                    'failed_at': datetime.now().isoformat()}) + '\n')
+    
+    def stats(self) -> Dict[str, int]:
+        return {'retries': self.retries, 'dead_lettered': self.dead_lettered, 'failed': self.failed}
+
+class TokenBucketRateLimiter:
+    """Proactive token-bucket pacing for Spotify API requests
+    
+    Kept in GCRA form: the whole bucket state is one theoretical arrival
+    time (TAT). Each request reserves the slot 1/rate seconds after the
+    previous one, and up to `burst` requests may be reserved ahead of now.
+    With state_file set, the TAT lives in a small file guarded by an
+    exclusive flock, so every fetcher process on this machine shares one
+    budget.
+    """
+    
+    def __init__(self, rate: float, burst: int = 1, state_file: Optional[str] = None):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        if state_file and fcntl is None:
+            raise RuntimeError("A shared rate limit file needs fcntl (macOS/Linux)")
+        self.interval = 1.0 / rate
+        self.tolerance = (max(burst, 1) - 1) * self.interval
+        self.state_file = state_file
+        self._tat = 0.0
+    
+    def _advance(self, tat: float, now: float) -> Tuple[float, float]:
+        """(new TAT, seconds to wait) for one request at `now`"""
+        tat = max(tat, now)
+        return tat + self.interval, max(0.0, tat - self.tolerance - now)
+    
+    def reserve(self) -> float:
+        """Reserve the next request slot; returns how long to wait before sending"""
+        now = time.time()  # Wall clock - the state file is shared between processes
+        if not self.state_file:
+            self._tat, wait = self._advance(self._tat, now)
+            return wait
+        
+        fd = os.open(self.state_file, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            # Blocking flock on the event loop thread: fine only because every
+            # holder keeps it for one tiny read-modify-write, never across I/O
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                tat = float(os.read(fd, 64) or 0.0)
+            except ValueError:
+                tat = 0.0  # Torn or foreign content - start over
+            tat, wait = self._advance(tat, now)
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, repr(tat).encode())
+        finally:
+            os.close(fd)  # Releases the lock
+        return wait
+    
+    async def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+class RateLimitCoordinator:
+    """Local-network token bucket shared by fetchers on several machines
+    
+    Line protocol over TCP: a client sends b"acquire\n" and gets back the
+    seconds it must wait. Waits are computed on the coordinator's clock, so
+    machine clock skew does not matter.
+    """
+    
+    DEFAULT_PORT = 8765
+    
+    def __init__(self, rate: float, burst: int = 1, host: str = '0.0.0.0', port: int = DEFAULT_PORT):
+        self.bucket = TokenBucketRateLimiter(rate, burst)
+        self.host = host
+        self.port = port
+        self.requests = 0
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while (await reader.readline()).strip() == b'acquire':
+                self.requests += 1
+                writer.write(f"{self.bucket.reserve():.6f}\n".encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass  # Client went away or the coordinator is shutting down
+        finally:
+            writer.close()
+    
+    async def serve_forever(self):
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        logging.info(f"Rate limit coordinator listening on {self.host}:{self.port}")
+        async with server:
+            await server.serve_forever()
+
+class RemoteRateLimiter:
+    """Client of a RateLimitCoordinator, with a local bucket to fall back on
+    
+    Anything with an async acquire() can stand in for it (e.g. a stub in
+    tests). Connecting and each round trip give up after `timeout`
+    seconds. When the coordinator is unreachable, requests are paced by
+    `fallback` instead of failing, and it is not tried again for
+    `reconnect_backoff` seconds - one warning per outage, not per request.
+    """
+    
+    DEFAULT_TIMEOUT = 2.0
+    DEFAULT_RECONNECT_BACKOFF = 30.0
+    
+    def __init__(self, host: str, port: int = RateLimitCoordinator.DEFAULT_PORT,
+                 fallback: Optional[TokenBucketRateLimiter] = None, timeout: float = DEFAULT_TIMEOUT,
+                 reconnect_backoff: float = DEFAULT_RECONNECT_BACKOFF):
+        self.host = host
+        self.port = port
+        self.fallback = fallback
+        self.timeout = timeout
+        self.reconnect_backoff = reconnect_backoff
+        self._connection: Optional[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = None
+        self._lock = asyncio.Lock()
+        self._retry_at = 0.0  # Monotonic time before which the fallback is used without asking
+    
+    def _in_backoff(self) -> bool:
+        return time.monotonic() < self._retry_at
+    
+    async def _ask(self) -> Optional[float]:
+        """Seconds to wait, from the coordinator; None if it failed while this call queued for the lock"""
+        async with self._lock:  # One request/response pair on the connection at a time
+            if self._in_backoff():
+                return None
+            if self._connection is None:
+                self._connection = await asyncio.wait_for(asyncio.open_connection(self.host, self.port),
+                                                          self.timeout)
+            reader, writer = self._connection
+            try:
+                writer.write(b"acquire\n")
+                await asyncio.wait_for(writer.drain(), self.timeout)
+                return float(await asyncio.wait_for(reader.readline(), self.timeout))
+            except BaseException:
+                writer.close()
+                self._connection = None
+                raise
+    
+    async def acquire(self):
+        wait = None
+        if not self._in_backoff():
+            try:
+                wait = await self._ask()
+            except (OSError, ValueError, asyncio.TimeoutError) as e:
+                if self.fallback is None:
+                    raise
+                self._retry_at = time.monotonic() + self.reconnect_backoff
+                logging.warning(f"Rate limit coordinator {self.host}:{self.port} unavailable "
+                                f"({type(e).__name__}: {e}) - pacing locally for {self.reconnect_backoff:.0f}s")
+        if wait is None:  # Only reachable with a fallback: backoff is never entered without one
+            wait = self.fallback.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+def build_rate_limiter(rate: Optional[float], burst: int = 1, state_file: Optional[str] = None,
+                       coordinator: Optional[str] = None):
+    """Rate limiter from CLI options: coordinator "host[:port]", else local (optionally file-shared), else None"""
+    if coordinator:
+        host, _, port = coordinator.partition(':')
+        fallback = TokenBucketRateLimiter(rate, burst, state_file) if rate else None
+        return RemoteRateLimiter(host, int(port or RateLimitCoordinator.DEFAULT_PORT), fallback)
+    if rate:
+        return TokenBucketRateLimiter(rate, burst, state_file)
+    return None
+
+class ArtistCache:
+    """Spotify artist cache: in-memory LRU in front of an on-disk SQLite table
+    
+    Keyed by artist id. Entries older than the TTL count as misses and get
+    refetched. Only the artist fields _extract_metadata reads are kept.
+    path=None keeps the cache in memory only.
+    """
+    
+    DEFAULT_PATH = 'spotify_artist_cache.sqlite'
+    DEFAULT_TTL_DAYS = 30.0
+    FIELDS = ('name', 'genres', 'popularity', 'followers', 'external_urls')
+    
+    def __init__(self, path: Optional[str] = DEFAULT_PATH, ttl_days: float = DEFAULT_TTL_DAYS,
+                 max_entries: int = 50000):
+        self.ttl_seconds = ttl_days * 86400
+        self.max_entries = max_entries
+        self._memory: 'OrderedDict[str, Tuple[float, Dict]]' = OrderedDict()  # artist_id -> (fetched_at, artist)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path)
+            self._db.execute('CREATE TABLE IF NOT EXISTS artists '
+                             '(artist_id TEXT PRIMARY KEY, fetched_at REAL NOT NULL, data TEXT NOT NULL)')
+            self._db.commit()
+    
+    def get(self, artist_id: str) -> Optional[Dict]:
+        return self.get_many([artist_id]).get(artist_id)
+    
+    def get_many(self, artist_ids: List[str]) -> Dict[str, Dict]:
+        """Fresh cached artists among artist_ids (memory first, then disk)"""
+        artist_ids = list(dict.fromkeys(artist_ids))
+        now = time.time()
+        found: Dict[str, Dict] = {}
+        missing = []
+        for artist_id in artist_ids:
+            entry = self._memory.get(artist_id)
+            if entry is not None and now - entry[0] < self.ttl_seconds:
+                self._memory.move_to_end(artist_id)
+                found[artist_id] = entry[1]
+                self.memory_hits += 1
+            else:
+                missing.append(artist_id)
+        
+        if missing and self._db is not None:
+            for i in range(0, len(missing), 500):  # Stay under SQLite's host parameter limit
+                chunk = missing[i:i + 500]
+                rows = self._db.execute(f"SELECT artist_id, fetched_at, data FROM artists "
+                                        f"WHERE artist_id IN ({','.join('?' * len(chunk))})", chunk)
+                for artist_id, fetched_at, data in rows:
+                    if now - fetched_at < self.ttl_seconds:
+                        found[artist_id] = json.loads(data)
+                        self._remember(artist_id, fetched_at, found[artist_id])
+                        self.disk_hits += 1
+        
+        self.misses += len(artist_ids) - len(found)
+        return found
+    
+    def put(self, artist_id: str, artist: Dict):
+        self.put_many({artist_id: artist})
+    
+    def put_many(self, artists: Dict[str, Dict]):
+        """Store freshly fetched artists in memory and on disk"""
+        now = time.time()
+        rows = []
+        for artist_id, artist in artists.items():
+            slim = {field: artist[field] for field in self.FIELDS if field in artist}
+            self._remember(artist_id, now, slim)
+            rows.append((artist_id, now, json.dumps(slim)))
+        if rows and self._db is not None:
+            self._db.executemany('INSERT OR REPLACE INTO artists VALUES (?, ?, ?)', rows)
+            self._db.commit()
+    
+    def _remember(self, artist_id: str, fetched_at: float, artist: Dict):
+        self._memory[artist_id] = (fetched_at, artist)
+        self._memory.move_to_end(artist_id)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            'lookups': lookups,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (lookups - self.misses) / lookups if lookups else 0.0
+        }
+    
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+class SpotifyResultLog:
+    """Append-only, resumable Spotify fetch results
+    
+    <output>.parts/results.jsonl gets one _extract_metadata row per fetched
+    track and done_ids.txt is the cursor of finished ids. After every
+    chunk both are flushed and fsync'd, results first, so a crash loses at
+    most the chunk in flight. Resuming reads only the cursor (a torn tail
+    line is dropped); ids that were dead-lettered or failed are never
+    marked done and get fetched again. assemble() writes the final CSV from
+    the results log, keeping the last row per track.
+    """
+    
+    RESULTS = 'results.jsonl'
+    DONE_IDS = 'done_ids.txt'
+    
+    def __init__(self, output_file: str):
+        self.output_file = output_file
+        self.directory = Path(f"{output_file}.parts")
+        self._results = None
+        self._done = None
+        self.resumed_ids = 0
+    
+    def open(self, resume: bool = False) -> Set[str]:
+        """Open the log for appending; returns the ids finished by earlier runs (empty unless resume)"""
+        if not resume and self.directory.exists():
+            shutil.rmtree(self.directory)  # A fresh run never mixes with a stale log
+        self.directory.mkdir(parents=True, exist_ok=True)
+        
+        done: Set[str] = set()
+        for name in (self.RESULTS, self.DONE_IDS):
+            self._drop_torn_tail(self.directory / name)
+        with open(self.directory / self.DONE_IDS, 'r', encoding='utf-8') as f:
+            done.update(line.rstrip('\n') for line in f)
+        self.resumed_ids = len(done)
+        
+        self._results = open(self.directory / self.RESULTS, 'a', encoding='utf-8')
+        self._done = open(self.directory / self.DONE_IDS, 'a', encoding='utf-8')
+        return done
+    
+    @staticmethod
+    def _drop_torn_tail(path: Path):
+        """Truncate a file to its last complete line (creating it if missing)"""
+        with open(path, 'ab+') as f:
+            size = f.tell()
+            tail = 4096
+            while True:
+                f.seek(max(0, size - tail))
+                cut = f.read().rfind(b'\n')
+                if cut >= 0 or tail >= size:
+                    break
+                tail *= 2
+            keep = max(0, size - tail) + cut + 1 if cut >= 0 else 0
+            if keep < size:
+                f.truncate(keep)
+    
+    def append(self, results: List[Dict], done_ids: List[str]):
+        """Durably add one chunk: its result rows, then the ids it finished"""
+        for row in results:
+            self._results.write(json.dumps(row) + '\n')
+        self._results.flush()
+        os.fsync(self._results.fileno())
+        
+        self._done.write(''.join(f"{spotify_id}\n" for spotify_id in done_ids))
+        self._done.flush()
+        os.fsync(self._done.fileno())
+    
+    def assemble(self) -> int:
+        """Write the final CSV from the results log and remove the log; returns the row count"""
+        self._results.close()
+        self._done.close()
+        rows: Dict[str, Dict] = {}  # Last row per track - a chunk re-fetched after a crash may repeat some
+        with open(self.directory / self.RESULTS, 'r', encoding='utf-8') as f:
+            for line in f:
+                row = json.loads(line)
+                rows[row.get('spotify_song_id', '')] = row
+        pd.DataFrame(list(rows.values())).to_csv(self.output_file, index=False)
+        shutil.rmtree(self.directory)
+        return len(rows)
+
 class SpotifyMetadataFetcher:
     """Comprehensive Spotify metadata fetcher for data3.5"""
     
-    def __init__(self, config: SpotifyConfig):
+    # Max ids per request of the multi-id endpoints used by fetch_spotify_data_batch
+    TRACKS_BATCH_SIZE = 50
+    FEATURES_BATCH_SIZE = 100
+    ARTISTS_BATCH_SIZE = 50
+    BATCH_CHUNK_SIZE = 500  # Tracks per fetch_spotify_data_batch call in batch mode
+    
+    def __init__(self, config: SpotifyConfig, artist_cache: Optional[ArtistCache] = None, rate_limiter: Any = None,
+                 retry_scheduler: Optional[RetryScheduler] = None):
         self.config = config
+        self.retry_scheduler = retry_scheduler or RetryScheduler()
+        self.artist_cache = artist_cache
+        self.rate_limiter = rate_limiter  # Anything with an async acquire(), e.g. TokenBucketRateLimiter
         self.session = None
         self.rate_limit_remaining = 1000
         self.rate_limit_reset = 0
@@ -67,6 +533,11 @@ class SpotifyMetadataFetcher:
         if self.session:
             await self.session.close()
     
+    async def _pace(self):
+        """Wait for a request slot from the rate limiter, if any"""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+    
     @backoff.on_exception(backoff.expo, aiohttp.ClientError, max_tries=5)
     async def get_access_token(self) -> str:
         """Get Spotify access token"""
@@ -93,47 +564,167 @@ class SpotifyMetadataFetcher:
             
             return self.config.access_token
     
-    @backoff.on_exception(backoff.expo, aiohttp.ClientError, max_tries=3)
-    async def fetch_spotify_data(self, spotify_id: str) -> Dict:
-        """Fetch comprehensive Spotify metadata for a track"""
+    async def _get_json(self, url: str, params: Optional[Dict] = None, what: str = '',
+                        not_found_ok: bool = True) -> Optional[Dict]:
+        """GET one API url: the JSON body on 200, None on 404 when not_found_ok
+        
+        429s, 5xx responses, timeouts and connection errors raise
+        RetryableError for the retry scheduler instead of being retried here.
+        Any other status raises RequestRejectedError - only a 200 (or an
+        allowed 404) is an answer. `what` names the request in the error.
+        """
         token = await self.get_access_token()
-        headers = {'Authorization': f'Bearer {token}'}
+        await self._pace()
+        try:
+            async with self.session.get(url, headers={'Authorization': f'Bearer {token}'}, params=params) as response:
+                if response.status == 429:
+                    raise RetryableError(f"429 rate limited: {url}", float(response.headers.get('Retry-After', 60)))
+                if response.status >= 500:
+                    raise RetryableError(f"{response.status} server error: {url}")
+                if response.status == 404 and not_found_ok:  # Not found is normal for some ids
+                    return None
+                if response.status != 200:
+                    raise RequestRejectedError(f"{what or url} failed: {response.status}", response.status)
+                return await response.json()
+        except (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError) as e:
+            raise RetryableError(f"{type(e).__name__}: {url}") from e
+    
+    async def fetch_spotify_data(self, spotify_id: str) -> Dict:
+        """Fetch comprehensive Spotify metadata for a track
         
+        Throttling and server errors raise RetryableError; run it through
+        the retry scheduler (fetch_spotify_data_many) to have them retried.
+        Any other failed request - the track's or its audio features, artist
+        or analysis - raises RequestRejectedError rather than leaving blanks.
+        """
         # Fetch track data
-        track_url = f"https://api.spotify.com/v1/tracks/{spotify_id}"
-        async with self.session.get(track_url, headers=headers) as response:
-            if response.status == 429:
-                retry_after = int(response.headers.get('Retry-After', 60))
-                logging.warning(f"Rate limited, waiting {retry_after} seconds...")
-                await asyncio.sleep(retry_after)
-                return await self.fetch_spotify_data(spotify_id)
-            
-            if response.status != 200:
-                logging.error(f"Track fetch failed for {spotify_id}: {response.status}")
-                return {}
-            
-            track_data = await response.json()
+        track_data = await self._get_json(f"https://api.spotify.com/v1/tracks/{spotify_id}",
+                                          what=f"Track fetch for {spotify_id}")
+        if track_data is None:
+            return {}
         
         # Fetch audio features
-        features_url = f"https://api.spotify.com/v1/audio-features/{spotify_id}"
-        async with self.session.get(features_url, headers=headers) as response:
-            features_data = await response.json() if response.status == 200 else {}
+        features_data = await self._get_json(f"https://api.spotify.com/v1/audio-features/{spotify_id}") or {}
         
         # Fetch artist data
-        artist_id = track_data.get('artists', [{}])[0].get('id')
-        artist_data = {}
-        if artist_id:
-            artist_url = f"https://api.spotify.com/v1/artists/{artist_id}"
-            async with self.session.get(artist_url, headers=headers) as response:
-                artist_data = await response.json() if response.status == 200 else {}
+        artist_id = (track_data.get('artists') or [{}])[0].get('id')
+        artist_data = await self._fetch_artist(artist_id) if artist_id else {}
         
         # Fetch light audio analysis (track section only)
-        analysis_url = f"https://api.spotify.com/v1/audio-analysis/{spotify_id}"
-        async with self.session.get(analysis_url, headers=headers) as response:
-            analysis_data = await response.json() if response.status == 200 else {}
+        analysis_data = await self.fetch_audio_analysis(spotify_id)
         
         # Extract and structure the data
         return self._extract_metadata(track_data, features_data, artist_data, analysis_data)
+    
+    async def fetch_spotify_data_many(self, spotify_ids: List[str]) -> List[Dict]:
+        """fetch_spotify_data for many tracks under the retry scheduler, in input order ({} when not fetched)"""
+        results = await self.retry_scheduler.run(spotify_ids, self.fetch_spotify_data)
+        return [results.get(spotify_id) or {} for spotify_id in spotify_ids]
+    
+    async def _fetch_artist(self, artist_id: str) -> Dict:
+        """One artist, from the artist cache when it has a fresh entry"""
+        if self.artist_cache is not None:
+            cached = self.artist_cache.get(artist_id)
+            if cached is not None:
+                return cached
+        
+        artist_data = await self._get_json(f"https://api.spotify.com/v1/artists/{artist_id}") or {}
+        if artist_data and self.artist_cache is not None:
+            self.artist_cache.put(artist_id, artist_data)
+        return artist_data
+    
+    async def _get_batch(self, url: str, ids: Tuple[str, ...], field: str) -> List[Optional[Dict]]:
+        """One multi-id request: the response's `field` list aligned with ids (None = not found)"""
+        data = await self._get_json(url, {'ids': ','.join(ids)}, what=f"Batch fetch of {len(ids)} ids from {url}",
+                                    not_found_ok=False)
+        items = data.get(field) or []
+        return items + [None] * (len(ids) - len(items))
+    
+    async def _fetch_many(self, url: str, ids: List[str], field: str, batch_size: int,
+                          kind: str) -> Tuple[Dict[str, Dict], Set[str]]:
+        """id -> object for every id found, plus the ids whose request was given up on
+        
+        batch_size ids per request, requests run by the retry scheduler.
+        """
+        async def fetch_chunk(chunk: Tuple[str, ...]) -> Optional[List[Optional[Dict]]]:
+            try:
+                return await self._get_batch(url, chunk, field)
+            except RequestRejectedError:
+                if len(chunk) == 1:
+                    raise
+                return None  # Rejected as a whole (one malformed id is enough) - split below
+        
+        chunks = [tuple(ids[i:i + batch_size]) for i in range(0, len(ids), batch_size)]
+        responses = await self.retry_scheduler.run(chunks, fetch_chunk, kind)
+        singles = [(item_id,) for chunk, items in responses.items() if items is None for item_id in chunk]
+        if singles:
+            logging.warning(f"{kind} request rejected - retrying its {len(singles)} ids one at a time")
+            responses.update(await self.retry_scheduler.run(singles, fetch_chunk, kind))
+        
+        found = {}
+        for chunk, items in responses.items():
+            for item_id, item in zip(chunk, items or []):
+                if item:
+                    found[item_id] = item
+        gave_up = {item_id for chunk in chunks + singles if chunk not in responses for item_id in chunk}
+        return found, gave_up
+    
+    async def fetch_audio_analysis(self, spotify_id: str) -> Dict:
+        """Light audio analysis for one track (there is no multi-id endpoint for it)"""
+        return await self._get_json(f"https://api.spotify.com/v1/audio-analysis/{spotify_id}") or {}
+    
+    async def fetch_spotify_data_batch(self, spotify_ids: List[str],
+                                       include_analysis: bool = True) -> Tuple[List[Dict], Set[str]]:
+        """Batch-endpoint version of fetch_spotify_data for many tracks
+        
+        Tracks, audio features and artists come from the multi-id endpoints
+        (50 / 100 / 50 ids per request), and an artist shared by several
+        tracks is requested once - and not at all when the artist cache has
+        it. Audio analysis stays per track (run concurrently by the retry
+        scheduler) or is skipped with include_analysis=False, leaving its
+        columns 0.
+        
+        Returns one _extract_metadata dict per input id, in input order, with
+        {} for tracks that were not found, and the set of track ids that came
+        back incomplete: the track itself, or its audio features, artist or
+        analysis request, was given up on. Their rows (if any) carry blanks
+        for the missing parts, so callers should leave them unfinished.
+        """
+        unique_ids = list(dict.fromkeys(spotify_ids))
+        tracks, incomplete = await self._fetch_many("https://api.spotify.com/v1/tracks", unique_ids,
+                                                    'tracks', self.TRACKS_BATCH_SIZE, 'track')
+        found_ids = [spotify_id for spotify_id in unique_ids if spotify_id in tracks]
+        
+        features, features_gave_up = await self._fetch_many("https://api.spotify.com/v1/audio-features", found_ids,
+                                                            'audio_features', self.FEATURES_BATCH_SIZE,
+                                                            'audio_features')
+        incomplete |= features_gave_up
+        
+        # Dedupe artists across the tracks before requesting them
+        track_artists = {spotify_id: (tracks[spotify_id].get('artists') or [{}])[0].get('id')
+                         for spotify_id in found_ids}
+        artist_ids = list(dict.fromkeys(artist_id for artist_id in track_artists.values() if artist_id))
+        artists = self.artist_cache.get_many(artist_ids) if self.artist_cache is not None else {}
+        fetched_artists, artists_gave_up = await self._fetch_many(
+            "https://api.spotify.com/v1/artists", [artist_id for artist_id in artist_ids if artist_id not in artists],
+            'artists', self.ARTISTS_BATCH_SIZE, 'artist')
+        if self.artist_cache is not None:
+            self.artist_cache.put_many(fetched_artists)
+        artists.update(fetched_artists)
+        incomplete.update(spotify_id for spotify_id in found_ids if track_artists[spotify_id] in artists_gave_up)
+        
+        analyses = {}
+        if include_analysis:
+            analyses = await self.retry_scheduler.run(found_ids, self.fetch_audio_analysis, 'audio_analysis')
+            incomplete.update(spotify_id for spotify_id in found_ids if spotify_id not in analyses)
+        
+        metadata = {
+            spotify_id: self._extract_metadata(tracks[spotify_id], features.get(spotify_id, {}),
+                                               artists.get(track_artists[spotify_id], {}),
+                                               analyses.get(spotify_id, {}))
+            for spotify_id in found_ids
+        }
+        return [metadata.get(spotify_id, {}) for spotify_id in spotify_ids], incomplete
 
     @backoff.on_exception(backoff.expo, aiohttp.ClientError, max_tries=3)
     async def search_track_id(self, artist_name: str, song_name: str) -> Optional[str]:
@@ -145,6 +736,7 @@ class SpotifyMetadataFetcher:
         # Basic query; URL-encode via params
         query = f"track:{song_name} artist:{artist_name}".strip()
         params = {"q": query, "type": "track", "limit": 1}
+        await self._pace()
         async with self.session.get("https://api.spotify.com/v1/search", headers=headers, params=params) as resp:
             if resp.status != 200:
                 return None
@@ -210,27 +802,33 @@ class SpotifyMetadataFetcher:
         
         return metadata
     
-    async def process_chunk(self, spotify_ids: List[str], progress) -> List[Dict]:
-        """Process a chunk of Spotify IDs with progress tracking"""
-        results = []
-        semaphore = asyncio.Semaphore(10)  # Limit concurrent requests
+    async def fetch_into_log(self, spotify_ids: List[str], result_log: SpotifyResultLog, batch: bool = False,
+                             progress: Optional[Progress] = None, task_id: Any = None) -> None:
+        """Fetch spotify_ids chunk by chunk into result_log, advancing progress per chunk
         
-        async def fetch_with_semaphore(spotify_id: str):
-            async with semaphore:
+        Per-track requests, or the multi-id endpoints with batch=True. Each
+        chunk is durable once appended; ids given up on - or whose rows came
+        back incomplete - are not marked done, so a resumed run refetches them.
+        """
+        chunk_size = self.BATCH_CHUNK_SIZE if batch else 50
+        for i in range(0, len(spotify_ids), chunk_size):
+            chunk = spotify_ids[i:i + chunk_size]
+            if batch:
+                # Multi-id endpoints, artists deduped across the chunk
                 try:
-                    data = await self.fetch_spotify_data(spotify_id)
-                    progress.advance(1)
-                    return data
+                    results, incomplete = await self.fetch_spotify_data_batch(chunk)
+                    self.retry_scheduler.gave_up_ids.update(incomplete)  # Partial rows are kept but not marked done
                 except Exception as e:
-                    logging.error(f"Failed to fetch {spotify_id}: {e}")
-                    progress.advance(1)
-                    return {}
-        
-        tasks = [fetch_with_semaphore(sid) for sid in spotify_ids]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Filter out exceptions
-        return [r for r in results if isinstance(r, dict) and r]
+                    logging.error(f"Failed to fetch batch of {len(chunk)} tracks: {e}")
+                    self.retry_scheduler.gave_up_ids.update(chunk)
+                    results = []
+            else:
+                # Per-track requests - concurrency, retries and dead-lettering by the retry scheduler
+                results = await self.fetch_spotify_data_many(chunk)
+            if progress is not None:
+                progress.advance(task_id, len(chunk))
+            result_log.append([data for data in results if data.get('spotify_song_id')],
+                              [spotify_id for spotify_id in chunk if spotify_id not in self.retry_scheduler.gave_up_ids])
 
 async def main():
     parser = argparse.ArgumentParser(description='Spotify Metadata Fetcher v3.5')
@@ -239,11 +837,40 @@ async def main():
     parser.add_argument('--end', type=int, help='End row index')
     parser.add_argument('--output', default='data3.5_spotify_extras.csv', help='Output CSV file')
     parser.add_argument('--test', action='store_true', help='Test mode (100 rows)')
-    parser.add_argument('--client-id', required=True, help='Spotify Client ID')
-    parser.add_argument('--client-secret', required=True, help='Spotify Client Secret')
+    parser.add_argument('--batch', action='store_true',
+                        help='Use the multi-id tracks/audio-features/artists endpoints (50/100/50 ids per request)')
+    parser.add_argument('--artist-cache', default=ArtistCache.DEFAULT_PATH,
+                        help=f'On-disk artist cache (default: {ArtistCache.DEFAULT_PATH})')
+    parser.add_argument('--artist-cache-ttl-days', type=float, default=ArtistCache.DEFAULT_TTL_DAYS,
+                        help=f'Refetch cached artists older than this (default: {ArtistCache.DEFAULT_TTL_DAYS:.0f})')
+    parser.add_argument('--no-artist-cache', action='store_true', help='Fetch every artist from the API')
+    parser.add_argument('--client-id', help='Spotify Client ID (required unless serving a rate coordinator)')
+    parser.add_argument('--client-secret', help='Spotify Client Secret (required unless serving a rate coordinator)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted run from <output>.parts/, skipping tracks it already finished')
+    parser.add_argument('--max-retries', type=int, default=5,
+                        help='Retries per request for 429/5xx/timeouts before its ids go to the dead-letter file (default: 5)')
+    parser.add_argument('--dead-letter', help='JSON-lines file for ids that exhaust their retries (default: <output>.dead_letter.jsonl)')
+    parser.add_argument('--rate-limit', type=float, help='Pace API requests to this many per second (default: off)')
+    parser.add_argument('--rate-burst', type=int, default=10, help='Requests allowed ahead of the pace (default: 10)')
+    parser.add_argument('--rate-limit-file',
+                        help='Share the --rate-limit budget with other fetcher processes on this machine through this file')
+    parser.add_argument('--rate-coordinator', metavar='HOST[:PORT]',
+                        help='Take request slots from a rate coordinator shared by several machines')
+    parser.add_argument('--serve-rate-coordinator', type=int, metavar='PORT',
+                        help='Run the cross-machine rate coordinator for --rate-limit on PORT instead of fetching')
     
     args = parser.parse_args()
     
+    if args.serve_rate_coordinator:
+        if not args.rate_limit:
+            parser.error('--serve-rate-coordinator needs --rate-limit')
+        await RateLimitCoordinator(args.rate_limit, args.rate_burst, port=args.serve_rate_coordinator).serve_forever()
+        return
+    if not args.client_id or not args.client_secret:
+        parser.error('--client-id and --client-secret are required')
+    rate_limiter = build_rate_limiter(args.rate_limit, args.rate_burst, args.rate_limit_file, args.rate_coordinator)
+    
     # Load input data
     console.print("📊 Loading input data...")
     df = pd.read_csv(args.input, low_memory=False, dtype=str)
@@ -268,14 +895,14 @@ async def main():
         console.print("🔎 No track ids present. Resolving via search (artist_name + song_name)...")
         # Resolve ids sequentially to stay safe with older hardware
         config = SpotifyConfig(args.client_id, args.client_secret)
-        async with SpotifyMetadataFetcher(config) as fetcher_for_search:
+        async with SpotifyMetadataFetcher(config, rate_limiter=rate_limiter) as fetcher_for_search:
             resolved: List[str] = []
             for _, row in df[['artist_name','song_name']].fillna('').itertuples():
                 # Note: itertuples yields Index then fields; avoid unpack mismatch
                 pass
         # Fallback: simple loop with iterrows
         config = SpotifyConfig(args.client_id, args.client_secret)
-        async with SpotifyMetadataFetcher(config) as fetcher_for_search:
+        async with SpotifyMetadataFetcher(config, rate_limiter=rate_limiter) as fetcher_for_search:
             resolved: List[str] = []
             for _, r in df.iterrows():
                 aid = await fetcher_for_search.search_track_id(str(r.get('artist_name','')), str(r.get('song_name','')))
@@ -286,8 +913,19 @@ async def main():
     
     # Initialize fetcher
     config = SpotifyConfig(args.client_id, args.client_secret)
+    artist_cache = None if args.no_artist_cache else ArtistCache(args.artist_cache, args.artist_cache_ttl_days)
+    
+    retry_scheduler = RetryScheduler(max_retries=args.max_retries,
+                                     dead_letter_file=args.dead_letter or f"{args.output}.dead_letter.jsonl")
     
-    async with SpotifyMetadataFetcher(config) as fetcher:
+    result_log = SpotifyResultLog(args.output)
+    done_ids = result_log.open(resume=args.resume)
+    if done_ids:
+        total_ids = len(spotify_ids)
+        spotify_ids = [sid for sid in spotify_ids if sid not in done_ids]
+        console.print(f"♻️  Resuming: {total_ids - len(spotify_ids):,} tracks already done, {len(spotify_ids):,} to go")
+    
+    async with SpotifyMetadataFetcher(config, artist_cache, rate_limiter, retry_scheduler) as fetcher:
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -298,33 +936,27 @@ async def main():
         ) as progress:
             
             task = progress.add_task("Fetching Spotify metadata...", total=len(spotify_ids))
-            
-            # Process in chunks
-            chunk_size = 50
-            all_results = []
-            
-            for i in range(0, len(spotify_ids), chunk_size):
-                chunk = spotify_ids[i:i+chunk_size]
-                results = await fetcher.process_chunk(chunk, progress)
-                all_results.extend(results)
-                
-                # Save progress every 1000 tracks
-                if len(all_results) % 1000 == 0:
-                    temp_df = pd.DataFrame(all_results)
-                    temp_df.to_csv(f"{args.output}.temp", index=False)
-                    console.print(f"💾 Progress saved: {len(all_results)} tracks processed")
+            await fetcher.fetch_into_log(spotify_ids, result_log, args.batch, progress, task)
     
     # Save final results
     console.print("💾 Saving final results...")
-    final_df = pd.DataFrame(all_results)
-    final_df.to_csv(args.output, index=False)
+    total_results = result_log.assemble()
     
-    console.print(f"✅ COMPLETE! Processed {len(all_results)} tracks")
+    console.print(f"✅ COMPLETE! Processed {total_results} tracks")
     console.print(f"📁 Output: {args.output}")
-    if spotify_ids:
-        console.print(f"📊 Success rate: {len(all_results)/len(spotify_ids)*100:.1f}%")
+    total_ids = len(spotify_ids) + len(done_ids)
+    if total_ids:
+        console.print(f"📊 Success rate: {total_results/total_ids*100:.1f}%")
     else:
         console.print("📊 Success rate: N/A (no input track ids)")
+    retry_stats = retry_scheduler.stats()
+    console.print(f"🔁 Retries: {retry_stats['retries']:,} | dead-lettered: {retry_stats['dead_lettered']:,} "
+                  f"({retry_scheduler.dead_letter_file}) | failed: {retry_stats['failed']:,}")
+    if artist_cache is not None:
+        cache_stats = artist_cache.stats()
+        console.print(f"🎤 Artist cache hit rate: {cache_stats['hit_rate']*100:.1f}% "
+                      f"({cache_stats['lookups'] - cache_stats['misses']:,}/{cache_stats['lookups']:,} lookups)")
+        artist_cache.close()
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
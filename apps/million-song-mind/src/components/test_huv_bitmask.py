@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test HUV Bitmask Encoding
+Round-trips TRUE HUV text fingerprints through HuvBitmaskCodec
+(harmonic_fingerprint_bits) and checks that the text comes back exactly
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import VIPER_ULTIMATE_UNIFIED as viper
+from generate_synthetic_data2 import generate_synthetic_data2
+
+CORPUS_ROWS = 2000
+CORPUS_SEED = 20240501
+
+def round_trip(fingerprint):
+    """(decoded text, encoded) for one text fingerprint"""
+    encoded = viper.HuvBitmaskCodec.encode(fingerprint)
+    return viper.HuvBitmaskCodec.decode(encoded), encoded
+
+def test_edge_cases():
+    """Hand-picked fingerprints covering every word kind of the format"""
+
+    print("🧪 TESTING EDGE CASES")
+    print("=" * 50)
+
+    all_slots = ','.join(['1'] * viper.HuvBitmaskCodec.CHORD_SLOTS)
+    test_cases = [
+        "",                                          # No harmony
+        "1",                                         # Shortest chord vector
+        "1,1,0,0,0,1",                               # Trailing zero slots trimmed
+        "0,0,0,0,0,0,0,0,0,0,0,1",                   # Extension slot only
+        all_slots,                                   # Every slot set
+        "<verse_1>|1,1|1,1,0,0,0,1|<chorus_2>|1,1",  # Canonical section markers
+        "<intro>|1,1|<outro>",                       # Markers without a number
+        "<chorus_65535>|1,1",                        # Largest section number
+        "<Chorus 1>|1,1|<solo_x>",                   # Non-canonical markers, stored verbatim
+        "<coda_1>|1,1",                              # Unknown section type, verbatim
+        "<bridge_01>|1,1",                           # Zero-padded number is not canonical
+        "<refrão>|1,1|<ça_va>",                      # Multi-byte UTF-8
+        "<>|1",                                      # Empty marker
+    ]
+
+    failures = 0
+    for i, fingerprint in enumerate(test_cases, 1):
+        decoded, encoded = round_trip(fingerprint)
+        status = "✅" if decoded == fingerprint else "❌"
+        failures += decoded != fingerprint
+        print(f"{status} Test {i}: {fingerprint!r} → {encoded!r}")
+        if decoded != fingerprint:
+            print(f"   Decoded: {decoded!r}")
+
+    print("\n📋 INVALID INPUT:")
+    print("-" * 30)
+    too_long = ','.join(['0'] * (viper.HuvBitmaskCodec.CHORD_SLOTS + 1))
+    for fingerprint in ["1,2,0", "1,,1", too_long, "a|1"]:
+        try:
+            viper.HuvBitmaskCodec.encode(fingerprint)
+        except ValueError as e:
+            print(f"✅ {fingerprint[:40]!r} rejected: {e}")
+        else:
+            failures += 1
+            print(f"❌ {fingerprint[:40]!r} was encoded instead of rejected")
+
+    return failures == 0
+
+def test_with_generated_fingerprints():
+    """Round-trip the fingerprints the engine produces for a synthetic corpus"""
+
+    print("\n📊 TESTING WITH GENERATED FINGERPRINTS")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        corpus = os.path.join(temp_dir, 'synthetic_data2.csv')
+        generate_synthetic_data2(corpus, CORPUS_ROWS, seed=CORPUS_SEED)
+        chords = pd.read_csv(corpus, usecols=['chords'], dtype={'chords': 'string'})['chords']
+
+    engine = viper.UltimatePureMusicTheoryEngine()
+    fingerprints = []
+    for value in chords:
+        if viper._has_no_harmony(value):
+            continue
+        sequence = engine.extract_cpml_sequence_ultimate(str(value))
+        if sequence:
+            fingerprints.append(engine.generate_huv_fingerprint_ultimate(sequence))
+
+    mismatches = 0
+    text_chars = encoded_chars = 0
+    for fingerprint in fingerprints:
+        decoded, encoded = round_trip(fingerprint)
+        text_chars += len(fingerprint)
+        encoded_chars += len(encoded)
+        if decoded != fingerprint:
+            mismatches += 1
+            if mismatches <= 5:  # Show first 5 mismatches
+                print(f"❌ {fingerprint[:80]!r} → {decoded[:80]!r}")
+
+    print(f"Fingerprints: {len(fingerprints):,} | mismatches: {mismatches:,}")
+    if encoded_chars:
+        print(f"Text: {text_chars:,} chars | bitmask: {encoded_chars:,} chars "
+              f"({text_chars / encoded_chars:.2f}x smaller)")
+
+    return mismatches == 0 and len(fingerprints) > 0
+
+if __name__ == "__main__":
+    print("🔢 HUV BITMASK ROUND-TRIP TEST")
+    print("=" * 50)
+
+    success1 = test_edge_cases()
+    success2 = test_with_generated_fingerprints()
+
+    if success1 and success2:
+        print("\n🎉 All tests passed!")
+    else:
+        print("\n💥 Some tests failed!")
+        sys.exit(1)
@@ -102,6 +102,51 @@ export const parseHUVFingerprint = (huvString: string): {
   }
 };
 
+// Section types of the HUV bitmask format (same order as the Python encoder)
+const HUV_SECTION_TYPES = [
+  'verse', 'chorus', 'bridge', 'intro', 'outro', 'solo', 'prechorus', 'refrain', 'instrumental', 'interlude', 'other'
+];
+
+// Decode the compact harmonic_fingerprint_bits column (base64, little-endian uint32 per token)
+// back into the TRUE HUV text format, e.g. for parseHUVFingerprint
+export const decodeHUVBitmask = (encoded: string): string => {
+  if (!encoded || typeof encoded !== 'string') {
+    return '';
+  }
+
+  const bytes = Uint8Array.from(atob(encoded), c => c.charCodeAt(0));
+  const view = new DataView(bytes.buffer);
+  const wordCount = Math.floor(bytes.length / 4);
+  const tokens: string[] = [];
+
+  let position = 0;
+  while (position < wordCount) {
+    const word = view.getUint32(position * 4, true);
+    position += 1;
+
+    if (word >>> 30 === 3) {
+      // Verbatim section marker: UTF-8 bytes follow in the next words
+      const length = word & 0xffff;
+      tokens.push(new TextDecoder().decode(bytes.subarray(position * 4, position * 4 + length)));
+      position += Math.ceil(length / 4);
+    } else if (word >>> 31 === 1) {
+      // Canonical section marker <type> / <type_n>
+      const sectionType = HUV_SECTION_TYPES[(word >>> 16) & 0xff];
+      const number = word & 0xffff;
+      tokens.push(number ? `<${sectionType}_${number}>` : `<${sectionType}>`);
+    } else {
+      // Chord: bit i = HUV slot i, trailing zero slots omitted
+      const slots: number[] = [];
+      for (let i = 0; word >>> i !== 0; i++) {
+        slots.push((word >>> i) & 1);
+      }
+      tokens.push(slots.join(','));
+    }
+  }
+
+  return tokens.join('|');
+};
+
 
 
 // Key inference from chord progression